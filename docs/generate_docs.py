@@ -262,6 +262,41 @@ generator.process_class("Scope", "ossapiv2")
 generator.process_class("Domain", "ossapiv2")
 generator.process_class("Grant", "ossapiv2")
 generator.process_class("Replay", "replay")
+generator.process_class("TokenStore", "token_store")
+generator.process_class("MemoryTokenStore", "token_store")
+generator.process_class("FileTokenStore", "token_store")
+generator.process_class("SQLiteTokenStore", "token_store")
+generator.process_class("ConnectionStats", "connections")
+generator.process_class("RateLimiter", "ratelimit")
+generator.process_class("TokenBucket", "ratelimit")
+generator.process_class("FileRateLimiter", "ratelimit")
+generator.process_class("CoordinatedRateLimiter", "ratelimit")
+generator.process_class("RateLimitCoordinator", "ratelimit")
+generator.process_class("RateLimitStats", "ratelimit")
+generator.process_class("RateLimitState", "ratelimit")
+generator.process_class("RetryPolicy", "retry")
+generator.process_class("HedgePolicy", "hedging")
+generator.process_class("AdaptiveConcurrencyLimiter", "concurrency")
+generator.process_class("Priority", "scheduler")
+generator.process_class("PriorityScheduler", "scheduler")
+generator.process_class("AsyncPriorityScheduler", "scheduler")
+generator.process_class("SingleFlight", "coalescing")
+generator.process_class("AsyncSingleFlight", "coalescing")
+generator.process_class("Batcher", "batching")
+generator.process_class("AsyncBatcher", "batching")
+generator.process_class("BulkLookupError", "bulk")
+generator.process_class("AttributesCache", "attributes")
+generator.process_class("MemoryAttributesCache", "attributes")
+generator.process_class("SQLiteAttributesCache", "attributes")
+generator.process_class("ResponseCache", "cache")
+generator.process_class("SQLiteResponseCache", "cache")
+generator.process_class("CachedResponse", "cache")
+generator.process_class("CacheStats", "cache")
+generator.process_class("ReplayStore", "replay_store")
+generator.process_class("FileReplayStore", "replay_store")
+generator.process_class("ChecksumIndex", "checksums")
+generator.process_class("MemoryChecksumIndex", "checksums")
+generator.process_class("SQLiteChecksumIndex", "checksums")
 generator.write_to_path(p / "api-reference.rst")
 
 for category, endpoints in endpoints_by_category(ossapi.Ossapi).items():
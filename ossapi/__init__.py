@@ -81,6 +81,30 @@ from ossapi.enums import (
     Variant,
     Weight,
 )
+from ossapi.attributes import (
+    AttributesCache,
+    MemoryAttributesCache,
+    SQLiteAttributesCache,
+)
+from ossapi.batching import AsyncBatcher, Batcher
+from ossapi.bulk import BulkLookupError
+from ossapi.cache import (
+    FOREVER,
+    CacheStats,
+    CachedResponse,
+    ResponseCache,
+    SQLiteResponseCache,
+    last_response_fresh,
+)
+from ossapi.checksums import (
+    ChecksumIndex,
+    MemoryChecksumIndex,
+    SQLiteChecksumIndex,
+)
+from ossapi.coalescing import AsyncSingleFlight, SingleFlight
+from ossapi.concurrency import AdaptiveConcurrencyLimiter
+from ossapi.connections import ConnectionStats
+from ossapi.hedging import HedgePolicy
 from ossapi.mod import Mod
 from ossapi.models import (
     Beatmap,
@@ -142,7 +166,30 @@ from ossapi.ossapi import (
 )
 from ossapi.ossapiv2 import Domain, Grant, Ossapi, Scope
 from ossapi.ossapiv2_async import OssapiAsync
+from ossapi.ratelimit import (
+    CoordinatedRateLimiter,
+    FileRateLimiter,
+    RateLimitCoordinator,
+    RateLimiter,
+    RateLimitState,
+    RateLimitStats,
+    TokenBucket,
+)
 from ossapi.replay import Replay
+from ossapi.replay_store import FileReplayStore, ReplayStore
+from ossapi.retry import RetryPolicy
+from ossapi.scheduler import (
+    AsyncPriorityScheduler,
+    Priority,
+    PriorityScheduler,
+    request_priority,
+)
+from ossapi.token_store import (
+    FileTokenStore,
+    MemoryTokenStore,
+    SQLiteTokenStore,
+    TokenStore,
+)
 
 __version__ = "5.3.3"
 
@@ -158,6 +205,46 @@ __all__ = [
     "Grant",
     "Scope",
     "Domain",
+    # token stores
+    "TokenStore",
+    "MemoryTokenStore",
+    "FileTokenStore",
+    "SQLiteTokenStore",
+    "ConnectionStats",
+    # rate limiting
+    "RateLimiter",
+    "TokenBucket",
+    "FileRateLimiter",
+    "CoordinatedRateLimiter",
+    "RateLimitCoordinator",
+    "RetryPolicy",
+    "HedgePolicy",
+    "AdaptiveConcurrencyLimiter",
+    "Priority",
+    "PriorityScheduler",
+    "AsyncPriorityScheduler",
+    "request_priority",
+    "SingleFlight",
+    "AsyncSingleFlight",
+    "Batcher",
+    "AsyncBatcher",
+    "BulkLookupError",
+    "AttributesCache",
+    "MemoryAttributesCache",
+    "SQLiteAttributesCache",
+    "ResponseCache",
+    "SQLiteResponseCache",
+    "CachedResponse",
+    "CacheStats",
+    "FOREVER",
+    "last_response_fresh",
+    "ReplayStore",
+    "FileReplayStore",
+    "ChecksumIndex",
+    "MemoryChecksumIndex",
+    "SQLiteChecksumIndex",
+    "RateLimitStats",
+    "RateLimitState",
     # OssapiV2 models
     "Beatmap",
     "BeatmapCompact",
@@ -0,0 +1,182 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from ossapi.bulk import bulk_keys
+from ossapi.enums import GameMode
+from ossapi.mod import Mod
+
+RULESET_IDS = {
+    GameMode.OSU: 0,
+    GameMode.TAIKO: 1,
+    GameMode.CATCH: 2,
+    GameMode.MANIA: 3,
+}
+
+
+def ruleset_id(ruleset):
+    """
+    The id of ``ruleset``, which may be a :class:`~ossapi.enums.GameMode`, a
+    ruleset name (like ``"osu"``), or already a ruleset id.
+    """
+    if isinstance(ruleset, int):
+        return ruleset
+    return RULESET_IDS[GameMode(ruleset)]
+
+
+def attributes_key(checksum, mods, ruleset_id):
+    """
+    The cache key of the difficulty attributes of the beatmap version with
+    checksum ``checksum``, played with ``mods`` in the ruleset with id
+    ``ruleset_id``. Mods which don't affect difficulty don't affect the key.
+    """
+    mods = Mod(mods if mods is not None else Mod.NM)
+    return f"{checksum}:{mods.difficulty_mods(ruleset_id).value}:{ruleset_id}"
+
+
+class AttributesCache:
+    """
+    Where :meth:`~ossapi.ossapiv2.Ossapi.beatmap_attributes_bulk` stores
+    difficulty attributes it has already fetched.
+
+    Difficulty attributes never change for a given beatmap version, so entries
+    never expire. Entries are keyed by beatmap checksum, so an updated beatmap
+    gets new entries.
+
+    To implement your own cache, subclass this class and implement
+    :meth:`get_many` and :meth:`set_many`. Values are json strings.
+    """
+
+    def get_many(self, keys):
+        """
+        Returns a dict of key to value for each of ``keys`` in the cache. Keys
+        not in the cache are not present in the dict.
+        """
+        raise NotImplementedError()
+
+    def set_many(self, items):
+        """
+        Stores each value in the dict ``items`` under its key.
+        """
+        raise NotImplementedError()
+
+
+class MemoryAttributesCache(AttributesCache):
+    """
+    Stores difficulty attributes in memory, for the lifetime of the client.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        with self._lock:
+            return {key: self._values[key] for key in keys if key in self._values}
+
+    def set_many(self, items):
+        with self._lock:
+            self._values.update(items)
+
+
+class SQLiteAttributesCache(AttributesCache):
+    """
+    Stores difficulty attributes in a SQLite database at ``path``, so they
+    persist between runs. Safe to share between processes on the same host.
+
+    Parameters
+    ----------
+    path: str or Path
+        The path to the database file. Created if it doesn't exist.
+    timeout: float
+        How long in seconds to wait on another process writing to the database
+        before raising.
+    """
+
+    # sqlite limits how many parameters a single query can have
+    BATCH_SIZE = 500
+
+    def __init__(self, path, *, timeout=30):
+        self.path = Path(path)
+        self.timeout = timeout
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS attributes "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, keys):
+        keys = list(keys)
+        values = {}
+        with self._connection() as conn:
+            for i in range(0, len(keys), self.BATCH_SIZE):
+                batch = keys[i : i + self.BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, value FROM attributes WHERE key IN ({placeholders})",
+                    batch,
+                )
+                values.update(rows)
+        return values
+
+    def set_many(self, items):
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO attributes (key, value) VALUES (?, ?)",
+                items.items(),
+            )
+
+
+def attributes_requests(lookups, beatmaps):
+    """
+    Works out which difficulty attributes requests to make for ``lookups``, a
+    list of ``(beatmap, mods, ruleset)`` tuples. ``beatmaps`` maps the ids of
+    any beatmaps passed by id (as ints or strings) to their beatmap (or
+    ``None`` if the beatmap doesn't exist).
+
+    Returns a list of the cache key of each lookup (``None`` for lookups of
+    beatmaps which don't exist), a dict of cache key to the ``(beatmap_id,
+    mods, ruleset_id)`` to request for it, and the set of keys which can't be
+    cached because their beatmap has no checksum.
+    """
+    keys = []
+    requests = {}
+    uncacheable = set()
+    for beatmap, mods, ruleset in lookups:
+        if isinstance(beatmap, (int, str)):
+            [beatmap_id] = bulk_keys([beatmap], ids=True)
+            beatmap = beatmaps.get(beatmap_id)
+        if beatmap is None:
+            keys.append(None)
+            continue
+
+        if ruleset is None:
+            ruleset_id_ = RULESET_IDS[GameMode(beatmap.mode)]
+        else:
+            ruleset_id_ = ruleset_id(ruleset)
+        mods = Mod(mods if mods is not None else Mod.NM)
+        mods = mods.difficulty_mods(ruleset_id_)
+
+        checksum = beatmap.checksum
+        if checksum is None:
+            # we can still dedupe this lookup, but can't cache it across
+            # beatmap versions.
+            checksum = f"id{beatmap.id}"
+        key = attributes_key(checksum, mods, ruleset_id_)
+        if beatmap.checksum is None:
+            uncacheable.add(key)
+        keys.append(key)
+        requests[key] = (beatmap.id, mods, ruleset_id_)
+    return keys, requests, uncacheable
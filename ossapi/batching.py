@@ -0,0 +1,142 @@
+import asyncio
+import threading
+
+
+class _Batch:
+    def __init__(self):
+        # key : None. A dict instead of a set so keys stay in the order they
+        # were requested.
+        self.keys = {}
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+def _result(batch, key):
+    if batch.error is not None:
+        raise batch.error
+    if key not in batch.results:
+        raise ValueError(f"no result was returned for {key!r}")
+    return batch.results[key]
+
+
+class Batcher:
+    """
+    Collects single lookups made within a short window of each other, and makes
+    them as a single batch lookup.
+
+    The first lookup opens a batch, and waits ``window`` seconds for other
+    lookups to join it (or until the batch holds ``max_batch_size`` keys)
+    before making the batch lookup. Every lookup in the batch then receives its
+    result from the batch lookup. Identical keys in the same batch are only
+    looked up once, and share their result.
+
+    :class:`~ossapi.ossapiv2.Ossapi` uses this to batch lookups made from
+    different threads. See the ``batch_window`` parameter.
+
+    Parameters
+    ----------
+    load_many: Callable[[list], dict]
+        Makes a batch lookup. Takes a list of keys, and returns a dict of key
+        to result. Keys missing from the dict raise a ``ValueError`` for the
+        lookups of that key.
+    window: float
+        How many seconds to wait for other lookups to join a batch.
+    max_batch_size: int
+        The most keys to look up in a single batch.
+    """
+
+    def __init__(self, load_many, *, window=0.01, max_batch_size=50):
+        self.load_many = load_many
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        # the batch currently accepting lookups, if any
+        self._batch = None
+
+    def load(self, key):
+        """
+        Looks up ``key`` as part of a batch, and returns its result.
+        """
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+            batch.keys[key] = None
+            if len(batch.keys) >= self.max_batch_size:
+                # close the batch, and tell its leader to stop waiting
+                self._batch = None
+                batch.full.set()
+
+        if not leader:
+            batch.done.wait()
+            return _result(batch, key)
+
+        batch.full.wait(self.window)
+        with self._lock:
+            if self._batch is batch:
+                self._batch = None
+
+        try:
+            batch.results = self.load_many(list(batch.keys))
+        except BaseException as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+        return _result(batch, key)
+
+
+class AsyncBatcher:
+    """
+    Async equivalent of :class:`Batcher`, for use with
+    :class:`~ossapi.ossapiv2_async.OssapiAsync`. Takes the same parameters,
+    except ``load_many`` is an async function.
+
+    The batch lookup runs as its own task, so cancelling one lookup doesn't
+    affect the others in its batch.
+    """
+
+    def __init__(self, load_many, *, window=0.01, max_batch_size=50):
+        self.load_many = load_many
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._batch = None
+        self._timer = None
+
+    async def load(self, key):
+        """
+        Looks up ``key`` as part of a batch, and returns its result.
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._batch
+        if batch is None:
+            batch = self._batch = _Batch()
+            batch.future = loop.create_future()
+            self._timer = loop.call_later(self.window, self._dispatch, batch)
+        batch.keys[key] = None
+        if len(batch.keys) >= self.max_batch_size:
+            self._timer.cancel()
+            self._dispatch(batch)
+
+        results = await asyncio.shield(batch.future)
+        if key not in results:
+            raise ValueError(f"no result was returned for {key!r}")
+        return results[key]
+
+    def _dispatch(self, batch):
+        if self._batch is batch:
+            self._batch = None
+        future = batch.future
+        task = asyncio.ensure_future(self.load_many(list(batch.keys)))
+
+        def done(task):
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        task.add_done_callback(done)
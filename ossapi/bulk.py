@@ -0,0 +1,89 @@
+#: The most ids the api accepts in a single batch request.
+BULK_CHUNK_SIZE = 50
+
+
+class BulkLookupError(Exception):
+    """
+    Raised by bulk endpoints (like :meth:`~ossapi.ossapiv2.Ossapi.users_bulk`)
+    when some of their chunks failed, after every other chunk has finished.
+
+    Attributes
+    ----------
+    results: dict
+        The results of the chunks which succeeded, in the same format the bulk
+        endpoint returns. Keys from failed chunks are not present.
+    errors: list[tuple[list, Exception]]
+        The keys of each failed chunk, and the exception it failed with.
+    """
+
+    def __init__(self, results, errors):
+        self.results = results
+        self.errors = errors
+        failed = sum(len(keys) for keys, _error in errors)
+        super().__init__(
+            f"{len(errors)} chunks ({failed} keys) failed. The first failed with "
+            f"{errors[0][1]!r}"
+        )
+
+
+def bulk_keys(items, *, ids=False):
+    """
+    Converts ``items`` (ids, usernames, or models with an ``id``) to a list of
+    lookup keys, with duplicates removed and input order preserved.
+
+    If ``ids`` is true, every key must be an id. Ids passed as strings are
+    converted to ints, and any other string raises.
+    """
+    keys = {}
+    for item in items:
+        if not isinstance(item, (int, str)):
+            item = item.id
+        if ids and isinstance(item, str):
+            if not item.isdigit():
+                raise ValueError(f"expected an id, got {item!r}")
+            item = int(item)
+        keys[item] = None
+    return list(keys)
+
+
+def chunked(keys, size=BULK_CHUNK_SIZE):
+    return [keys[i : i + size] for i in range(0, len(keys), size)]
+
+
+def _match(key, by_id, by_username):
+    if isinstance(key, str):
+        model = by_username.get(key.lower())
+        if model is None and key.isdigit():
+            model = by_id.get(int(key))
+        return model
+    return by_id.get(key)
+
+
+def bulk_results(chunks, results, *, usernames=False):
+    """
+    Combines the results of each chunk into a dict of key to model, in input
+    order. Keys the api didn't return a model for map to ``None``.
+
+    ``results`` holds either the list of models returned for the chunk at the
+    same index in ``chunks``, or the exception that chunk failed with. Raises
+    :class:`BulkLookupError` if any chunk failed.
+
+    If ``usernames`` is true, string keys are matched against usernames
+    (case-insensitively) as well as ids.
+    """
+    mapping = {}
+    errors = []
+    for keys, models in zip(chunks, results):
+        if isinstance(models, BaseException):
+            errors.append((keys, models))
+            continue
+        by_id = {model.id: model for model in models}
+        by_username = {}
+        if usernames:
+            by_username = {model.username.lower(): model for model in models}
+        for key in keys:
+            mapping[key] = _match(key, by_id, by_username)
+
+    if errors:
+        raise BulkLookupError(mapping, errors)
+    return mapping
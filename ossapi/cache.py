@@ -0,0 +1,627 @@
+import asyncio
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+#: A ttl for responses which never change.
+FOREVER = math.inf
+
+_last_response_fresh = ContextVar("last_response_fresh", default=True)
+
+
+def last_response_fresh():
+    """
+    Whether the response to the last request made in this thread (or task) was
+    fresh. This is only false if the response was a stale response served from
+    a :class:`ResponseCache` while it is refreshed in the background (see
+    ``max_stale`` of :class:`ResponseCache`).
+    """
+    return _last_response_fresh.get()
+
+
+def _lookup_ttl(ttls, default, method, endpoint, *, categories=True):
+    if endpoint is None:
+        return 0
+    if endpoint.name in ttls:
+        return ttls[endpoint.name]
+    if method != "GET":
+        return 0
+    if categories and endpoint.category in ttls:
+        return ttls[endpoint.category]
+    return default
+
+
+@dataclass
+class CacheStats:
+    """
+    Statistics about a :class:`ResponseCache`.
+    """
+
+    #: How many lookups found a response in the cache to serve.
+    hits: int
+    #: How many lookups didn't.
+    misses: int
+    #: How many of :attr:`hits` served a stale response while it was
+    #: refreshed in the background.
+    stale_hits: int
+    #: How many stale responses were revalidated with the api, and turned out
+    #: to still be current.
+    revalidations: int
+    #: How many responses were evicted to stay under the cache's bounds.
+    evictions: int
+    #: How many responses are currently cached.
+    entries: int
+    #: The total size in bytes of the currently cached responses.
+    size: int
+
+    @property
+    def hit_rate(self):
+        """
+        The fraction of lookups which found a response in the cache to serve.
+        """
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0
+        return self.hits / lookups
+
+
+@dataclass
+class CachedResponse:
+    """
+    A response stored in a :class:`ResponseCache`.
+    """
+
+    #: The raw response body.
+    content: bytes
+    #: When (as a unix timestamp) the response stops being fresh.
+    expires_at: float
+    #: The response's ``ETag`` header, if any.
+    etag: Optional[str] = None
+    #: The response's ``Last-Modified`` header, if any.
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self):
+        return time.time() < self.expires_at
+
+    @property
+    def staleness(self):
+        """
+        How many seconds ago this response stopped being fresh. ``0`` if it's
+        still fresh.
+        """
+        return max(0, time.time() - self.expires_at)
+
+    @property
+    def revalidatable(self):
+        """
+        Whether we can ask the api if this response is still current once it
+        goes stale, instead of downloading it again.
+        """
+        return self.etag is not None or self.last_modified is not None
+
+    def conditional_headers(self):
+        """
+        The headers which ask the api to respond with 304 Not Modified if this
+        response is still current.
+        """
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    An in-memory cache of api responses, for
+    :class:`~ossapi.ossapiv2.Ossapi` and
+    :class:`~ossapi.ossapiv2_async.OssapiAsync`.
+
+    Responses are cached as raw json and deserialized afresh on every hit, so
+    callers never share model instances.
+
+    How long a response stays fresh (its ttl) depends on the endpoint it was
+    made for. ``ttls`` is looked up by endpoint name (like ``"user"``), then by
+    endpoint category (like ``"users"``), falling back to ``default_ttl``.
+    Responses with a ttl of zero aren't cached. Requests other than GET
+    requests are only cached if their endpoint name is in ``ttls``, since most
+    of them change something.
+
+    Responses which came with an ``ETag`` or ``Last-Modified`` header are kept
+    once they go stale. The next request for them asks the api whether they're
+    still current, and if so the api responds with an empty 304 Not Modified
+    response instead of the full response.
+
+    Lookups of things which don't exist, like unsubmitted beatmaps or
+    restricted users, fail the same way every time. ``not_found_ttl`` caches
+    these "not found" responses to GET requests, for any endpoint, so repeat
+    lookups raise without making a request.
+
+    Some endpoints are better answered instantly with a slightly stale response
+    than slowly with a fresh one, like the endpoints a website shows to its
+    users. ``max_stale`` (looked up like ``ttls``) lets a response be served
+    for up to this many seconds after it goes stale, while a fresh response is
+    fetched in the background for the next request. Use
+    :attr:`DISPLAY_MAX_STALE` for the endpoints a website typically shows, and
+    :func:`~ossapi.cache.last_response_fresh` to tell whether a response was
+    stale.
+
+    The least recently used responses are evicted once the cache holds more
+    than ``max_entries`` responses, or more than ``max_bytes`` bytes of
+    responses.
+
+    Parameters
+    ----------
+    ttls: dict[str, float]
+        Ttls in seconds by endpoint name or category. Use
+        :data:`~ossapi.cache.FOREVER` for responses which never change.
+        Defaults to :attr:`DEFAULT_TTLS`.
+    default_ttl: float
+        The ttl of responses to endpoints not in ``ttls``.
+    max_stale: dict[str, float]
+        How many seconds after a response goes stale it may still be served,
+        by endpoint name or category. Endpoints not in ``max_stale`` never
+        serve stale responses.
+    not_found_ttl: float
+        How long in seconds to cache "not found" responses for. ``0`` to not
+        cache them.
+    max_entries: int
+        The most responses to cache.
+    max_bytes: int
+        The most bytes of responses to cache.
+    """
+
+    #: Scores, difficulty attributes, and changelog builds never change once
+    #: they exist. Users, beatmaps, and rankings change slowly enough to cache
+    #: for a few minutes. Score and activity feeds change constantly, and so
+    #: does everything not listed here, as far as we know.
+    #:
+    #: Unlike ``ttls`` passed to the cache, these are matched against endpoint
+    #: names only. ``"users"`` and ``"beatmaps"`` are also category names, and
+    #: would otherwise cache feeds like :meth:`~ossapi.ossapiv2.Ossapi.user_scores`.
+    DEFAULT_TTLS = {
+        "score": FOREVER,
+        "score_mode": FOREVER,
+        "beatmap_attributes": FOREVER,
+        "changelog_build": FOREVER,
+        "user": 5 * 60,
+        "users": 5 * 60,
+        "beatmap": 5 * 60,
+        "beatmaps": 5 * 60,
+        "beatmapset": 5 * 60,
+        "ranking": 5 * 60,
+        "scores": 0,
+    }
+
+    #: The endpoints a website typically shows to its users, which may serve
+    #: responses up to 5 minutes stale.
+    DISPLAY_MAX_STALE = {
+        "user": 5 * 60,
+        "beatmapset": 5 * 60,
+        "ranking": 5 * 60,
+        "news_listing": 5 * 60,
+        "wiki_page": 5 * 60,
+    }
+
+    def __init__(
+        self,
+        ttls=None,
+        *,
+        default_ttl=0,
+        max_stale=None,
+        not_found_ttl=0,
+        max_entries=10_000,
+        max_bytes=64 * 1024 * 1024,
+    ):
+        self.ttls = self.DEFAULT_TTLS if ttls is None else dict(ttls)
+        self.default_ttl = default_ttl
+        self.max_stale = {} if max_stale is None else dict(max_stale)
+        self.not_found_ttl = not_found_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key : CachedResponse. Ordered from least to most recently used.
+        self._entries = OrderedDict()
+        self._size = 0
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._revalidations = 0
+        self._evictions = 0
+        # keys whose responses are being refreshed in the background
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+
+    def ttl(self, method, endpoint):
+        """
+        How long in seconds a response to a ``method`` request made by
+        ``endpoint`` (an :class:`~ossapi.utils.EndpointCall`, or ``None``)
+        stays fresh. ``0`` if it shouldn't be cached.
+        """
+        # the default ttls are endpoint names only
+        return _lookup_ttl(
+            self.ttls,
+            self.default_ttl,
+            method,
+            endpoint,
+            categories=self.ttls is not self.DEFAULT_TTLS,
+        )
+
+    def max_staleness(self, method, endpoint):
+        """
+        How many seconds after a response to a ``method`` request made by
+        ``endpoint`` goes stale it may still be served. ``0`` if it may not.
+        """
+        return _lookup_ttl(self.max_stale, 0, method, endpoint)
+
+    def lookup(self, key, *, max_stale=0):
+        """
+        Returns the :class:`CachedResponse` cached under ``key``, or ``None``.
+
+        The returned response may be stale, if it can be revalidated or is
+        less than ``max_stale`` seconds stale. Check
+        :attr:`CachedResponse.fresh`.
+        """
+        entry = self._load(key)
+        if entry is not None and entry.fresh:
+            self._count("_hits")
+            return entry
+
+        if entry is not None and entry.staleness <= max_stale:
+            self._count("_hits")
+            self._count("_stale_hits")
+            return entry
+
+        self._count("_misses")
+        if entry is not None and not entry.revalidatable:
+            self._delete(key)
+            return None
+        return entry
+
+    def start_refresh(self, key):
+        """
+        Marks the response cached under ``key`` as being refreshed in the
+        background. Returns false if it already is, in which case the caller
+        shouldn't refresh it again.
+        """
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def finish_refresh(self, key):
+        with self._refreshing_lock:
+            self._refreshing.discard(key)
+
+    def get(self, key):
+        """
+        Returns the body of the fresh response cached under ``key``, or
+        ``None``.
+        """
+        entry = self.lookup(key)
+        if entry is None or not entry.fresh:
+            return None
+        return entry.content
+
+    def set(self, key, content, ttl, *, etag=None, last_modified=None):
+        """
+        Caches the response body ``content`` (bytes) under ``key`` for ``ttl``
+        seconds, along with its ``etag`` and ``last_modified`` headers, if
+        any.
+        """
+        if len(content) > self.max_bytes:
+            return
+        entry = CachedResponse(content, time.time() + ttl, etag, last_modified)
+        self._save(key, entry)
+
+    def revalidated(self, key, entry, ttl):
+        """
+        Records that the api confirmed the stale response ``entry`` cached
+        under ``key`` is still current, making it fresh for another ``ttl``
+        seconds.
+        """
+        entry.expires_at = time.time() + ttl
+        self._save(key, entry)
+        self._count("_revalidations")
+
+    async def lookup_async(self, key, *, max_stale=0):
+        """
+        Async equivalent of :meth:`lookup`. Caches which block while reading
+        (for instance, from disk) should override this and :meth:`set_async`
+        and :meth:`revalidated_async` to not block the event loop.
+        """
+        return self.lookup(key, max_stale=max_stale)
+
+    async def set_async(self, key, content, ttl, *, etag=None, last_modified=None):
+        """
+        Async equivalent of :meth:`set`.
+        """
+        self.set(key, content, ttl, etag=etag, last_modified=last_modified)
+
+    async def revalidated_async(self, key, entry, ttl):
+        """
+        Async equivalent of :meth:`revalidated`.
+        """
+        self.revalidated(key, entry, ttl)
+
+    def _count(self, attribute, n=1):
+        with self._stats_lock:
+            setattr(self, attribute, getattr(self, attribute) + n)
+
+    def stats(self):
+        """
+        Returns a :class:`CacheStats` describing this cache.
+        """
+        entries, size = self._usage()
+        with self._stats_lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                stale_hits=self._stale_hits,
+                revalidations=self._revalidations,
+                evictions=self._evictions,
+                entries=entries,
+                size=size,
+            )
+
+    # storage. Subclasses may override these to store responses elsewhere.
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _save(self, key, entry):
+        evictions = 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += len(entry.content)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evictions += 1
+        self._count("_evictions", evictions)
+
+    def _delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.content)
+
+    def _usage(self):
+        with self._lock:
+            return len(self._entries), self._size
+
+    def clear(self):
+        """
+        Removes every cached response.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    A :class:`ResponseCache` which stores responses in a SQLite database at
+    ``path``, so they survive restarts. Safe to share between processes on the
+    same host.
+
+    Takes the same parameters as :class:`ResponseCache`, plus:
+
+    Parameters
+    ----------
+    path: str or Path
+        The path to the database file. Created if it doesn't exist.
+    timeout: float
+        How long in seconds to wait on another process writing to the database
+        before raising.
+    """
+
+    #: How many reads to record the access times of before writing them to
+    #: the database in one go.
+    ACCESS_BATCH_SIZE = 100
+
+    def __init__(
+        self,
+        path,
+        ttls=None,
+        *,
+        default_ttl=0,
+        max_stale=None,
+        not_found_ttl=0,
+        max_entries=100_000,
+        max_bytes=1024 * 1024 * 1024,
+        timeout=30,
+    ):
+        super().__init__(
+            ttls,
+            default_ttl=default_ttl,
+            max_stale=max_stale,
+            not_found_ttl=not_found_ttl,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+        )
+        self.path = Path(path)
+        self.timeout = timeout
+
+        # hashed key : when it was last read. Written to the database in
+        # batches, instead of on every read.
+        self._accessed = {}
+        # reads since we last wrote their access times
+        self._reads = 0
+        self._accessed_lock = threading.Lock()
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # don't race another process setting up the same database
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, "
+                "content BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, etag TEXT, last_modified TEXT, "
+                "accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+                "ON responses (accessed_at)"
+            )
+            # the number and total size of the cached responses, kept up to
+            # date by triggers so we don't have to scan the table to know
+            # whether to evict.
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage (entries INTEGER NOT NULL, "
+                "size INTEGER NOT NULL)"
+            )
+            if conn.execute("SELECT COUNT(*) FROM usage").fetchone()[0] == 0:
+                conn.execute(
+                    "INSERT INTO usage SELECT COUNT(*), COALESCE(SUM(size), 0) "
+                    "FROM responses"
+                )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON "
+                "responses BEGIN UPDATE usage SET entries = entries + 1, "
+                "size = size + NEW.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON "
+                "responses BEGIN UPDATE usage SET entries = entries - 1, "
+                "size = size - OLD.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_update AFTER UPDATE OF size "
+                "ON responses BEGIN UPDATE usage SET "
+                "size = size - OLD.size + NEW.size; END"
+            )
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    async def lookup_async(self, key, *, max_stale=0):
+        return await asyncio.to_thread(self.lookup, key, max_stale=max_stale)
+
+    async def set_async(self, key, content, ttl, *, etag=None, last_modified=None):
+        await asyncio.to_thread(
+            self.set, key, content, ttl, etag=etag, last_modified=last_modified
+        )
+
+    async def revalidated_async(self, key, entry, ttl):
+        await asyncio.to_thread(self.revalidated, key, entry, ttl)
+
+    @staticmethod
+    def _key(key):
+        # keys are tuples of strings and numbers, whose repr is stable across
+        # processes.
+        return hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def _load(self, key):
+        key = self._key(key)
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT content, expires_at, etag, last_modified FROM responses "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        with self._accessed_lock:
+            self._accessed[key] = time.time()
+            self._reads += 1
+            flush = self._reads >= self.ACCESS_BATCH_SIZE
+        if flush:
+            with self._connection() as conn:
+                self._flush_accessed(conn)
+        return CachedResponse(*row)
+
+    def _flush_accessed(self, conn):
+        with self._accessed_lock:
+            accessed = self._accessed
+            self._accessed = {}
+            self._reads = 0
+        conn.executemany(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in accessed.items()],
+        )
+
+    def _save(self, key, entry):
+        with self._connection() as conn:
+            # an upsert rather than INSERT OR REPLACE, whose implicit delete
+            # doesn't fire our triggers.
+            conn.execute(
+                "INSERT INTO responses (key, content, size, expires_at, etag, "
+                "last_modified, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET content = excluded.content, "
+                "size = excluded.size, expires_at = excluded.expires_at, "
+                "etag = excluded.etag, last_modified = excluded.last_modified, "
+                "accessed_at = excluded.accessed_at",
+                (
+                    self._key(key),
+                    entry.content,
+                    len(entry.content),
+                    entry.expires_at,
+                    entry.etag,
+                    entry.last_modified,
+                    time.time(),
+                ),
+            )
+            evictions = self._evict(conn)
+        self._count("_evictions", evictions)
+
+    def _evict(self, conn):
+        entries, size = conn.execute("SELECT entries, size FROM usage").fetchone()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return 0
+
+        # evict by up to date access times
+        self._flush_accessed(conn)
+        evict = []
+        rows = conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at, rowid"
+        )
+        for key, row_size in rows:
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            evict.append((key,))
+            entries -= 1
+            size -= row_size
+        conn.executemany("DELETE FROM responses WHERE key = ?", evict)
+        return len(evict)
+
+    def _delete(self, key):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (self._key(key),))
+
+    def _usage(self):
+        with self._connection() as conn:
+            return conn.execute("SELECT entries, size FROM usage").fetchone()
+
+    def clear(self):
+        with self._accessed_lock:
+            self._accessed.clear()
+            self._reads = 0
+        with self._connection() as conn:
+            conn.execute("DELETE FROM responses")
@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from ossapi.models import BeatmapCompact
+
+
+def beatmap_checksums(models):
+    """
+    Returns a dict of checksum to ``(beatmap_id, beatmapset_id)`` for each
+    beatmap in ``models`` with a checksum.
+    """
+    return {
+        model.checksum: (model.id, model.beatmapset_id)
+        for model in models
+        if isinstance(model, BeatmapCompact) and model.checksum is not None
+    }
+
+
+class ChecksumIndex:
+    """
+    Maps beatmap checksums (the md5 hash of the beatmap file, as stored in eg
+    :attr:`Replay.beatmap_hash <ossapi.replay.Replay.beatmap_hash>`) to the id
+    of their beatmap and beatmapset.
+
+    :class:`~ossapi.ossapiv2.Ossapi` adds every beatmap it receives from the
+    api to its checksum index, and consults the index before looking up a
+    beatmap by checksum.
+
+    To implement your own index, subclass this class and implement
+    :meth:`get_many`, :meth:`set_many`, and :meth:`remove_many`.
+    """
+
+    def get_many(self, checksums):
+        """
+        Returns a dict of checksum to ``(beatmap_id, beatmapset_id)`` for each
+        of ``checksums`` in the index. Checksums not in the index are not
+        present in the dict.
+        """
+        raise NotImplementedError()
+
+    def set_many(self, items):
+        """
+        Stores each ``(beatmap_id, beatmapset_id)`` in the dict ``items`` under
+        its checksum.
+        """
+        raise NotImplementedError()
+
+    def remove_many(self, checksums):
+        """
+        Removes each of ``checksums`` from the index, if present.
+        """
+        raise NotImplementedError()
+
+
+class MemoryChecksumIndex(ChecksumIndex):
+    """
+    Stores checksums in memory, for the lifetime of the client.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, checksums):
+        with self._lock:
+            return {
+                checksum: self._values[checksum]
+                for checksum in checksums
+                if checksum in self._values
+            }
+
+    def set_many(self, items):
+        with self._lock:
+            self._values.update(items)
+
+    def remove_many(self, checksums):
+        with self._lock:
+            for checksum in checksums:
+                self._values.pop(checksum, None)
+
+
+class SQLiteChecksumIndex(ChecksumIndex):
+    """
+    Stores checksums in a SQLite database at ``path``, so they persist between
+    runs. Safe to share between processes on the same host.
+
+    Parameters
+    ----------
+    path: str or Path
+        The path to the database file. Created if it doesn't exist.
+    timeout: float
+        How long in seconds to wait on another process writing to the database
+        before raising.
+    """
+
+    # sqlite limits how many parameters a single query can have
+    BATCH_SIZE = 500
+
+    def __init__(self, path, *, timeout=30):
+        self.path = Path(path)
+        self.timeout = timeout
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS beatmaps (checksum TEXT PRIMARY KEY, "
+                "beatmap_id INTEGER NOT NULL, beatmapset_id INTEGER)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS beatmaps_beatmap_id "
+                "ON beatmaps (beatmap_id)"
+            )
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, checksums):
+        checksums = list(checksums)
+        values = {}
+        with self._connection() as conn:
+            for i in range(0, len(checksums), self.BATCH_SIZE):
+                batch = checksums[i : i + self.BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                rows = conn.execute(
+                    "SELECT checksum, beatmap_id, beatmapset_id FROM beatmaps "
+                    f"WHERE checksum IN ({placeholders})",
+                    batch,
+                )
+                for checksum, beatmap_id, beatmapset_id in rows:
+                    values[checksum] = (beatmap_id, beatmapset_id)
+        return values
+
+    def set_many(self, items):
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO beatmaps (checksum, beatmap_id, "
+                "beatmapset_id) VALUES (?, ?, ?)",
+                [
+                    (checksum, beatmap_id, beatmapset_id)
+                    for checksum, (beatmap_id, beatmapset_id) in items.items()
+                ],
+            )
+
+    def remove_many(self, checksums):
+        with self._connection() as conn:
+            conn.executemany(
+                "DELETE FROM beatmaps WHERE checksum = ?",
+                [(checksum,) for checksum in checksums],
+            )
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+
+
+def _freeze(params):
+    # parameters with a value of None aren't sent
+    return tuple(
+        sorted(
+            (key, tuple(value) if isinstance(value, list) else value)
+            for key, value in (params or {}).items()
+            if value is not None
+        )
+    )
+
+
+def request_key(method, url, params, api_version, data=None, headers=None):
+    """
+    A hashable key identifying a request. Two requests with the same key
+    receive the same response.
+    """
+    return (method, url, _freeze(params), _freeze(data), _freeze(headers), api_version)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical calls made at the same time into a single call.
+
+    While a call for a key is in flight, other calls for the same key wait for
+    it to finish and share its result (or exception) instead of making their
+    own call.
+
+    :class:`~ossapi.ossapiv2.Ossapi` uses this to send a single request for
+    identical GET requests made concurrently from different threads. Each
+    caller still deserializes the shared response itself, so callers never
+    share model instances.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key : _Call
+        self._calls = {}
+        #: How many calls shared the result of another call instead of making
+        #: their own.
+        self.coalesced = 0
+
+    def do(self, key, function):
+        """
+        Calls ``function``, unless a call for ``key`` is already in flight, in
+        which case waits for that call and returns its result instead.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _AsyncCall:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    Async equivalent of :class:`SingleFlight`, for use with
+    :class:`~ossapi.ossapiv2_async.OssapiAsync`.
+
+    The shared call runs as its own task, so cancelling one caller doesn't
+    affect the others. The call is only cancelled once every caller waiting on
+    it has been cancelled.
+    """
+
+    def __init__(self):
+        # key : _AsyncCall
+        self._calls = {}
+        #: How many calls shared the result of another call instead of making
+        #: their own.
+        self.coalesced = 0
+
+    async def do(self, key, function):
+        """
+        Awaits ``function()``, unless a call for ``key`` is already in flight,
+        in which case waits for that call and returns its result instead.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _AsyncCall(asyncio.ensure_future(function()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done():
+                call.waiters -= 1
+                if call.waiters == 0:
+                    # no one is waiting on this call anymore
+                    self._forget(key, call)
+                    call.task.cancel()
+            raise
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
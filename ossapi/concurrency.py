@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import deque
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits how many requests :class:`~ossapi.ossapiv2_async.OssapiAsync` has in
+    flight at once, and adapts that limit to how the api is responding.
+
+    The limit grows additively while responses stay healthy, and shrinks
+    multiplicatively when the api rate limits us (429), errors (5xx), fails to
+    respond, or when latency spikes well above its usual value (AIMD). This
+    finds the most concurrency the api will tolerate without any hand tuning.
+
+    The current limit is available as :attr:`limit`.
+
+    Parameters
+    ----------
+    initial_limit: int
+        The limit to start at.
+    min_limit: int
+        Never shrink the limit below this.
+    max_limit: int
+        Never grow the limit above this.
+    backoff: float
+        What to multiply the limit by when shrinking it.
+    latency_tolerance: float
+        Treat a response as a latency spike if it took longer than this many
+        times the usual latency.
+    """
+
+    def __init__(
+        self,
+        initial_limit=10,
+        *,
+        min_limit=1,
+        max_limit=500,
+        backoff=0.5,
+        latency_tolerance=3,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(initial_limit)
+        self.in_flight = 0
+        self._waiters = deque()
+        # an exponentially weighted average of response latencies
+        self._baseline = None
+        self._last_backoff = 0
+
+    @property
+    def limit(self):
+        """
+        How many requests may currently be in flight at once.
+        """
+        return max(self.min_limit, int(self._limit))
+
+    async def acquire(self):
+        """
+        Waits until a request may be sent. Every call must be paired with a
+        call to :meth:`release`.
+        """
+        if self.in_flight >= self.limit or self._waiters:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif not waiter.cancelled():
+                    # we were handed a slot just as we were cancelled. Pass it
+                    # on to the next waiter.
+                    self.in_flight -= 1
+                    self._wake()
+                raise
+        else:
+            self.in_flight += 1
+
+    def release(self, sent_at, *, status=None, error=False):
+        """
+        Records the outcome of a request sent at ``sent_at`` (a
+        ``time.monotonic`` timestamp), and lets the next request through.
+
+        Pass the response's ``status``, or ``error=True`` if the request failed
+        without a response. If neither is passed, the request is assumed to
+        have never been sent, and doesn't affect the limit.
+        """
+        latency = time.monotonic() - sent_at
+        limited = self.in_flight >= self.limit
+        self.in_flight -= 1
+
+        if status is None and not error:
+            # never sent
+            pass
+        elif error or status == 429 or status >= 500:
+            self._shrink(sent_at)
+        elif self._baseline is not None and (
+            latency > self._baseline * self.latency_tolerance
+        ):
+            # still move the baseline towards spikes, so that if latency rises
+            # and stays there, it becomes the new usual latency instead of
+            # holding the limit down forever.
+            self._update_baseline(latency)
+            self._shrink(sent_at)
+        else:
+            self._update_baseline(latency)
+            # only grow if the limit is what's holding us back. Otherwise an
+            # idle limiter would grow without bound.
+            if limited:
+                # grows the limit by roughly one per limit's worth of responses
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+        self._wake()
+
+    def _update_baseline(self, latency):
+        if self._baseline is None:
+            self._baseline = latency
+        else:
+            self._baseline = 0.95 * self._baseline + 0.05 * latency
+
+    def _shrink(self, sent_at):
+        # requests sent before our last backoff were sent under the old, higher
+        # limit. Don't back off again for each of them.
+        if sent_at <= self._last_backoff:
+            return
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+        self._last_backoff = time.monotonic()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
@@ -0,0 +1,165 @@
+import ssl
+import threading
+from dataclasses import dataclass
+
+from requests.adapters import HTTPAdapter
+
+
+@dataclass
+class ConnectionStats:
+    """
+    Statistics about the connections a client has made to the api.
+    """
+
+    #: How many TLS connections have been opened.
+    connections_opened: int
+    #: How many of the opened connections resumed a previous TLS session
+    #: instead of performing a full handshake.
+    tls_sessions_resumed: int
+    #: How many connections are currently open and idle, ready to be used by
+    #: the next request.
+    idle_connections: int
+
+
+class _SessionTrackingMixin:
+    def _remember_session(self):
+        if getattr(self, "_ossapi_session_saved", False):
+            return
+        # With TLS 1.3, the session ticket arrives after the handshake, along
+        # with the first application data. So we check for a resumable session
+        # both after the handshake and after reads.
+        session = self.session
+        if session is None or not session.has_ticket:
+            return
+        self.context._save_session(self.server_hostname, session)
+        self._ossapi_session_saved = True
+
+    def do_handshake(self, *args, **kwargs):
+        super().do_handshake(*args, **kwargs)
+        self.context._handshake_done(self)
+        self._remember_session()
+
+
+class _TrackingSSLObject(_SessionTrackingMixin, ssl.SSLObject):
+    def read(self, *args, **kwargs):
+        data = super().read(*args, **kwargs)
+        self._remember_session()
+        return data
+
+
+class _TrackingSSLSocket(_SessionTrackingMixin, ssl.SSLSocket):
+    def recv_into(self, *args, **kwargs):
+        n = super().recv_into(*args, **kwargs)
+        self._remember_session()
+        return n
+
+    def recv(self, *args, **kwargs):
+        data = super().recv(*args, **kwargs)
+        self._remember_session()
+        return data
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """
+    An ``SSLContext`` which remembers the TLS session of each host it connects
+    to, and resumes that session when it connects to the same host again. A
+    resumed session skips most of the TLS handshake, which makes reconnecting
+    noticeably cheaper.
+    """
+
+    def __new__(cls, protocol=ssl.PROTOCOL_TLS_CLIENT):
+        return super().__new__(cls, protocol)
+
+    def __init__(self, protocol=ssl.PROTOCOL_TLS_CLIENT):
+        super().__init__()
+        self.load_default_certs()
+        self.sslobject_class = _TrackingSSLObject
+        self.sslsocket_class = _TrackingSSLSocket
+        self._lock = threading.Lock()
+        # server_hostname : SSLSession
+        self._sessions = {}
+        self.connections_opened = 0
+        self.sessions_resumed = 0
+
+    def _save_session(self, server_hostname, session):
+        with self._lock:
+            self._sessions[server_hostname] = session
+
+    def _handshake_done(self, conn):
+        with self._lock:
+            self.connections_opened += 1
+            self.sessions_resumed += conn.session_reused
+
+    def _session_for(self, server_hostname):
+        with self._lock:
+            return self._sessions.get(server_hostname)
+
+    def wrap_socket(self, sock, *args, server_hostname=None, session=None, **kwargs):
+        if session is None and server_hostname is not None:
+            session = self._session_for(server_hostname)
+        return super().wrap_socket(
+            sock, *args, server_hostname=server_hostname, session=session, **kwargs
+        )
+
+    def wrap_bio(self, *args, server_hostname=None, session=None, **kwargs):
+        if session is None and server_hostname is not None:
+            session = self._session_for(server_hostname)
+        return super().wrap_bio(
+            *args, server_hostname=server_hostname, session=session, **kwargs
+        )
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    A requests adapter which opens its connections with ``ssl_context``.
+
+    We share a single adapter (and so a single connection pool) between all of
+    the sessions a client creates over its lifetime, so reauthenticating doesn't
+    throw away warm connections.
+    """
+
+    def __init__(self, ssl_context, **kwargs):
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = self.ssl_context
+        super().init_poolmanager(*args, **kwargs)
+
+    def idle_connections(self):
+        idle = 0
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            # the pool's queue is padded with `None` up to its maxsize.
+            for conn in list(pool.pool.queue):
+                if conn is not None and conn.is_connected:
+                    idle += 1
+        return idle
+
+
+class KeepAliveThread(threading.Thread):
+    """
+    Calls ``open_connections`` every ``interval`` seconds until stopped.
+    """
+
+    def __init__(self, open_connections, interval):
+        super().__init__(daemon=True, name="ossapi-keepalive")
+        self.open_connections = open_connections
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.open_connections()
+            except Exception:
+                # a failed keepalive just means the next request opens a fresh
+                # connection, which is no worse than not keeping connections
+                # alive at all.
+                pass
+
+    def stop(self):
+        self._stopped.set()
@@ -722,7 +722,7 @@ class KudosuVote(Model):
     score: int
 
     def user(self):
-        return self._fk_user(self.user_id)
+        return self._follow("user", "user_id")
 
 
 class EventUser(Model):
@@ -765,7 +765,7 @@ class GithubUser(Model):
     user_url: Optional[str]
 
     def user(self):
-        return self._fk_user(self.user_id)
+        return self._follow("user", "user_id")
 
 
 class ChangelogSearch(Model):
@@ -0,0 +1,90 @@
+import math
+import threading
+from collections import deque
+
+
+class HedgePolicy:
+    """
+    Decides when to hedge a request: that is, when to send a second, identical
+    request if the first is taking unusually long, and use whichever response
+    arrives first.
+
+    We hedge a request once it has taken longer than ``percentile`` percent of
+    recent requests to the same endpoint did. Hedging trades a small number of
+    extra requests for a large reduction in tail latency when the slowness is
+    caused by an occasional slow response rather than by load.
+
+    Hedges are only sent if the rate limiter has budget to spare right away,
+    so hedging never makes us wait on (or exceed) the rate limit.
+
+    Parameters
+    ----------
+    endpoints: set[str]
+        The names of the endpoints to hedge. Only read-only endpoints should
+        be hedged.
+    percentile: float
+        Hedge requests which take longer than this percentile of recent
+        latencies for the same endpoint.
+    min_delay: float
+        Never hedge a request earlier than this many seconds after sending it.
+    min_samples: int
+        Don't hedge requests to an endpoint until we've seen this many
+        responses from it, so we have a reasonable idea of its latency.
+    window: int
+        How many recent latencies to remember per endpoint.
+    max_workers: int
+        For :class:`~ossapi.ossapiv2.Ossapi`, how many threads to make hedged
+        requests with. Requests beyond this many at once wait for a thread.
+    """
+
+    def __init__(
+        self,
+        endpoints=frozenset({"user", "beatmap", "score", "beatmap_scores"}),
+        *,
+        percentile=95,
+        min_delay=0.05,
+        min_samples=20,
+        window=200,
+        max_workers=16,
+    ):
+        self.endpoints = frozenset(endpoints)
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        # endpoint name : deque[float]
+        self._latencies = {}
+
+    def should_hedge(self, method, endpoint):
+        """
+        Whether requests made by ``endpoint`` (an
+        :class:`~ossapi.utils.EndpointCall`, or ``None``) should be hedged.
+        """
+        return (
+            method == "GET" and endpoint is not None and endpoint.name in self.endpoints
+        )
+
+    def record(self, endpoint, latency):
+        """
+        Records that a request to ``endpoint`` took ``latency`` seconds.
+        """
+        with self._lock:
+            if endpoint.name not in self._latencies:
+                self._latencies[endpoint.name] = deque(maxlen=self.window)
+            self._latencies[endpoint.name].append(latency)
+
+    def delay(self, endpoint):
+        """
+        How long in seconds to wait on a request to ``endpoint`` before hedging
+        it, or ``None`` if we don't know enough about the endpoint's latency
+        to hedge yet.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint.name, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        index = math.ceil(len(latencies) * self.percentile / 100) - 1
+        index = min(max(index, 0), len(latencies) - 1)
+        return max(self.min_delay, latencies[index])
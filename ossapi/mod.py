@@ -222,6 +222,47 @@ class ModCombination(BaseModel):
             mods.remove(Mod.SD)
         return mods
 
+    def difficulty_mods(self, ruleset_id=None):
+        """
+        The component mods of this mod which affect difficulty attributes (like
+        star rating), in the ruleset with id ``ruleset_id``. Two mods with the
+        same difficulty mods have the same difficulty attributes on any
+        beatmap.
+
+        Parameters
+        ----------
+        ruleset_id: int
+            The id of the ruleset (0 for osu!, 1 for taiko, 2 for catch, 3 for
+            mania). If ``None``, keeps the difficulty mods of every ruleset.
+
+        Returns
+        -------
+        :class:`~.Mod`
+            The difficulty mods.
+
+        Examples
+        --------
+        >>> Mod("HDDT").difficulty_mods().short_name()
+        "DT"
+        >>> Mod("NCHR").difficulty_mods().short_name()
+        "DTHR"
+
+        Notes
+        -----
+        ``NC`` is counted as ``DT``, since the two only differ in sound. ``TD``
+        only affects osu!, and the key mods only affect (converts to) mania.
+        """
+        value = self.value
+        if value & Mod._NC.value:
+            value |= Mod.DT.value
+
+        relevant = Mod.EZ + Mod.HR + Mod.DT + Mod.HT + Mod.FL
+        if ruleset_id in (None, 0):
+            relevant += Mod.TD
+        if ruleset_id in (None, 3):
+            relevant += Mod.KM
+        return Mod(value & relevant.value)
+
 
 class Mod(ModCombination):
     """
@@ -267,10 +267,10 @@ class BeatmapCompact(Model):
         return self._fk_beatmap(self.id)
 
     def user(self) -> User:
-        return self._fk_user(self.user_id)
+        return self._follow("user", "user_id")
 
     def beatmapset(self) -> Beatmapset | BeatmapsetCompact:
-        return self._fk_beatmapset(self.beatmapset_id, existing=self._beatmapset)
+        return self._follow("beatmapset", "beatmapset_id", existing="_beatmapset")
 
 
 class Beatmap(BeatmapCompact):
@@ -317,7 +317,7 @@ class Beatmap(BeatmapCompact):
         return self
 
     def beatmapset(self) -> Beatmapset:
-        return self._fk_beatmapset(self.beatmapset_id, existing=self._beatmapset)
+        return self._follow("beatmapset", "beatmapset_id", existing="_beatmapset")
 
 
 class BeatmapsetCompact(Model):
@@ -374,7 +374,7 @@ class BeatmapsetCompact(Model):
         return self._fk_beatmapset(self.id)
 
     def user(self) -> UserCompact | User:
-        return self._fk_user(self.user_id, existing=self._user)
+        return self._follow("user", "user_id", existing="_user")
 
 
 class Beatmapset(BeatmapsetCompact):
@@ -504,7 +504,7 @@ class Score(Model):
         return data
 
     def user(self) -> UserCompact | User:
-        return self._fk_user(self.user_id, existing=self._user)
+        return self._follow("user", "user_id", existing="_user")
 
     def download(self):
         if hasattr(self, "mode"):
@@ -566,10 +566,10 @@ class Comment(Model):
     votes_count: int
 
     def user(self) -> User:
-        return self._fk_user(self.user_id)
+        return self._follow("user", "user_id")
 
     def edited_by(self) -> User | None:
-        return self._fk_user(self.edited_by_id)
+        return self._follow("user", "edited_by_id")
 
 
 class CommentBundle(Model):
@@ -618,10 +618,10 @@ class ForumPost(Model):
     body: ForumPostBody
 
     def user(self) -> User:
-        return self._fk_user(self.user_id)
+        return self._follow("user", "user_id")
 
     def edited_by(self) -> User | None:
-        return self._fk_user(self.edited_by_id)
+        return self._follow("user", "edited_by_id")
 
 
 class ForumTopic(Model):
@@ -641,7 +641,7 @@ class ForumTopic(Model):
     poll: ForumPollModel | None
 
     def user(self) -> User:
-        return self._fk_user(self.user_id)
+        return self._follow("user", "user_id")
 
 
 class ForumPollModel(Model):
@@ -777,13 +777,13 @@ class BeatmapsetDiscussionPost(Model):
     deleted_at: Datetime | None
 
     def user(self) -> User:
-        return self._fk_user(self.user_id)
+        return self._follow("user", "user_id")
 
     def last_editor(self) -> User | None:
-        return self._fk_user(self.last_editor_id)
+        return self._follow("user", "last_editor_id")
 
     def deleted_by(self) -> User | None:
-        return self._fk_user(self.deleted_by_id)
+        return self._follow("user", "deleted_by_id")
 
 
 class BeatmapsetDiscussion(Model):
@@ -815,16 +815,16 @@ class BeatmapsetDiscussion(Model):
     _beatmapset: Field(name="beatmapset", type=BeatmapsetCompact | None)
 
     def user(self) -> User:
-        return self._fk_user(self.user_id)
+        return self._follow("user", "user_id")
 
     def deleted_by(self) -> User | None:
-        return self._fk_user(self.deleted_by_id)
+        return self._follow("user", "deleted_by_id")
 
     def beatmapset(self) -> Beatmapset | BeatmapsetCompact:
-        return self._fk_beatmapset(self.beatmapset_id, existing=self._beatmapset)
+        return self._follow("beatmapset", "beatmapset_id", existing="_beatmapset")
 
     def beatmap(self) -> Beatmap | None | BeatmapCompact:
-        return self._fk_beatmap(self.beatmap_id, existing=self._beatmap)
+        return self._follow("beatmap", "beatmap_id", existing="_beatmap")
 
 
 class BeatmapsetDiscussionVote(Model):
@@ -839,7 +839,7 @@ class BeatmapsetDiscussionVote(Model):
     cursor_string: CursorStringT
 
     def user(self):
-        return self._fk_user(self.user_id)
+        return self._follow("user", "user_id")
 
 
 class KudosuHistory(Model):
@@ -863,7 +863,7 @@ class BeatmapPlaycount(Model):
     count: int
 
     def beatmap(self) -> Beatmap | BeatmapCompact:
-        return self._fk_beatmap(self.beatmap_id, existing=self._beatmap)
+        return self._follow("beatmap", "beatmap_id", existing="_beatmap")
 
 
 # we use this class to determine which event dataclass to instantiate and
@@ -1058,7 +1058,7 @@ class MultiplayerScore(Model):
     legacy_total_score: int
 
     def beatmap(self):
-        return self._fk_beatmap(self.beatmap_id)
+        return self._follow("beatmap", "beatmap_id")
 
 
 class MultiplayerScoresAround(Model):
@@ -1367,7 +1367,7 @@ class BeatmapsetEvent(Model):
         return {"comment": Optional[mapping[type_]]}
 
     def user(self) -> User | None:
-        return self._fk_user(self.user_id)
+        return self._follow("user", "user_id")
 
 
 class ChatChannel(Model):
@@ -1441,7 +1441,7 @@ class UserRelation(Model):
     target: UserCompact | None
 
     def target(self) -> User | UserCompact:
-        return self._fk_user(self.target_id, existing=self.target)
+        return self._follow("user", "target_id", existing="target")
 
 
 class StatisticsVariant(Model):
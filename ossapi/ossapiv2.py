@@ -1,16 +1,19 @@
+import contextvars
 import functools
 import hashlib
 import inspect
 import json
 import logging
-import pickle
 import socket
 import sys
+import threading
+import time
 import webbrowser
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Optional, TypeVar, Union, _GenericAlias
+from typing import Iterable, Optional, TypeVar, Union, _GenericAlias
 from urllib.parse import unquote
 
 import osrparse
@@ -22,10 +25,31 @@ from oauthlib.oauth2 import (
 )
 from oauthlib.oauth2.rfc6749.errors import InsufficientScopeError
 from oauthlib.oauth2.rfc6749.tokens import OAuth2Token
+from requests.adapters import DEFAULT_POOLSIZE
 from requests_oauthlib import OAuth2Session
 from typing_utils import get_args, get_origin, get_type_hints, issubtype
 
 import ossapi
+from ossapi.attributes import (
+    AttributesCache,
+    MemoryAttributesCache,
+    attributes_requests,
+)
+from ossapi.batching import Batcher
+from ossapi.bulk import BulkLookupError, bulk_keys, bulk_results, chunked
+from ossapi.cache import ResponseCache, _last_response_fresh
+from ossapi.checksums import (
+    ChecksumIndex,
+    MemoryChecksumIndex,
+    beatmap_checksums,
+)
+from ossapi.coalescing import SingleFlight, request_key
+from ossapi.connections import (
+    ConnectionStats,
+    KeepAliveThread,
+    PooledAdapter,
+    ResumingSSLContext,
+)
 from ossapi.enums import (
     BeatmapDiscussionPostSort,
     BeatmapPackType,
@@ -56,6 +80,7 @@ from ossapi.enums import (
     UserBeatmapType,
     UserLookupKey,
 )
+from ossapi.hedging import HedgePolicy
 from ossapi.mod import Mod
 from ossapi.models import (
     Beatmap,
@@ -117,16 +142,37 @@ from ossapi.models import (
     WikiPage,
     _Event,
 )
+from ossapi.pagination import (
+    check_offset_paginated,
+    cursor_parameter,
+    merge_pages,
+    next_page_kwargs,
+    offset_page_items,
+    page_items,
+)
+from ossapi.ratelimit import RateLimiter, RateLimitState, TokenBucket
 from ossapi.replay import Replay
+from ossapi.replay_store import ReplayStore, replay_hashes
+from ossapi.retry import RetryPolicies, RetryPolicy, parse_retry_after
+from ossapi.scheduler import Priority, PriorityScheduler, request_priority
+from ossapi.token_store import FileTokenStore, TokenStore, token_expired
 from ossapi.utils import (
+    EndpointCall,
     Field,
+    Model,
+    ModelGroup,
+    Prefetch,
     _Model,
     convert_primitive_type,
+    current_endpoint,
+    current_model_group,
+    current_prefetch,
     is_base_model_type,
     is_high_model_type,
     is_model_type,
     is_optional,
     is_primitive_type,
+    unfollowed_foreign_keys,
 )
 
 # our `request` function below relies on the ordering of these types. The
@@ -295,7 +341,11 @@ def request(scope, *, requires_user=False, category):
                 if id_:
                     kwargs[arg_name] = id_
 
-            return function(*args, **kwargs)
+            token = current_endpoint.set(EndpointCall(function.__name__, category))
+            try:
+                return function(*args, **kwargs)
+            finally:
+                current_endpoint.reset(token)
 
         # for docs generation
         wrapper.__ossapi_category__ = category
@@ -424,6 +474,16 @@ class Ossapi:
         taking responsibility for making sure it is unique / unused, and also
         for remembering the key you passed if you wish to eg remove the token in
         the future, which requires the key.
+    token_store: TokenStore
+        Where to save and retrieve tokens. Defaults to a
+        :class:`~ossapi.token_store.FileTokenStore` in ``token_directory``.
+        |br|
+        Clients sharing a token store share a single token, and pick up tokens
+        granted or refreshed by the others instead of granting their own. Pass
+        a shared :class:`~ossapi.token_store.SQLiteTokenStore` or
+        :class:`~ossapi.token_store.FileTokenStore` to share a token between
+        processes, or a :class:`~ossapi.token_store.MemoryTokenStore` to keep
+        tokens off disk entirely.
     access_token: str
         Access token from the osu! api. Allows instantiating
         :class:`~ossapi.ossapiv2.Ossapi` after manually authenticating with the
@@ -442,6 +502,92 @@ class Ossapi:
         :data:`Domain.DEV <ossapi.ossapiv2.Domain.DEV>`.
         |br|
         See :doc:`Domains <domains>` for more about domains.
+    lazy_auth: bool
+        If ``True``, don't authenticate on instantiation. Instead, authenticate
+        the first time an endpoint is called (or when :meth:`warmup` is
+        called). This makes instantiation free of any network requests, which
+        is useful for short-lived programs which may never call the api.
+    min_connections: int
+        How many connections to the api to keep open and ready at all times.
+        If greater than 0, :meth:`warmup` (or the first endpoint call) opens
+        this many connections, and a background thread keeps them alive by
+        touching them every ``keepalive_interval`` seconds. Useful for
+        latency-sensitive programs which make bursts of concurrent requests.
+        |br|
+        Regardless of this setting, connections are pooled across token
+        refreshes, and TLS sessions are resumed when reconnecting.
+    keepalive_interval: float
+        How often, in seconds, to touch the connections kept open by
+        ``min_connections``. Has no effect if ``min_connections`` is 0.
+    rate_limiter: RateLimiter
+        Limits how often we make requests to the api. Defaults to a
+        :class:`~ossapi.ratelimit.TokenBucket` matching the osu! api's
+        documented limit of 1200 requests per minute, with a burst of 200.
+        |br|
+        The rate limiter is shared by every thread using this client. Pass
+        the same rate limiter to several clients to share a single budget
+        between them.
+    retry_policy: RetryPolicy or dict[str, RetryPolicy]
+        When and how to retry requests which fail with a retryable status code,
+        like 429 (too many requests). Only ``GET`` requests are retried.
+        Defaults to a :class:`~ossapi.retry.RetryPolicy` with its default
+        parameters.
+        |br|
+        Pass a dict to use a different policy for each endpoint category,
+        keyed by category name (like ``"scores"``). Categories not in the dict
+        use the default policy.
+    hedge_policy: HedgePolicy
+        If passed, hedge requests to read-only endpoints (by default
+        :meth:`user`, :meth:`beatmap`, :meth:`score`, and
+        :meth:`beatmap_scores`): if a request takes unusually long, send a
+        second identical request and use whichever response arrives first.
+        See :class:`~ossapi.hedging.HedgePolicy`.
+    scheduler: PriorityScheduler
+        Decides which waiting request to make next when several are waiting on
+        the rate limit, based on their :class:`~ossapi.scheduler.Priority`.
+        See :meth:`priority`. Defaults to a
+        :class:`~ossapi.scheduler.PriorityScheduler` with its default
+        parameters.
+    coalesce_requests: bool
+        Whether to coalesce identical GET requests made at the same time into
+        a single request, whose response is shared between the callers. Each
+        caller still receives its own model instances. See
+        :class:`~ossapi.coalescing.SingleFlight`.
+    batch_window: float
+        If passed, batch lookups of single beatmaps by id made within this
+        many seconds of each other into a single :meth:`beatmaps` request.
+        This also batches :meth:`load_user`. Off by default, since every
+        batched lookup waits up to ``batch_window`` seconds for others to join
+        it. See :class:`~ossapi.batching.Batcher`.
+    attributes_cache: AttributesCache
+        Where :meth:`beatmap_attributes_bulk` caches difficulty attributes.
+        Pass a :class:`~ossapi.attributes.SQLiteAttributesCache` to keep them
+        between runs. Defaults to a
+        :class:`~ossapi.attributes.MemoryAttributesCache`.
+    response_cache: ResponseCache
+        If passed, cache responses in this cache, for as long as its ttl for
+        the endpoint they were made for. See :class:`~ossapi.cache.ResponseCache`.
+        Pass a :class:`~ossapi.cache.SQLiteResponseCache` to keep responses
+        between runs.
+    replay_store: ReplayStore
+        If passed, :meth:`download_score` and :meth:`download_score_mode` store
+        replays they download in this store, and read replays from it instead
+        of downloading them again. See :class:`~ossapi.replay_store.ReplayStore`.
+    checksum_index: ChecksumIndex
+        Where every beatmap received from the api is indexed by checksum, and
+        where :meth:`beatmap` and :meth:`resolve_checksums` look up checksums
+        before asking the api. Pass a
+        :class:`~ossapi.checksums.SQLiteChecksumIndex` to keep the index
+        between runs. Defaults to a
+        :class:`~ossapi.checksums.MemoryChecksumIndex`.
+    compact_foreign_users: bool
+        If true, following a foreign key to a user (like ``score.user()``)
+        returns a :class:`~ossapi.models.UserCompact` looked up with
+        :meth:`users`, along with the user of every model of the same type
+        from the same response. This makes one request per 50 distinct users
+        instead of one per model, but the full :class:`~ossapi.models.User`
+        isn't available. Also the default for ``compact_users`` in
+        :meth:`prefetch`.
     """
 
     TOKEN_URL = "https://{domain}.ppy.sh/oauth/token"
@@ -459,10 +605,25 @@ class Ossapi:
         strict: bool = False,
         token_directory: Optional[str] = None,
         token_key: Optional[str] = None,
+        token_store: Optional[TokenStore] = None,
         access_token: Optional[str] = None,
         refresh_token: Optional[str] = None,
         domain: Union[str, Domain] = Domain.OSU,
         api_version: int | str = 20241024,
+        lazy_auth: bool = False,
+        min_connections: int = 0,
+        keepalive_interval: float = 30,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[Union[RetryPolicy, dict[str, RetryPolicy]]] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        coalesce_requests: bool = True,
+        batch_window: Optional[float] = None,
+        attributes_cache: Optional[AttributesCache] = None,
+        response_cache: Optional[ResponseCache] = None,
+        replay_store: Optional[ReplayStore] = None,
+        checksum_index: Optional[ChecksumIndex] = None,
+        compact_foreign_users: bool = False,
     ):
         if not grant:
             grant = (
@@ -502,6 +663,7 @@ class Ossapi:
             Path(token_directory) if token_directory else Path(__file__).parent
         )
         self.token_file = self.token_directory / f"{self.token_key}.pickle"
+        self.token_store = token_store or FileTokenStore(self.token_directory)
 
         if self.grant is Grant.CLIENT_CREDENTIALS:
             if self.scopes != [Scope.PUBLIC]:
@@ -531,7 +693,48 @@ class Ossapi:
             token = OAuth2Token(params)
             self.access_token_passed = True
 
-        self.session = self.authenticate(token=token)
+        self.min_connections = min_connections
+        self.keepalive_interval = keepalive_interval
+        self._ssl_context = ResumingSSLContext()
+        # every session we create shares this adapter, and so its connection
+        # pool.
+        self._adapter = PooledAdapter(
+            self._ssl_context, pool_maxsize=max(DEFAULT_POOLSIZE, min_connections)
+        )
+        self._keepalive = None
+        self._keepalive_lock = threading.Lock()
+
+        self.rate_limiter = rate_limiter or TokenBucket()
+        # the rate limit state reported by the api's most recent response
+        self.ratelimit = RateLimitState()
+        self.retry_policies = RetryPolicies.from_arg(retry_policy)
+        self.hedge_policy = hedge_policy
+        self.scheduler = scheduler or PriorityScheduler()
+        self.single_flight = SingleFlight() if coalesce_requests else None
+        self.attributes_cache = attributes_cache or MemoryAttributesCache()
+        self.response_cache = response_cache
+        self.replay_store = replay_store
+        self.checksum_index = checksum_index or MemoryChecksumIndex()
+        self.compact_foreign_users = compact_foreign_users
+        self._beatmap_batcher = None
+        self._user_batcher = None
+        if batch_window is not None:
+            self._beatmap_batcher = Batcher(
+                self._load_beatmaps, window=batch_window, max_batch_size=50
+            )
+            self._user_batcher = Batcher(
+                self._load_users, window=batch_window, max_batch_size=50
+            )
+        self._hedge_executor = None
+        self._hedge_executor_lock = threading.Lock()
+        # how many requests are running (not queued) in our hedge pool
+        self._hedge_pool_busy = 0
+
+        self.session = None
+        self._initial_token = token
+        self._auth_lock = threading.Lock()
+        if not lazy_auth:
+            self.session = self.authenticate(token=token)
 
     @staticmethod
     def gen_token_key(grant, client_id, client_secret, scopes, domain=Domain.OSU):
@@ -565,15 +768,21 @@ class Ossapi:
         return m.hexdigest()
 
     @staticmethod
-    def remove_token(key, token_directory=None):
+    def remove_token(key, token_directory=None, *, token_store=None):
         """
         Removes the token file associated with the given key. If
         ``token_directory`` is passed, looks there for the token file instead of
-        locally in ossapi's install site.
+        locally in ossapi's install site. If ``token_store`` is passed, removes
+        the token from that :class:`~ossapi.token_store.TokenStore` instead.
 
         To determine the key associated with a given grant, client_id,
-        client_secret, and set of scopes, use ``gen_token_key``.
+        client_secret, and set of scopes, use ``gen_token_key``. A client's
+        key is also available as its ``token_key``.
         """
+        if token_store is not None:
+            token_store.remove(key)
+            return
+
         token_directory = (
             Path(token_directory) if token_directory else Path(__file__).parent
         )
@@ -582,56 +791,111 @@ class Ossapi:
 
     def authenticate(self, token=None):
         """
-        Returns a valid OAuth2Session, either from a saved token file associated
+        Returns a valid OAuth2Session, either from a saved token associated
         with this OssapiV2's parameters, or from a fresh authentication if no
-        such file exists.
+        such token exists.
         """
 
-        # try saved token file first
-        if self.token_file.exists() or token is not None:
-            if token is None:
-                with open(self.token_file, "rb") as f:
-                    token = pickle.load(f)
-
-            if self.grant is Grant.CLIENT_CREDENTIALS:
-                return Oauth2SessionOssapi(
-                    self.client_id, token=token, api_version=self.api_version
-                )
-
-            if self.grant is Grant.AUTHORIZATION_CODE:
-                auto_refresh_kwargs = {
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                }
-                return Oauth2SessionOssapi(
-                    self.client_id,
-                    token=token,
-                    redirect_uri=self.redirect_uri,
-                    auto_refresh_url=self.token_url,
-                    auto_refresh_kwargs=auto_refresh_kwargs,
-                    token_updater=self._save_token,
-                    scope=[scope.value for scope in self.scopes],
-                    api_version=self.api_version,
-                )
+        # try saved token first
+        if token is None:
+            token = self.token_store.load(self.token_key)
+        if token is not None:
+            return self._session_from_token(token)
 
         # otherwise, authorize from scratch
         return self._new_grant()
 
+    def _mount(self, session):
+        session.mount("https://", self._adapter)
+        return session
+
+    def _session_from_token(self, token):
+        if self.grant is Grant.CLIENT_CREDENTIALS:
+            session = Oauth2SessionOssapi(
+                self.client_id, token=token, api_version=self.api_version
+            )
+            return self._mount(session)
+
+        auto_refresh_kwargs = {
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+        }
+        session = Oauth2SessionOssapi(
+            self.client_id,
+            token=token,
+            redirect_uri=self.redirect_uri,
+            auto_refresh_url=self.token_url,
+            auto_refresh_kwargs=auto_refresh_kwargs,
+            token_updater=self._save_token,
+            scope=[scope.value for scope in self.scopes],
+            api_version=self.api_version,
+        )
+        return self._mount(session)
+
+    def _load_newer_token(self):
+        """
+        Returns the token in our token store if it is valid and differs from the
+        token we're currently using, which happens when another client sharing
+        our token store has granted or refreshed the token. Returns ``None``
+        otherwise.
+        """
+        token = self.token_store.load(self.token_key)
+        if token is None or token_expired(token):
+            return None
+        if self.session is not None and self.session.token:
+            if token.get("access_token") == self.session.token.get("access_token"):
+                return None
+        return token
+
+    def _sync_token(self):
+        """
+        Switches to a newer token from our token store if our current token has
+        expired. This lets clients sharing a token store pick up each other's
+        refreshes instead of each refreshing (or re-granting) on their own.
+        """
+        if self.access_token_passed or not token_expired(self.session.token):
+            return
+        token = self._load_newer_token()
+        if token is not None:
+            self.log.info("picked up a newer token from the token store")
+            self.session = self._session_from_token(token)
+
     def _new_grant(self):
         if self.grant is Grant.CLIENT_CREDENTIALS:
             return self._new_client_grant(self.client_id, self.client_secret)
 
-        return self._new_authorization_grant(
-            self.client_id, self.client_secret, self.redirect_uri, self.scopes
-        )
+        # hold the token store lock while granting so that only one of the
+        # clients sharing our token store opens a browser for the user.
+        with self.token_store.lock(self.token_key):
+            token = self._load_newer_token()
+            if token is not None:
+                self.log.info("using token granted by another client")
+                return self._session_from_token(token)
+
+            return self._new_authorization_grant(
+                self.client_id, self.client_secret, self.redirect_uri, self.scopes
+            )
 
     def _new_client_grant(self, client_id, client_secret):
         """
         Authenticates with the api from scratch on the client grant.
         """
+        # hold the token store lock while granting so that when many clients
+        # share our token store and their token expires, only one of them
+        # requests a new token and the rest pick it up from the store.
+        with self.token_store.lock(self.token_key):
+            token = self._load_newer_token()
+            if token is not None:
+                self.log.info("using token granted by another client")
+                return self._session_from_token(token)
+
+            return self._fetch_client_grant(client_id, client_secret)
+
+    def _fetch_client_grant(self, client_id, client_secret):
         self.log.info("initializing client credentials grant")
         client = BackendApplicationClient(client_id=client_id, scope=["public"])
         session = Oauth2SessionOssapi(client=client, api_version=self.api_version)
+        self._mount(session)
         token = session.fetch_token(
             token_url=self.token_url, client_id=client_id, client_secret=client_secret
         )
@@ -654,6 +918,7 @@ class Ossapi:
             token_updater=self._save_token,
             scope=[scope.value for scope in scopes],
         )
+        self._mount(session)
 
         authorization_url, _state = session.authorization_url(self.auth_code_url)
         webbrowser.open(authorization_url)
@@ -690,51 +955,454 @@ class Ossapi:
 
     def _save_token(self, token):
         """
-        Saves the token to this OssapiV2's associated token file.
+        Saves the token to this OssapiV2's token store.
         """
-        self.log.info(f"saving token to {self.token_file}")
-        with open(self.token_file, "wb+") as f:
-            pickle.dump(token, f)
+        self.log.info(f"saving token with key {self.token_key}")
+        self.token_store.save(self.token_key, token)
 
-    def _request(self, type_, method, url, params={}, data={}):
-        # I don't *think* type hints should change over the lifetime of a
-        # program, but clear them every request out of an abundance of caution.
-        # This costs us almost nothing and may avoid bugs when eg a consumer
-        # changes type hints of a custom model dynamically at some point.
-        # They should certainly not be doing so in the middle of a request,
-        # however.
-        self._clear_type_hints_cache()
-        params = self._format_params(params)
-        # also format data for post requests
-        data = self._format_params(data)
+    def _ensure_authenticated(self):
+        """
+        Authenticates if we haven't yet, which is only the case if we were
+        instantiated with ``lazy_auth=True``.
+        """
+        if self.session is not None:
+            return
+        with self._auth_lock:
+            # another thread may have authenticated while we waited on the lock
+            if self.session is not None:
+                return
+            self.session = self.authenticate(token=self._initial_token)
 
-        def make_request():
-            return self.session.request(
-                method, f"{self.base_url}{url}", params=params, data=data
+    def warmup(self):
+        """
+        Authenticates and opens a connection to the api ahead of time, so that
+        the first endpoint call doesn't pay for either.
+
+        If ``min_connections`` was passed, opens that many connections instead
+        of one, and starts keeping them alive.
+        """
+        self._ensure_authenticated()
+        self._open_connections(max(1, self.min_connections))
+        self._start_keepalive()
+
+    def _open_connection(self):
+        # opening a connection costs a request like any other, so it waits its
+        # turn and counts against our rate limit.
+        self.scheduler.acquire(self.rate_limiter)
+        try:
+            # we only care about the (pooled) connection to the api host that
+            # this request opens, not its response.
+            self.session.request("HEAD", self.base_url, withhold_token=True)
+        finally:
+            self.scheduler.release()
+
+    def _open_connections(self, n):
+        """
+        Makes sure at least ``n`` connections to the api are open and idle in
+        our pool, and resets the idle timer of each.
+        """
+        if n == 1:
+            self._open_connection()
+            return
+        # a request only opens a new connection if every pooled connection is
+        # in use, so make the requests concurrently.
+        with ThreadPoolExecutor(max_workers=n) as executor:
+            # run in a copy of our context, so the requests see eg our request
+            # priority.
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._open_connection)
+                for _ in range(n)
+            ]
+        for future in futures:
+            future.result()
+
+    def _start_keepalive(self):
+        if self.min_connections <= 0 or self._keepalive is not None:
+            return
+        with self._keepalive_lock:
+            if self._keepalive is not None:
+                return
+            self._keepalive = KeepAliveThread(
+                self._keep_connections_alive, self.keepalive_interval
             )
+            self._keepalive.start()
 
-        def reauthenticate_and_retry():
-            # don't automatically re-authenticate if the user passed an access
-            # token. They should handle re-authentication with the user
-            # manually (since they may have a bespoke system, like a website).
-            if self.access_token_passed:
-                self.log.info(
-                    "refresh token is invalid. raising for consumer "
-                    "to handle since access token was passed originally."
-                )
-                raise ReauthenticationRequired()
+    def _keep_connections_alive(self):
+        # keeping connections alive shouldn't hold up actual requests
+        with request_priority(Priority.BACKGROUND):
+            self._open_connections(self.min_connections)
+
+    def connection_stats(self):
+        """
+        Returns a :class:`~ossapi.connections.ConnectionStats` describing the
+        connections this client has made to the api.
+        """
+        return ConnectionStats(
+            connections_opened=self._ssl_context.connections_opened,
+            tls_sessions_resumed=self._ssl_context.sessions_resumed,
+            idle_connections=self._adapter.idle_connections(),
+        )
 
+    def close(self):
+        """
+        Stops keeping connections alive (if ``min_connections`` was passed)
+        and closes every pooled connection.
+        """
+        if self._keepalive is not None:
+            self._keepalive.stop()
+            self._keepalive = None
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+        self._adapter.close()
+
+    def priority(self, priority):
+        """
+        A context manager which makes every request made inside it (in this
+        thread) with priority ``priority``.
+
+        .. code-block:: python
+
+            with api.priority(Priority.BACKGROUND):
+                api.ranking("osu", RankingType.PERFORMANCE)
+
+        The priority applies to requests made by any client in this context,
+        not just this one.
+        """
+        return request_priority(priority)
+
+    def prefetch(self, models, *relations, compact_users=None):
+        """
+        Follows the foreign keys ``relations`` of each of ``models`` up front,
+        in as few requests as possible, so following them later makes no
+        requests.
+
+        .. code-block:: python
+
+            posts = api.beatmapset_discussion_posts(2641058).posts
+            api.prefetch(posts, "user", "last_editor")
+
+            playcounts = api.user_beatmaps(12092800, type="most_played")
+            api.prefetch(playcounts, "beatmap.beatmapset")
+
+        Each relation is the name of a foreign key method (like ``"user"``),
+        and may follow further foreign keys of the model it returns, separated
+        by dots (like ``"beatmap.beatmapset"``). Returns ``models``.
+
+        Users are looked up in full with :meth:`user`, concurrently. Pass
+        ``compact_users=True`` to look them up with :meth:`users` instead,
+        which only costs one request per 50 users, but returns a
+        :class:`~ossapi.models.UserCompact`. Following those foreign keys
+        afterwards returns the :class:`~ossapi.models.UserCompact`. Defaults
+        to the client's ``compact_foreign_users``.
+
+        Raises if a foreign key references a model which doesn't exist, like
+        following it would.
+        """
+        models = list(models)
+        if compact_users is None:
+            compact_users = self.compact_foreign_users
+        token = current_prefetch.set(Prefetch(compact_users=compact_users))
+        try:
+            for relation in relations:
+                related = models
+                for name in relation.split("."):
+                    related = self._prefetch_relation(related, name)
+        finally:
+            current_prefetch.reset(token)
+        return models
+
+    def _prefetch_relation(self, models, name):
+        # group the models together, so following the foreign key of one of
+        # them follows it for all of them.
+        group = ModelGroup()
+        for model in models:
+            group.add(model)
+
+        related = {}
+        for model in models:
+            result = getattr(model, name)()
+            if result is not None:
+                related[id(result)] = result
+        return list(related.values())
+
+    def paginate(self, endpoint, *args, max_items=None, stop=None, **kwargs):
+        """
+        Returns a lazy iterator over the items of every page of the paginated
+        endpoint ``endpoint``, called with ``args`` and ``kwargs``.
+
+        .. code-block:: python
+
+            for beatmapset in api.paginate(
+                api.search_beatmapsets, query="black", max_items=200
+            ):
+                print(beatmapset.title)
+
+        The next page is requested while the items of the current page are
+        being consumed. Iteration stops after the last page, after
+        ``max_items`` items if passed, or at the first item for which
+        ``stop(item)`` is true if passed:
+
+        .. code-block:: python
+
+            cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+            for event in api.paginate(
+                api.events, stop=lambda event: event.created_at < cutoff
+            ):
+                print(event.type)
+
+        To start from a later page, pass its ``cursor`` (or ``cursor_string``).
+
+        Supports :meth:`search_beatmapsets`, :meth:`comments`, :meth:`ranking`,
+        :meth:`events`, :meth:`news_listing`, :meth:`beatmap_packs`,
+        :meth:`scores`, :meth:`forum_topic`, :meth:`multiplayer_scores`, and
+        :meth:`beatmapset_discussions`.
+        """
+        parameter = cursor_parameter(endpoint)
+        return self._paginate(endpoint, args, kwargs, parameter, max_items, stop)
+
+    def _paginate(self, endpoint, args, kwargs, parameter, max_items, stop):
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        def fetch(kwargs):
+            # run in a copy of our context, so the request sees eg our request
+            # priority.
+            context = contextvars.copy_context()
+            return executor.submit(context.run, endpoint, *args, **kwargs)
+
+        remaining = max_items
+        future = fetch(kwargs) if remaining is None or remaining > 0 else None
+        try:
+            while future is not None:
+                page = future.result()
+                future = None
+                items = page_items(page)
+                if remaining is not None:
+                    items = items[:remaining]
+                    remaining -= len(items)
+
+                kwargs = next_page_kwargs(kwargs, parameter, page)
+                if items and kwargs is not None and remaining != 0:
+                    future = fetch(kwargs)
+                for item in items:
+                    if stop is not None and stop(item):
+                        return
+                    yield item
+        finally:
+            # the caller stopped iterating before we ran out of pages
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def fetch_pages(
+        self, endpoint, *args, page_size=100, max_items=None, concurrency=4, **kwargs
+    ):
+        """
+        Returns every item of the endpoint ``endpoint``, which is paginated by
+        ``limit`` and ``offset``, called with ``args`` and ``kwargs``.
+
+        .. code-block:: python
+
+            playcounts = api.fetch_pages(
+                api.user_beatmaps, 12092800, UserBeatmapType.MOST_PLAYED
+            )
+
+        Since the offset of each page is known up front, up to ``concurrency``
+        pages of ``page_size`` items are requested at once. Stops after the
+        first page with fewer than ``page_size`` items, or after ``max_items``
+        items if passed. Items which appear on more than one page (because the
+        list changed while it was being fetched) are only returned once, and
+        items are returned in order.
+
+        Supports :meth:`user_scores`, :meth:`user_beatmaps`,
+        :meth:`user_recent_activity`, and :meth:`user_kudosu`.
+        """
+        check_offset_paginated(endpoint)
+        offset = kwargs.pop("offset", None) or 0
+        items = {}
+
+        def fetch(offset):
+            return endpoint(*args, limit=page_size, offset=offset, **kwargs)
+
+        more = True
+        while more and (max_items is None or len(items) < max_items):
+            count = concurrency
+            if max_items is not None:
+                # don't request pages we won't use
+                needed = -(-(max_items - len(items)) // page_size)
+                count = min(count, needed)
+            offsets = [offset + i * page_size for i in range(count)]
+            offset += count * page_size
+
+            pages = self._gather(fetch, offsets, concurrency=concurrency)
+            more = offset_page_items(pages, page_size, items)
+        return list(items.values())[:max_items]
+
+    def _reauthenticate(self):
+        # don't automatically re-authenticate if the user passed an access
+        # token. They should handle re-authentication with the user
+        # manually (since they may have a bespoke system, like a website).
+        if self.access_token_passed:
             self.log.info(
-                "refresh token invalid, re-authenticating (grant: " f"{self.grant})"
+                "refresh token is invalid. raising for consumer "
+                "to handle since access token was passed originally."
             )
-            # don't use .authenticate, that falls back to cached tokens. go
-            # straight to authenticating from scratch.
-            self.session = self._new_grant()
-            # redo the request now that we have a valid session
-            return make_request()
+            raise ReauthenticationRequired()
+
+        self.log.info(
+            "refresh token invalid, re-authenticating (grant: " f"{self.grant})"
+        )
+        # don't use .authenticate, that falls back to cached tokens. go
+        # straight to authenticating from scratch.
+        self.session = self._new_grant()
+
+    def _send(self, method, url, *, params=None, data=None, headers=None):
+        """
+        Makes a request to ``url``, retrying it according to our retry policy.
+        """
+        policy = self.retry_policies.policy(current_endpoint.get())
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            r = self._send_attempt(
+                method, url, params=params, data=data, headers=headers
+            )
+            if self.ratelimit.update(r.headers):
+                self.rate_limiter.observe(self.ratelimit)
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            elapsed = time.monotonic() - start
+            delay = policy.next_delay(
+                method, r.status_code, attempt, elapsed, retry_after
+            )
+            if delay is None:
+                return r
+            self.log.info(
+                f"{method} request to {url} returned {r.status_code}, retrying in "
+                f"{delay:.2f} seconds"
+            )
+            time.sleep(delay)
+            attempt += 1
+
+    def _hedge_pool(self):
+        with self._hedge_executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.hedge_policy.max_workers,
+                    thread_name_prefix="ossapi-hedge",
+                )
+            return self._hedge_executor
+
+    def _send_attempt(self, method, url, *, params=None, data=None, headers=None):
+        """
+        Makes a single request to ``url``, hedging it if our hedge policy says
+        to.
+        """
+        endpoint = current_endpoint.get()
+        policy = self.hedge_policy
+        if policy is None or not policy.should_hedge(method, endpoint):
+            return self._send_once(
+                method, url, params=params, data=data, headers=headers
+            )
+
+        def send():
+            start = time.monotonic()
+            r = self._send_once(
+                method, url, params=params, data=data, headers=headers, acquired=True
+            )
+            policy.record(endpoint, time.monotonic() - start)
+            return r
+
+        def send_pooled(started):
+            with self._hedge_executor_lock:
+                self._hedge_pool_busy += 1
+            started.set()
+            try:
+                return send()
+            finally:
+                with self._hedge_executor_lock:
+                    self._hedge_pool_busy -= 1
+
+        def submit():
+            started = threading.Event()
+            # run in a copy of our context so the request sees the endpoint
+            # it's being made for.
+            future = self._hedge_pool().submit(
+                contextvars.copy_context().run, send_pooled, started
+            )
+            return (future, started)
+
+        def pool_saturated():
+            with self._hedge_executor_lock:
+                return self._hedge_pool_busy >= policy.max_workers
+
+        def hedge():
+            delay = policy.delay(endpoint)
+            if delay is None:
+                return send()
+
+            primary, started = submit()
+            # the primary may wait for a thread in our pool. Time the delay from
+            # when it's actually sent, so that waiting doesn't make us hedge
+            # early.
+            started.wait()
+            done, _ = wait([primary], timeout=delay)
+            if done:
+                return primary.result()
+            # a hedge sent now would only wait for a thread too, so don't spend
+            # budget on it.
+            if pool_saturated() or not self.rate_limiter.try_acquire():
+                return primary.result()
+
+            self.log.debug(f"hedging {method} request to {url}")
+            # we can't cancel the losing request once it's been sent. It
+            # finishes in the background and its response is discarded.
+            hedged, _started = submit()
+            pending = {primary, hedged}
+            while True:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                succeeded = [f for f in done if f.exception() is None]
+                if succeeded:
+                    return succeeded[0].result()
+                if not pending:
+                    return next(iter(done)).result()
+
+        # wait on the scheduler and rate limiter up front so that waiting
+        # doesn't count towards the request's latency.
+        self.scheduler.acquire(self.rate_limiter)
+        try:
+            return hedge()
+        finally:
+            self.scheduler.release()
+
+    def _send_once(
+        self, method, url, *, params=None, data=None, headers=None, acquired=False
+    ):
+        """
+        Makes a single request to ``url``, handling expired and invalid tokens.
+        """
+        self._ensure_authenticated()
+        self._start_keepalive()
+        self._sync_token()
+
+        def make_request():
+            nonlocal acquired
+            if acquired:
+                # our caller already waited on the scheduler for us
+                acquired = False
+                return self.session.request(
+                    method, url, params=params, data=data, headers=headers
+                )
+
+            self.scheduler.acquire(self.rate_limiter)
+            try:
+                return self.session.request(
+                    method, url, params=params, data=data, headers=headers
+                )
+            finally:
+                self.scheduler.release()
 
         try:
-            r = make_request()
+            return make_request()
         except TokenExpiredError:
             # provide "auto refreshing" for client credentials grant. The client
             # grant doesn't actually provide a refresh token, so we can't hook
@@ -746,13 +1414,243 @@ class Ossapi:
                 raise
             self.session = self._new_client_grant(self.client_id, self.client_secret)
             # redo the request now that we have a valid token
-            r = make_request()
+            return make_request()
         except OAuth2Error as e:
             if e.description != "The refresh token is invalid.":
                 raise
 
-            r = reauthenticate_and_retry()
+            self._reauthenticate()
+            # redo the request now that we have a valid session
+            return make_request()
+
+    def _send_coalesced(self, method, url, *, params=None, data=None, headers=None):
+        """
+        Makes a request to ``url``, sharing the response with any identical GET
+        requests made at the same time.
+        """
+        if self.single_flight is None or method != "GET":
+            return self._send(method, url, params=params, data=data, headers=headers)
 
+        key = request_key(method, url, params, self.api_version, headers=headers)
+        return self.single_flight.do(
+            key,
+            lambda: self._send(
+                method, url, params=params, data=data, headers=headers
+            ),
+        )
+
+    def _gather(self, function, items, *, concurrency):
+        """
+        Calls ``function(item)`` for each of ``items``, up to ``concurrency`` at
+        once. Returns the result of each call (or the exception it raised), in
+        order.
+        """
+        if not items:
+            return []
+
+        def call(item):
+            try:
+                return function(item)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+            # run each call in a copy of our context, so its requests see eg our
+            # request priority.
+            futures = [
+                executor.submit(contextvars.copy_context().run, call, item)
+                for item in items
+            ]
+        return [future.result() for future in futures]
+
+    def _follow_foreign_key(self, model, kind, attribute, existing):
+        """
+        Follows a foreign key of ``model`` (see ``Model._follow``), along with
+        the same foreign key of every model of the same type in its group, if
+        that's cheap.
+        """
+        id_ = getattr(model, attribute)
+        followed, target = model._followed(kind, id_)
+        if followed:
+            return target
+
+        group = model._ossapi_group
+        unfollowed = []
+        if group is not None and self._batches_foreign_keys(kind):
+            models = group.siblings(model)
+            unfollowed = unfollowed_foreign_keys(models, kind, attribute, existing)
+        if len({id_ for _model, id_ in unfollowed}) > 1:
+            targets = self._follow_foreign_keys(unfollowed, kind)
+            followed, target = model._followed(kind, id_)
+            if followed:
+                return target
+            if isinstance(targets.get(id_), BaseException):
+                raise targets[id_]
+
+        # look it up on its own, which raises if it doesn't exist.
+        target = self._foreign_key_lookup(kind)(id_)
+        model._set_followed(kind, id_, target)
+        return target
+
+    def _batches_foreign_keys(self, kind):
+        # whether to follow foreign keys to ``kind`` for a model's whole group
+        # at once. Without a batch endpoint, that would usually cost far more
+        # requests than it saves, unless we're prefetching.
+        if current_prefetch.get() is not None:
+            return True
+        return kind == "beatmap" or (kind == "user" and self._compact_users())
+
+    def _compact_users(self):
+        prefetch = current_prefetch.get()
+        if prefetch is None:
+            return self.compact_foreign_users
+        return prefetch.compact_users
+
+    def _follow_foreign_keys(self, unfollowed, kind):
+        # follows each ``(model, id)`` foreign key in ``unfollowed``. Returns a
+        # dict of id to the model it references (or the exception looking it
+        # up raised).
+        ids = bulk_keys(id_ for _model, id_ in unfollowed)
+        targets = self._load_foreign_keys(kind, ids)
+        for model, id_ in unfollowed:
+            target = targets.get(id_)
+            # foreign keys we couldn't follow are left to be looked up on their
+            # own, so they raise like they always have.
+            if target is not None and not isinstance(target, BaseException):
+                model._set_followed(kind, id_, target)
+        return targets
+
+    def _load_foreign_keys(self, kind, ids):
+        if kind == "user" and self._compact_users():
+            return self.users_bulk(ids)
+        if kind == "beatmap":
+            return self.beatmaps_bulk(ids)
+
+        # no batch endpoint. Look them up concurrently instead.
+        function = self._foreign_key_lookup(kind)
+        return dict(zip(ids, self._gather(function, ids, concurrency=4)))
+
+    def _foreign_key_lookup(self, kind):
+        return {
+            "user": self.user,
+            "beatmap": self.beatmap,
+            "beatmapset": self.beatmapset,
+        }[kind]
+
+    def _bulk(self, function, keys, *, concurrency, usernames=False):
+        """
+        Looks up ``keys`` with the batch endpoint ``function``, in chunks of at
+        most ``BULK_CHUNK_SIZE`` keys, making up to ``concurrency`` requests at
+        once.
+        """
+        chunks = chunked(keys)
+        results = self._gather(function, chunks, concurrency=concurrency)
+        return bulk_results(chunks, results, usernames=usernames)
+
+    def _request(self, type_, method, url, params={}, data={}):
+        # I don't *think* type hints should change over the lifetime of a
+        # program, but clear them every request out of an abundance of caution.
+        # This costs us almost nothing and may avoid bugs when eg a consumer
+        # changes type hints of a custom model dynamically at some point.
+        # They should certainly not be doing so in the middle of a request,
+        # however.
+        self._clear_type_hints_cache()
+        json_ = self._request_json(method, url, params=params, data=data)
+        # models from the same response follow their foreign keys together.
+        group = ModelGroup()
+        token = current_model_group.set(group)
+        try:
+            value = self._instantiate_type(type_, json_)
+        finally:
+            current_model_group.reset(token)
+
+        checksums = beatmap_checksums(group.models)
+        if checksums:
+            self.checksum_index.set_many(checksums)
+        return value
+
+    def _request_json(self, method, url, params={}, data={}):
+        """
+        Makes a request to the api, and returns its (error checked) json
+        response.
+        """
+        params = self._format_params(params)
+        # also format data for post requests
+        data = self._format_params(data)
+
+        _last_response_fresh.set(True)
+        cache = self.response_cache
+        if cache is None:
+            return self._fetch_json(method, url, params, data)
+
+        endpoint = current_endpoint.get()
+        ttl = cache.ttl(method, endpoint)
+        max_stale = cache.max_staleness(method, endpoint)
+        not_found_ttl = cache.not_found_ttl if method == "GET" else 0
+        if ttl <= 0 and max_stale <= 0 and not_found_ttl <= 0:
+            return self._fetch_json(method, url, params, data)
+
+        # responses to an authorization code grant may depend on who the
+        # user is, so don't share them between grants.
+        key = (
+            request_key(method, url, params, self.api_version, data=data),
+            self.token_key,
+        )
+        entry = cache.lookup(key, max_stale=max_stale)
+        if entry is not None and entry.fresh:
+            return self._cached_json(entry, url)
+        if entry is not None and entry.staleness <= max_stale:
+            self._refresh_in_background(method, url, params, data, key, ttl, entry)
+            _last_response_fresh.set(False)
+            return self._cached_json(entry, url)
+
+        if ttl <= 0 and max_stale <= 0:
+            # we're only caching "not found" responses for this endpoint
+            ttl = None
+            entry = None
+        return self._fetch_json(
+            method, url, params, data, key, ttl, entry, not_found_ttl=not_found_ttl
+        )
+
+    def _cached_json(self, entry, url):
+        json_ = json.loads(entry.content)
+        # cached "not found" responses raise, just like the original response
+        self._check_response(json_, f"{self.base_url}{url}")
+        return json_
+
+    def _fetch_json(
+        self,
+        method,
+        url,
+        params,
+        data,
+        key=None,
+        ttl=None,
+        entry=None,
+        *,
+        not_found_ttl=0,
+    ):
+        """
+        Sends a request to the api, and returns its (error checked) json
+        response.
+
+        If ``key`` is passed, caches the response under it for ``ttl`` seconds
+        (unless ``ttl`` is ``None``), revalidating the stale cached response
+        ``entry`` if passed. A "not found" response is cached for
+        ``not_found_ttl`` seconds instead.
+        """
+        cache = self.response_cache
+        # ask the api whether a stale response we have is still current,
+        # which costs it (and us) much less than sending the full response.
+        headers = None
+        if entry is not None:
+            headers = entry.conditional_headers() or None
+        r = self._send_coalesced(
+            method, f"{self.base_url}{url}", params=params, data=data, headers=headers
+        )
+        if entry is not None and r.status_code == 304:
+            cache.revalidated(key, entry, ttl)
+            return json.loads(entry.content)
         self.log.info(f"made {method} request to {r.request.url}, data {data}")
         json_ = r.json()
 
@@ -760,13 +1658,47 @@ class Ossapi:
         # expired yet (so it doesn't error earlier up in the chain with
         # Oauth2Error).
         if json_ == {"authentication": "basic"}:
-            r = reauthenticate_and_retry()
+            self._reauthenticate()
+            r = self._send(method, f"{self.base_url}{url}", params=params, data=data)
             json_ = r.json()
 
         self.log.debug(f"received json: \n{json.dumps(json_, indent=4)}")
-        self._check_response(json_, r.url)
+        try:
+            self._check_response(json_, r.url)
+        except ValueError:
+            if key is not None and not_found_ttl > 0 and r.status_code == 404:
+                cache.set(key, r.content, not_found_ttl)
+            raise
+
+        if key is not None and ttl is not None:
+            cache.set(
+                key,
+                r.content,
+                ttl,
+                etag=r.headers.get("ETag"),
+                last_modified=r.headers.get("Last-Modified"),
+            )
+        return json_
+
+    def _refresh_in_background(self, method, url, params, data, key, ttl, entry):
+        # serving a stale response. Fetch a fresh one for next time, unless
+        # we're already doing so.
+        if not self.response_cache.start_refresh(key):
+            return
 
-        return self._instantiate_type(type_, json_)
+        def refresh():
+            try:
+                with request_priority(Priority.BACKGROUND):
+                    self._fetch_json(method, url, params, data, key, ttl, entry)
+            except Exception:
+                self.log.warning(
+                    f"failed to refresh a stale response to {url}", exc_info=True
+                )
+            finally:
+                self.response_cache.finish_refresh(key)
+
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(refresh,), daemon=True).start()
 
     def _check_response(self, json_, url):
         # TODO this should just be `if "error" in json`, but for some reason
@@ -1131,6 +2063,9 @@ class Ossapi:
         except TypeError as e:
             raise TypeError(f"type error while instantiating class {type_}: {e}") from e
 
+        group = current_model_group.get()
+        if group is not None and isinstance(val, Model):
+            group.add(val)
         return val
 
     def _get_type_hints(self, obj):
@@ -1373,6 +2308,19 @@ class Ossapi:
             raise ValueError(
                 "at least one of beatmap_id, checksum, or " "filename must be passed"
             )
+        if checksum and not (beatmap_id or filename):
+            # we may already know which beatmap has this checksum
+            known = self.checksum_index.get_many([checksum]).get(checksum)
+            if known is not None:
+                beatmap = self.beatmap(known[0])
+                if beatmap.checksum == checksum:
+                    return beatmap
+                # the beatmap has been updated since we indexed this checksum.
+                # The api doesn't look up outdated versions of beatmaps, so ask
+                # it about the checksum like we would have without the index.
+                self.checksum_index.remove_many([checksum])
+        if self._beatmap_batcher is not None and not (checksum or filename):
+            return self._beatmap_batcher.load(beatmap_id)
         params = {"checksum": checksum, "filename": filename, "id": beatmap_id}
         return self._get(Beatmap, "/beatmaps/lookup", params)
 
@@ -1396,6 +2344,91 @@ class Ossapi:
         params = {"ids": beatmap_ids}
         return self._get(Beatmaps, "/beatmaps", params).beatmaps
 
+    @request(Scope.PUBLIC, category="beatmaps")
+    def beatmaps_bulk(
+        self, beatmap_ids: Iterable[BeatmapIdT], *, concurrency: int = 4
+    ) -> dict[int, Optional[Beatmap]]:
+        """
+        Get any number of beatmaps by id, using :meth:`beatmaps` in chunks of
+        as many ids as the api accepts at once.
+
+        Returns a dict of beatmap id to beatmap, in the order the ids were
+        passed. Ids the api didn't return a beatmap for map to ``None``.
+
+        If some chunks fail, the rest are still fetched, and a
+        :class:`~ossapi.bulk.BulkLookupError` holding their results is raised
+        at the end.
+
+        Parameters
+        ----------
+        beatmap_ids
+            The beatmaps to get. Any iterable of ids or beatmaps.
+        concurrency
+            How many requests to make at once.
+        """
+        keys = bulk_keys(beatmap_ids, ids=True)
+        return self._bulk(self.beatmaps, keys, concurrency=concurrency)
+
+    @request(Scope.PUBLIC, category="beatmaps")
+    def resolve_checksums(
+        self, checksums: Iterable[str], *, concurrency: int = 4
+    ) -> dict[str, Optional[int]]:
+        """
+        Get the ids of the beatmaps with any number of checksums.
+
+        Checksums already in :attr:`checksum_index` are resolved without a
+        request. The rest are looked up with :meth:`beatmap`, up to
+        ``concurrency`` at once, and added to the index.
+
+        Returns a dict of checksum to beatmap id, in the order the checksums
+        were passed. Checksums of beatmaps the api doesn't know about (like
+        unsubmitted beatmaps) map to ``None``.
+
+        If some lookups fail for other reasons, the rest are still made, and a
+        :class:`~ossapi.bulk.BulkLookupError` holding their results is raised
+        at the end.
+
+        Parameters
+        ----------
+        checksums
+            The checksums to resolve.
+        concurrency
+            How many requests to make at once.
+        """
+        checksums = bulk_keys(checksums)
+        known = self.checksum_index.get_many(checksums)
+        unknown = [checksum for checksum in checksums if checksum not in known]
+
+        def lookup(checksum):
+            return self.beatmap(checksum=checksum)
+
+        beatmaps = self._gather(lookup, unknown, concurrency=concurrency)
+        ids = {checksum: beatmap_id for checksum, (beatmap_id, _) in known.items()}
+        found = {}
+        errors = []
+        for checksum, beatmap in zip(unknown, beatmaps):
+            # the api responds to unknown checksums with an error
+            if isinstance(beatmap, ValueError):
+                ids[checksum] = None
+            elif isinstance(beatmap, BaseException):
+                errors.append(([checksum], beatmap))
+            else:
+                ids[checksum] = beatmap.id
+                # the beatmap may have been updated since, and so have a
+                # different checksum now.
+                found[checksum] = (beatmap.id, beatmap.beatmapset_id)
+        if found:
+            self.checksum_index.set_many(found)
+
+        results = {checksum: ids[checksum] for checksum in checksums if checksum in ids}
+        if errors:
+            raise BulkLookupError(results, errors)
+        return results
+
+    def _load_beatmaps(self, beatmap_ids):
+        beatmaps = self.beatmaps(beatmap_ids)
+        return {beatmap.id: beatmap for beatmap in beatmaps}
+
     @request(Scope.PUBLIC, category="beatmaps")
     def beatmap_attributes(
         self,
@@ -1430,6 +2463,89 @@ class Ossapi:
             DifficultyAttributes, f"/beatmaps/{beatmap_id}/attributes", data=data
         )
 
+    @request(Scope.PUBLIC, category="beatmaps")
+    def beatmap_attributes_bulk(
+        self, lookups: Iterable[tuple], *, concurrency: int = 4
+    ) -> list[Optional[DifficultyAttributes]]:
+        """
+        Get the difficulty attributes of many beatmaps at once.
+
+        Returns the attributes of each lookup, in the order they were passed.
+        Lookups of beatmaps which don't exist are ``None``.
+
+        Mods are reduced to the mods which affect difficulty (see
+        :meth:`~ossapi.mod.ModCombination.difficulty_mods`), so eg ``HDDT`` and
+        ``DT`` are the same lookup. Identical lookups are only made once.
+
+        Attributes are cached in ``attributes_cache``, keyed by beatmap
+        checksum. Only lookups which aren't already cached are requested, up
+        to ``concurrency`` at once. Beatmaps passed by id are looked up first
+        with :meth:`beatmaps_bulk`, for their checksum.
+
+        If some lookups fail, the rest are still made, and a
+        :class:`~ossapi.bulk.BulkLookupError` is raised at the end. Its
+        ``results`` holds the list of attributes, with ``None`` for failed
+        lookups.
+
+        Parameters
+        ----------
+        lookups
+            ``(beatmap, mods, ruleset)`` tuples, where ``beatmap`` is a beatmap
+            id or beatmap, and ``mods`` and ``ruleset`` are as in
+            :meth:`beatmap_attributes`. ``mods`` and ``ruleset`` may be
+            ``None`` (or left out) for no mods and the beatmap's own ruleset.
+        concurrency
+            How many requests to make at once.
+        """
+        lookups = [(*lookup, None, None)[:3] for lookup in lookups]
+        ids = bulk_keys(
+            (lookup[0] for lookup in lookups if isinstance(lookup[0], (int, str))),
+            ids=True,
+        )
+        beatmaps = self.beatmaps_bulk(ids, concurrency=concurrency) if ids else {}
+        keys, requests, uncacheable = attributes_requests(lookups, beatmaps)
+
+        values = self.attributes_cache.get_many(
+            [key for key in requests if key not in uncacheable]
+        )
+        misses = [key for key in requests if key not in values]
+
+        def fetch(key):
+            beatmap_id, mods, ruleset_id = requests[key]
+            data = {"mods": mods, "ruleset_id": ruleset_id}
+            url = f"/beatmaps/{beatmap_id}/attributes"
+            return json.dumps(self._request_json("POST", url, data=data))
+
+        fetched = self._gather(fetch, misses, concurrency=concurrency)
+        errors = {}
+        for key, value in zip(misses, fetched):
+            if isinstance(value, Exception):
+                errors[key] = value
+            else:
+                values[key] = value
+        self.attributes_cache.set_many(
+            {
+                key: values[key]
+                for key in misses
+                if key not in errors and key not in uncacheable
+            }
+        )
+
+        self._clear_type_hints_cache()
+        results = [
+            None
+            if key not in values
+            else self._instantiate_type(DifficultyAttributes, json.loads(values[key]))
+            for key in keys
+        ]
+        if errors:
+            failed = [
+                ([lookup for lookup, k in zip(lookups, keys) if k == key], error)
+                for key, error in errors.items()
+            ]
+            raise BulkLookupError(results, failed)
+        return results
+
     # /beatmapsets
     # ------------
 
@@ -1544,6 +2660,7 @@ class Ossapi:
         beatmapset_id: Optional[BeatmapsetIdT] = None,
         beatmap_id: Optional[BeatmapIdT] = None,
         beatmapset_status: Optional[BeatmapsetStatusT] = None,
+        cursor_string: Optional[str] = None,
         limit: Optional[int] = None,
         message_types: Optional[list[MessageTypeT]] = None,
         only_unresolved: Optional[bool] = None,
@@ -1563,6 +2680,8 @@ class Ossapi:
             Filter by a beatmap.
         beatmapset_status
             Filter by a category of beatmapsets.
+        cursor_string
+            Cursor for pagination.
         limit
             Maximum number of discussions to return.
         message_types
@@ -1589,6 +2708,7 @@ class Ossapi:
             "beatmapset_id": beatmapset_id,
             "beatmap_id": beatmap_id,
             "beatmapset_status": beatmapset_status,
+            "cursor_string": cursor_string,
             "limit": limit,
             "message_types": message_types,
             "only_unresolved": only_unresolved,
@@ -2418,8 +3538,9 @@ class Ossapi:
         Implements the `Revoke Current Token
         <https://osu.ppy.sh/docs/index.html#revoke-current-token>`__ endpoint.
         """
+        self._ensure_authenticated()
         self.session.delete(f"{self.base_url}/oauth/tokens/current")
-        self.remove_token(self.token_key, self.token_directory)
+        self.token_store.remove(self.token_key)
 
     # /rankings
     # ---------
@@ -2671,8 +3792,35 @@ class Ossapi:
         """
         return self._get(Score, f"/scores/{mode.value}/{score_id}")
 
-    def _download_score(self, *, url, raw):
-        r = self.session.get(url)
+    def _download_score(self, *, url, raw, key):
+        content = None
+        if self.replay_store is not None:
+            content = self.replay_store.get(key)
+        if content is None:
+            content = self._download_replay(url)
+            if self.replay_store is not None and self._is_replay(content):
+                self.replay_store.put(key, content)
+
+        if raw:
+            return content
+
+        replay = osrparse.Replay.from_string(content)
+        return Replay(replay, self)
+
+    @staticmethod
+    def _is_replay(content):
+        # replays never expire from the store, so make sure we don't keep
+        # something that isn't one (an error page, say) around forever.
+        try:
+            replay_hashes(content)
+        except ValueError:
+            return False
+        return True
+
+    def _download_replay(self, url):
+        # identical downloads already in flight are coalesced by
+        # _send_coalesced.
+        r = self._send_coalesced("GET", url)
         # if the response above succeeded, it will return a raw string
         # instead of json. If it didn't succeed, it will return json with an
         # error.
@@ -2683,12 +3831,7 @@ class Ossapi:
             self._check_response(json_, url)
         except json.JSONDecodeError:
             pass
-
-        if raw:
-            return r.content
-
-        replay = osrparse.Replay.from_string(r.content)
-        return Replay(replay, self)
+        return r.content
 
     @request(Scope.PUBLIC, category="scores")
     def download_score(self, score_id: int, *, raw: bool = False) -> Replay:
@@ -2713,7 +3856,7 @@ class Ossapi:
         endpoint.
         """
         url = f"{self.base_url}/scores/{score_id}/download"
-        return self._download_score(url=url, raw=raw)
+        return self._download_score(url=url, raw=raw, key=str(score_id))
 
     @request(Scope.PUBLIC, category="scores")
     def download_score_mode(
@@ -2742,7 +3885,8 @@ class Ossapi:
         endpoint.
         """
         url = f"{self.base_url}/scores/{mode.value}/{score_id}/download"
-        return self._download_score(url=url, raw=raw)
+        key = f"{mode.value}/{score_id}"
+        return self._download_score(url=url, raw=raw, key=key)
 
     # seasonal backgrounds
     # --------------------
@@ -2953,6 +4097,9 @@ class Ossapi:
         """
         Searches for the beatmaps a user has passed, by beatmapset.
 
+        The api only accepts 50 beatmapsets per request, so more than 50
+        ``beatmapset_ids`` are split into several requests, made concurrently.
+
         Parameters
         ----------
         user_id
@@ -2975,18 +4122,23 @@ class Ossapi:
         endpoint.
         """
 
-        params = {
-            "beatmapset_ids": beatmapset_ids,
-            "exclude_converts": (
-                None if exclude_converts is None else int(exclude_converts)
-            ),
-            "is_legacy": None if is_legacy is None else int(is_legacy),
-            "no_diff_reduction": int(no_diff_reduction),
-            "ruleset_id": ruleset_id,
-        }
-        return self._get(
-            BeatmapsPassed, f"/users/{user_id}/beatmaps-passed", params
-        ).beatmaps_passed
+        def search(beatmapset_ids):
+            params = {
+                "beatmapset_ids": beatmapset_ids,
+                "exclude_converts": (
+                    None if exclude_converts is None else int(exclude_converts)
+                ),
+                "is_legacy": None if is_legacy is None else int(is_legacy),
+                "no_diff_reduction": int(no_diff_reduction),
+                "ruleset_id": ruleset_id,
+            }
+            return self._get(
+                BeatmapsPassed, f"/users/{user_id}/beatmaps-passed", params
+            ).beatmaps_passed
+
+        chunks = chunked(list(beatmapset_ids))
+        results = self._gather(search, chunks, concurrency=4)
+        return merge_pages(results)
 
     @request(Scope.PUBLIC, category="users")
     def user(
@@ -3067,6 +4219,101 @@ class Ossapi:
         params = {"ids": user_ids}
         return self._get(Users, "/users", params).users
 
+    @request(Scope.PUBLIC, category="users")
+    def load_user(self, user_id: UserIdT) -> UserCompact:
+        """
+        Get a single user by id, using :meth:`users`. If ``batch_window`` was
+        passed, lookups made within ``batch_window`` seconds of each other are
+        made as a single :meth:`users` request.
+
+        Note that this returns a :class:`~ossapi.models.UserCompact`, like
+        :meth:`users` does, and not the :class:`~ossapi.models.User` returned
+        by :meth:`user`.
+
+        Parameters
+        ----------
+        user_id
+            The user to get.
+        """
+        if self._user_batcher is not None:
+            return self._user_batcher.load(user_id)
+        users = self.users([user_id])
+        if not users:
+            raise ValueError(f"no result was returned for {user_id!r}")
+        return users[0]
+
+    @request(Scope.PUBLIC, category="users")
+    def users_bulk(
+        self, user_ids: Iterable[UserIdT], *, concurrency: int = 4
+    ) -> dict[int, Optional[UserCompact]]:
+        """
+        Get any number of users by id, using :meth:`users` in chunks of as many
+        ids as the api accepts at once.
+
+        Returns a dict of user id to user, in the order the ids were passed.
+        Ids the api didn't return a user for map to ``None``.
+
+        If some chunks fail, the rest are still fetched, and a
+        :class:`~ossapi.bulk.BulkLookupError` holding their results is raised
+        at the end.
+
+        Parameters
+        ----------
+        user_ids
+            The users to get. Any iterable of ids or users.
+        concurrency
+            How many requests to make at once.
+        """
+        keys = bulk_keys(user_ids, ids=True)
+        return self._bulk(self.users, keys, concurrency=concurrency)
+
+    @request(Scope.PUBLIC, category="users")
+    def users_lookup_bulk(
+        self,
+        users: Iterable[Union[UserIdT, str]],
+        *,
+        exclude_bots: Optional[bool] = None,
+        ruleset_id: Optional[int] = None,
+        concurrency: int = 4,
+    ) -> dict[Union[int, str], Optional[UserCompact]]:
+        """
+        Get any number of users by id or username, using :meth:`users_lookup`
+        in chunks of as many users as the api accepts at once.
+
+        Returns a dict of each passed id or username to its user, in the order
+        they were passed. Ids or usernames the api didn't return a user for map
+        to ``None``.
+
+        If some chunks fail, the rest are still fetched, and a
+        :class:`~ossapi.bulk.BulkLookupError` holding their results is raised
+        at the end.
+
+        Parameters
+        ----------
+        users
+            The user ids or usernames to get. Any iterable of ids, usernames,
+            or users.
+        exclude_bots
+            Whether to exclude bots from the returned users. Excluded bots map
+            to ``None``.
+        ruleset_id
+            The id of the ruleset used to populate the `global_rank` field.
+        concurrency
+            How many requests to make at once.
+        """
+        keys = bulk_keys(users)
+
+        def lookup(chunk):
+            return self.users_lookup(
+                chunk, exclude_bots=exclude_bots, ruleset_id=ruleset_id
+            )
+
+        return self._bulk(lookup, keys, concurrency=concurrency, usernames=True)
+
+    def _load_users(self, user_ids):
+        users = self.users(user_ids)
+        return {user.id: user for user in users}
+
     # /wiki
     # -----
 
@@ -8,19 +8,22 @@
 # will be to hardcode the insertion points of all the particular changes I've
 # made.
 
+import asyncio
 import functools
 import hashlib
 import inspect
 import json
 import logging
-import pickle
 import socket
 import sys
+import threading
+import time
 import webbrowser
+from contextlib import asynccontextmanager
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Optional, TypeVar, Union, _GenericAlias
+from typing import Iterable, Optional, TypeVar, Union, _GenericAlias
 from urllib.parse import unquote
 
 import osrparse
@@ -39,6 +42,22 @@ from requests_oauthlib.oauth2_session import TokenUpdated
 from typing_utils import get_args, get_origin, get_type_hints, issubtype
 
 import ossapi
+from ossapi.attributes import (
+    AttributesCache,
+    MemoryAttributesCache,
+    attributes_requests,
+)
+from ossapi.batching import AsyncBatcher
+from ossapi.bulk import BulkLookupError, bulk_keys, bulk_results, chunked
+from ossapi.cache import ResponseCache, _last_response_fresh
+from ossapi.checksums import (
+    ChecksumIndex,
+    MemoryChecksumIndex,
+    beatmap_checksums,
+)
+from ossapi.coalescing import AsyncSingleFlight, request_key
+from ossapi.concurrency import AdaptiveConcurrencyLimiter
+from ossapi.connections import ConnectionStats, ResumingSSLContext
 from ossapi.enums import (
     BeatmapDiscussionPostSort,
     BeatmapPackType,
@@ -69,6 +88,7 @@ from ossapi.enums import (
     UserBeatmapType,
     UserLookupKey,
 )
+from ossapi.hedging import HedgePolicy
 from ossapi.mod import Mod
 from ossapi.models import (
     Beatmap,
@@ -129,16 +149,37 @@ from ossapi.models import (
     WikiPage,
     _Event,
 )
+from ossapi.pagination import (
+    check_offset_paginated,
+    cursor_parameter,
+    merge_pages,
+    next_page_kwargs,
+    offset_page_items,
+    page_items,
+)
+from ossapi.ratelimit import RateLimiter, RateLimitState, TokenBucket
 from ossapi.replay import Replay
+from ossapi.replay_store import ReplayStore, replay_hashes
+from ossapi.retry import RetryPolicies, RetryPolicy, parse_retry_after
+from ossapi.scheduler import AsyncPriorityScheduler, Priority, request_priority
+from ossapi.token_store import FileTokenStore, TokenStore, token_expired
 from ossapi.utils import (
+    EndpointCall,
     Field,
+    Model,
+    ModelGroup,
+    Prefetch,
     _Model,
     convert_primitive_type,
+    current_endpoint,
+    current_model_group,
+    current_prefetch,
     is_base_model_type,
     is_high_model_type,
     is_model_type,
     is_optional,
     is_primitive_type,
+    unfollowed_foreign_keys,
 )
 
 
@@ -295,7 +336,7 @@ def request(scope, *, requires_user=False, category):
         arg_names = list(inspect.signature(function).parameters)
 
         @functools.wraps(function)
-        def wrapper(*args, **kwargs):
+        async def wrapper(*args, **kwargs):
             self = args[0]
             if scope is not None and scope not in self.scopes:
                 raise InsufficientScopeError(
@@ -371,7 +412,11 @@ def request(scope, *, requires_user=False, category):
                 if id_:
                     kwargs[arg_name] = id_
 
-            return function(*args, **kwargs)
+            token = current_endpoint.set(EndpointCall(function.__name__, category))
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                current_endpoint.reset(token)
 
         # for docs generation
         wrapper.__ossapi_category__ = category
@@ -490,6 +535,16 @@ class OssapiAsync:
         taking responsibility for making sure it is unique / unused, and also
         for remembering the key you passed if you wish to eg remove the token in
         the future, which requires the key.
+    token_store: TokenStore
+        Where to save and retrieve tokens. Defaults to a
+        :class:`~ossapi.token_store.FileTokenStore` in ``token_directory``.
+        |br|
+        Clients sharing a token store share a single token, and pick up tokens
+        granted or refreshed by the others instead of granting their own. Pass
+        a shared :class:`~ossapi.token_store.SQLiteTokenStore` or
+        :class:`~ossapi.token_store.FileTokenStore` to share a token between
+        processes, or a :class:`~ossapi.token_store.MemoryTokenStore` to keep
+        tokens off disk entirely.
     access_token: str
         Access token from the osu! api. Allows instantiating
         :class:`~ossapi.ossapiv2.Ossapi` after manually authenticating with the
@@ -508,6 +563,97 @@ class OssapiAsync:
         :data:`Domain.DEV <ossapi.ossapiv2.Domain.DEV>`.
         |br|
         See :doc:`Domains <domains>` for more about domains.
+    lazy_auth: bool
+        If ``True``, don't authenticate on instantiation. Instead, authenticate
+        the first time an endpoint is called (or when :meth:`warmup` is
+        called). This makes instantiation free of any network requests, which
+        is useful for short-lived programs which may never call the api.
+    min_connections: int
+        How many connections to the api to keep open and ready at all times.
+        If greater than 0, :meth:`warmup` (or the first endpoint call) opens
+        this many connections in a persistent aiohttp session, and a background
+        task keeps them alive by touching them every ``keepalive_interval``
+        seconds. Call :meth:`close` when you're done to close them.
+        |br|
+        Regardless of this setting, TLS sessions are resumed when reconnecting.
+    keepalive_interval: float
+        How often, in seconds, to touch the connections kept open by
+        ``min_connections``. Has no effect if ``min_connections`` is 0.
+    rate_limiter: RateLimiter
+        Limits how often we make requests to the api. Defaults to a
+        :class:`~ossapi.ratelimit.TokenBucket` matching the osu! api's
+        documented limit of 1200 requests per minute, with a burst of 200.
+        |br|
+        The rate limiter is shared by every thread or task using this client. Pass
+        the same rate limiter to several clients to share a single budget
+        between them.
+    retry_policy: RetryPolicy or dict[str, RetryPolicy]
+        When and how to retry requests which fail with a retryable status code,
+        like 429 (too many requests). Only ``GET`` requests are retried.
+        Defaults to a :class:`~ossapi.retry.RetryPolicy` with its default
+        parameters.
+        |br|
+        Pass a dict to use a different policy for each endpoint category,
+        keyed by category name (like ``"scores"``). Categories not in the dict
+        use the default policy.
+    hedge_policy: HedgePolicy
+        If passed, hedge requests to read-only endpoints (by default
+        :meth:`user`, :meth:`beatmap`, :meth:`score`, and
+        :meth:`beatmap_scores`): if a request takes unusually long, send a
+        second identical request and use whichever response arrives first.
+        See :class:`~ossapi.hedging.HedgePolicy`.
+    concurrency_limiter: AdaptiveConcurrencyLimiter
+        If passed, limits how many requests this client has in flight at once,
+        adapting the limit to how the api is responding. Useful when
+        ``asyncio.gather``-ing many calls at once, instead of hand-tuning a
+        semaphore. The current limit is available as
+        ``api.concurrency_limiter.limit``.
+    scheduler: AsyncPriorityScheduler
+        Decides which waiting request to make next when several are waiting on
+        the rate limit, based on their :class:`~ossapi.scheduler.Priority`.
+        See :meth:`priority`. Defaults to a
+        :class:`~ossapi.scheduler.AsyncPriorityScheduler` with its default
+        parameters.
+    coalesce_requests: bool
+        Whether to coalesce identical GET requests made at the same time into
+        a single request, whose response is shared between the callers. Each
+        caller still receives its own model instances. See
+        :class:`~ossapi.coalescing.AsyncSingleFlight`.
+    batch_window: float
+        If passed, batch lookups of single beatmaps by id made within this
+        many seconds of each other into a single :meth:`beatmaps` request.
+        This also batches :meth:`load_user`. Off by default, since every
+        batched lookup waits up to ``batch_window`` seconds for others to join
+        it. See :class:`~ossapi.batching.AsyncBatcher`.
+    attributes_cache: AttributesCache
+        Where :meth:`beatmap_attributes_bulk` caches difficulty attributes.
+        Pass a :class:`~ossapi.attributes.SQLiteAttributesCache` to keep them
+        between runs. Defaults to a
+        :class:`~ossapi.attributes.MemoryAttributesCache`.
+    response_cache: ResponseCache
+        If passed, cache responses in this cache, for as long as its ttl for
+        the endpoint they were made for. See :class:`~ossapi.cache.ResponseCache`.
+        Pass a :class:`~ossapi.cache.SQLiteResponseCache` to keep responses
+        between runs.
+    replay_store: ReplayStore
+        If passed, :meth:`download_score` and :meth:`download_score_mode` store
+        replays they download in this store, and read replays from it instead
+        of downloading them again. See :class:`~ossapi.replay_store.ReplayStore`.
+    checksum_index: ChecksumIndex
+        Where every beatmap received from the api is indexed by checksum, and
+        where :meth:`beatmap` and :meth:`resolve_checksums` look up checksums
+        before asking the api. Pass a
+        :class:`~ossapi.checksums.SQLiteChecksumIndex` to keep the index
+        between runs. Defaults to a
+        :class:`~ossapi.checksums.MemoryChecksumIndex`.
+    compact_foreign_users: bool
+        If true, following a foreign key to a user (like ``score.user()``)
+        returns a :class:`~ossapi.models.UserCompact` looked up with
+        :meth:`users`, along with the user of every model of the same type
+        from the same response. This makes one request per 50 distinct users
+        instead of one per model, but the full :class:`~ossapi.models.User`
+        isn't available. Also the default for ``compact_users`` in
+        :meth:`prefetch`.
     """
 
     TOKEN_URL = "https://{domain}.ppy.sh/oauth/token"
@@ -525,10 +671,26 @@ class OssapiAsync:
         strict: bool = False,
         token_directory: Optional[str] = None,
         token_key: Optional[str] = None,
+        token_store: Optional[TokenStore] = None,
         access_token: Optional[str] = None,
         refresh_token: Optional[str] = None,
         domain: Union[str, Domain] = Domain.OSU,
         api_version: int | str = 20241024,
+        lazy_auth: bool = False,
+        min_connections: int = 0,
+        keepalive_interval: float = 30,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[Union[RetryPolicy, dict[str, RetryPolicy]]] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        scheduler: Optional[AsyncPriorityScheduler] = None,
+        coalesce_requests: bool = True,
+        batch_window: Optional[float] = None,
+        attributes_cache: Optional[AttributesCache] = None,
+        response_cache: Optional[ResponseCache] = None,
+        replay_store: Optional[ReplayStore] = None,
+        checksum_index: Optional[ChecksumIndex] = None,
+        compact_foreign_users: bool = False,
     ):
         if not grant:
             grant = (
@@ -559,6 +721,13 @@ class OssapiAsync:
             self.domain.value,
         )
         self._type_hints_cache = {}
+        # only set if the consumer opts into a persistent session with `warmup`
+        self._aiohttp_session = None
+        self._aiohttp_session_loop = None
+        self.min_connections = min_connections
+        self.keepalive_interval = keepalive_interval
+        self._ssl_context = ResumingSSLContext()
+        self._keepalive_task = None
 
         # support saving tokens when being run from pyinstaller
         if hasattr(sys, "_MEIPASS") and not token_directory:
@@ -568,6 +737,7 @@ class OssapiAsync:
             Path(token_directory) if token_directory else Path(__file__).parent
         )
         self.token_file = self.token_directory / f"{self.token_key}.pickle"
+        self.token_store = token_store or FileTokenStore(self.token_directory)
 
         if self.grant is Grant.CLIENT_CREDENTIALS:
             if self.scopes != [Scope.PUBLIC]:
@@ -597,7 +767,36 @@ class OssapiAsync:
             token = OAuth2Token(params)
             self.access_token_passed = True
 
-        self.session = self.authenticate(token=token)
+        self.rate_limiter = rate_limiter or TokenBucket()
+        # the rate limit state reported by the api's most recent response
+        self.ratelimit = RateLimitState()
+        self.retry_policies = RetryPolicies.from_arg(retry_policy)
+        self.hedge_policy = hedge_policy
+        self.scheduler = scheduler or AsyncPriorityScheduler()
+        self.single_flight = AsyncSingleFlight() if coalesce_requests else None
+        self.attributes_cache = attributes_cache or MemoryAttributesCache()
+        self.response_cache = response_cache
+        self.replay_store = replay_store
+        self.checksum_index = checksum_index or MemoryChecksumIndex()
+        self.compact_foreign_users = compact_foreign_users
+        # background refreshes of stale responses
+        self._refresh_tasks = set()
+        self._beatmap_batcher = None
+        self._user_batcher = None
+        if batch_window is not None:
+            self._beatmap_batcher = AsyncBatcher(
+                self._load_beatmaps, window=batch_window, max_batch_size=50
+            )
+            self._user_batcher = AsyncBatcher(
+                self._load_users, window=batch_window, max_batch_size=50
+            )
+        self.concurrency_limiter = concurrency_limiter
+
+        self.session = None
+        self._initial_token = token
+        self._auth_lock = threading.Lock()
+        if not lazy_auth:
+            self.session = self.authenticate(token=token)
 
     @staticmethod
     def gen_token_key(grant, client_id, client_secret, scopes, domain=Domain.OSU):
@@ -631,15 +830,21 @@ class OssapiAsync:
         return m.hexdigest()
 
     @staticmethod
-    def remove_token(key, token_directory=None):
+    def remove_token(key, token_directory=None, *, token_store=None):
         """
         Removes the token file associated with the given key. If
         ``token_directory`` is passed, looks there for the token file instead of
-        locally in ossapi's install site.
+        locally in ossapi's install site. If ``token_store`` is passed, removes
+        the token from that :class:`~ossapi.token_store.TokenStore` instead.
 
         To determine the key associated with a given grant, client_id,
-        client_secret, and set of scopes, use ``gen_token_key``.
+        client_secret, and set of scopes, use ``gen_token_key``. A client's
+        key is also available as its ``token_key``.
         """
+        if token_store is not None:
+            token_store.remove(key)
+            return
+
         token_directory = (
             Path(token_directory) if token_directory else Path(__file__).parent
         )
@@ -648,53 +853,101 @@ class OssapiAsync:
 
     def authenticate(self, token=None):
         """
-        Returns a valid OAuth2Session, either from a saved token file associated
+        Returns a valid OAuth2Session, either from a saved token associated
         with this OssapiV2's parameters, or from a fresh authentication if no
-        such file exists.
+        such token exists.
         """
 
-        # try saved token file first
-        if self.token_file.exists() or token is not None:
-            if token is None:
-                with open(self.token_file, "rb") as f:
-                    token = pickle.load(f)
-
-            if self.grant is Grant.CLIENT_CREDENTIALS:
-                return Oauth2SessionAsync(
-                    self.client_id, token=token, api_version=self.api_version
-                )
-
-            if self.grant is Grant.AUTHORIZATION_CODE:
-                auto_refresh_kwargs = {
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                }
-                return Oauth2SessionAsync(
-                    self.client_id,
-                    token=token,
-                    redirect_uri=self.redirect_uri,
-                    auto_refresh_url=self.token_url,
-                    auto_refresh_kwargs=auto_refresh_kwargs,
-                    token_updater=self._save_token,
-                    scope=[scope.value for scope in self.scopes],
-                    api_version=self.api_version,
-                )
+        # try saved token first
+        if token is None:
+            token = self.token_store.load(self.token_key)
+        if token is not None:
+            return self._session_from_token(token)
 
         # otherwise, authorize from scratch
         return self._new_grant()
 
+    def _session_from_token(self, token):
+        if self.grant is Grant.CLIENT_CREDENTIALS:
+            return Oauth2SessionAsync(
+                self.client_id, token=token, api_version=self.api_version
+            )
+
+        auto_refresh_kwargs = {
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+        }
+        return Oauth2SessionAsync(
+            self.client_id,
+            token=token,
+            redirect_uri=self.redirect_uri,
+            auto_refresh_url=self.token_url,
+            auto_refresh_kwargs=auto_refresh_kwargs,
+            token_updater=self._save_token,
+            scope=[scope.value for scope in self.scopes],
+            api_version=self.api_version,
+        )
+
+    def _load_newer_token(self):
+        """
+        Returns the token in our token store if it is valid and differs from the
+        token we're currently using, which happens when another client sharing
+        our token store has granted or refreshed the token. Returns ``None``
+        otherwise.
+        """
+        token = self.token_store.load(self.token_key)
+        if token is None or token_expired(token):
+            return None
+        if self.session is not None and self.session.token:
+            if token.get("access_token") == self.session.token.get("access_token"):
+                return None
+        return token
+
+    def _sync_token(self):
+        """
+        Switches to a newer token from our token store if our current token has
+        expired. This lets clients sharing a token store pick up each other's
+        refreshes instead of each refreshing (or re-granting) on their own.
+        """
+        if self.access_token_passed or not token_expired(self.session.token):
+            return
+        token = self._load_newer_token()
+        if token is not None:
+            self.log.info("picked up a newer token from the token store")
+            self.session = self._session_from_token(token)
+
     def _new_grant(self):
         if self.grant is Grant.CLIENT_CREDENTIALS:
             return self._new_client_grant(self.client_id, self.client_secret)
 
-        return self._new_authorization_grant(
-            self.client_id, self.client_secret, self.redirect_uri, self.scopes
-        )
+        # hold the token store lock while granting so that only one of the
+        # clients sharing our token store opens a browser for the user.
+        with self.token_store.lock(self.token_key):
+            token = self._load_newer_token()
+            if token is not None:
+                self.log.info("using token granted by another client")
+                return self._session_from_token(token)
+
+            return self._new_authorization_grant(
+                self.client_id, self.client_secret, self.redirect_uri, self.scopes
+            )
 
     def _new_client_grant(self, client_id, client_secret):
         """
         Authenticates with the api from scratch on the client grant.
         """
+        # hold the token store lock while granting so that when many clients
+        # share our token store and their token expires, only one of them
+        # requests a new token and the rest pick it up from the store.
+        with self.token_store.lock(self.token_key):
+            token = self._load_newer_token()
+            if token is not None:
+                self.log.info("using token granted by another client")
+                return self._session_from_token(token)
+
+            return self._fetch_client_grant(client_id, client_secret)
+
+    def _fetch_client_grant(self, client_id, client_secret):
         self.log.info("initializing client credentials grant")
         client = BackendApplicationClient(client_id=client_id, scope=["public"])
         session = Oauth2SessionAsync(client=client, api_version=self.api_version)
@@ -757,87 +1010,794 @@ class OssapiAsync:
 
     def _save_token(self, token):
         """
-        Saves the token to this OssapiV2's associated token file.
+        Saves the token to this OssapiV2's token store.
         """
-        self.log.info(f"saving token to {self.token_file}")
-        with open(self.token_file, "wb+") as f:
-            pickle.dump(token, f)
+        self.log.info(f"saving token with key {self.token_key}")
+        self.token_store.save(self.token_key, token)
 
-    async def _request(self, type_, method, url, params={}, data={}):
-        from aiohttp import ClientSession
+    def _ensure_authenticated(self):
+        """
+        Authenticates if we haven't yet, which is only the case if we were
+        instantiated with ``lazy_auth=True``.
+        """
+        if self.session is not None:
+            return
+        with self._auth_lock:
+            # another thread may have authenticated while we waited on the lock
+            if self.session is not None:
+                return
+            self.session = self.authenticate(token=self._initial_token)
 
-        # I don't *think* type hints should change over the lifetime of a
-        # program, but clear them every request out of an abundance of caution.
-        # This costs us almost nothing and may avoid bugs when eg a consumer
-        # changes type hints of a custom model dynamically at some point.
-        # They should certainly not be doing so in the middle of a request,
-        # however.
-        self._clear_type_hints_cache()
+    async def warmup(self):
+        """
+        Authenticates and opens a connection to the api ahead of time, so that
+        the first endpoint call doesn't pay for either.
 
-        params = self._format_params(params)
-        # also format data for post requests
-        data = self._format_params(data)
+        This also switches us to a single aiohttp session for all requests,
+        instead of a new session per request. Call :meth:`close` (or use
+        ``async with OssapiAsync(...) as api:``) to close it when you're done.
+        |br|
+        If ``min_connections`` was passed, opens that many connections instead
+        of one, and starts keeping them alive.
+        """
+        # authenticating is sync, and may make a request. Don't block the
+        # event loop while it does.
+        await asyncio.to_thread(self._ensure_authenticated)
+        self._open_persistent_session()
+        await self._open_connections(max(1, self.min_connections))
+
+    def _new_client_session(self):
+        from aiohttp import ClientSession, TCPConnector
+
+        connector_kwargs = {}
+        if self.min_connections > 0:
+            connector_kwargs["limit"] = max(100, self.min_connections)
+            # aiohttp closes connections idle for longer than this. Make sure
+            # our keepalive gets to them first.
+            connector_kwargs["keepalive_timeout"] = self.keepalive_interval * 2
+        connector = TCPConnector(ssl=self._ssl_context, **connector_kwargs)
+        return ClientSession(connector=connector)
+
+    def _open_persistent_session(self):
+        session = self._persistent_session()
+        if session is not None:
+            return session
+
+        self._aiohttp_session = self._new_client_session()
+        self._aiohttp_session_loop = asyncio.get_running_loop()
+        if self.min_connections > 0:
+            self._keepalive_task = asyncio.create_task(self._keepalive())
+        return self._aiohttp_session
+
+    async def _open_connection(self):
+        # opening a connection costs a request like any other, so it waits its
+        # turn and counts against our rate limit.
+        await self.scheduler.acquire(self.rate_limiter)
+        try:
+            # we only care about the (pooled) connection to the api host that
+            # this request opens, not its response.
+            async with self._aiohttp_session.head(self.base_url) as r:
+                await r.read()
+        finally:
+            self.scheduler.release()
+
+    async def _open_connections(self, n):
+        """
+        Makes sure at least ``n`` connections to the api are open and idle in
+        our persistent session, and resets the idle timer of each.
+        """
+        # a request only opens a new connection if every pooled connection is
+        # in use, so make the requests concurrently.
+        await asyncio.gather(*[self._open_connection() for _ in range(n)])
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                # keeping connections alive shouldn't hold up actual requests
+                with request_priority(Priority.BACKGROUND):
+                    await self._open_connections(self.min_connections)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # a failed keepalive just means the next request opens a fresh
+                # connection, which is no worse than not keeping connections
+                # alive at all.
+                pass
+
+    def connection_stats(self):
+        """
+        Returns a :class:`~ossapi.connections.ConnectionStats` describing the
+        connections this client has made to the api.
+        """
+        idle = 0
+        session = self._aiohttp_session
+        if session is not None and not session.closed:
+            # aiohttp doesn't expose its pool publicly.
+            for conns in getattr(session.connector, "_conns", {}).values():
+                idle += len(conns)
+        return ConnectionStats(
+            connections_opened=self._ssl_context.connections_opened,
+            tls_sessions_resumed=self._ssl_context.sessions_resumed,
+            idle_connections=idle,
+        )
+
+    def _persistent_session(self):
+        session = self._aiohttp_session
+        if session is None or session.closed:
+            return None
+        # aiohttp sessions are bound to the event loop they were created in.
+        if self._aiohttp_session_loop is not asyncio.get_running_loop():
+            return None
+        return session
+
+    @asynccontextmanager
+    async def _client_session(self):
+        session = self._persistent_session()
+        if session is None and self.min_connections > 0:
+            session = self._open_persistent_session()
+        if session is not None:
+            yield session
+            return
 
         # No, we should not be using a session for every request. Yes, we are
         # not achieving 100% performance by doing this. The benefit is that we
         # don't require `async with OssapiAsync(...) as api:` syntax in order to
-        # use ossapi.
-        aiohttp_session = ClientSession()
+        # use ossapi. Consumers who want a persistent session can opt in with
+        # `warmup`.
+        session = self._new_client_session()
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    async def close(self):
+        """
+        Closes the aiohttp session opened by :meth:`warmup`, if any, and stops
+        keeping connections alive.
+        """
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        if self._aiohttp_session is not None:
+            await self._aiohttp_session.close()
+            self._aiohttp_session = None
+
+    async def __aenter__(self):
+        await self.warmup()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
 
-        async def make_request():
-            return await self.session.request_async(
+    def priority(self, priority):
+        """
+        A context manager which makes every request made inside it (in this
+        task) with priority ``priority``.
+
+        .. code-block:: python
+
+            with api.priority(Priority.BACKGROUND):
+                await api.ranking("osu", RankingType.PERFORMANCE)
+
+        The priority applies to requests made by any client in this context,
+        not just this one.
+        """
+        return request_priority(priority)
+
+    async def prefetch(self, models, *relations, compact_users=None):
+        """
+        Follows the foreign keys ``relations`` of each of ``models`` up front,
+        in as few requests as possible, so following them later makes no
+        requests.
+
+        .. code-block:: python
+
+            posts = (await api.beatmapset_discussion_posts(2641058)).posts
+            await api.prefetch(posts, "user", "last_editor")
+
+            playcounts = await api.user_beatmaps(12092800, type="most_played")
+            await api.prefetch(playcounts, "beatmap.beatmapset")
+
+        Each relation is the name of a foreign key method (like ``"user"``),
+        and may follow further foreign keys of the model it returns, separated
+        by dots (like ``"beatmap.beatmapset"``). Returns ``models``.
+
+        Users are looked up in full with :meth:`user`, concurrently. Pass
+        ``compact_users=True`` to look them up with :meth:`users` instead,
+        which only costs one request per 50 users, but returns a
+        :class:`~ossapi.models.UserCompact`. Following those foreign keys
+        afterwards returns the :class:`~ossapi.models.UserCompact`. Defaults
+        to the client's ``compact_foreign_users``.
+
+        Raises if a foreign key references a model which doesn't exist, like
+        following it would.
+        """
+        models = list(models)
+        if compact_users is None:
+            compact_users = self.compact_foreign_users
+        token = current_prefetch.set(Prefetch(compact_users=compact_users))
+        try:
+            for relation in relations:
+                related = models
+                for name in relation.split("."):
+                    related = await self._prefetch_relation(related, name)
+        finally:
+            current_prefetch.reset(token)
+        return models
+
+    async def _prefetch_relation(self, models, name):
+        # group the models together, so following the foreign key of one of
+        # them follows it for all of them.
+        group = ModelGroup()
+        for model in models:
+            group.add(model)
+
+        related = {}
+        for model in models:
+            result = getattr(model, name)()
+            # models already holding the related model return it directly
+            if inspect.isawaitable(result):
+                result = await result
+            if result is not None:
+                related[id(result)] = result
+        return list(related.values())
+
+    def paginate(self, endpoint, *args, max_items=None, stop=None, **kwargs):
+        """
+        Returns a lazy async iterator over the items of every page of the
+        paginated endpoint ``endpoint``, called with ``args`` and ``kwargs``.
+
+        .. code-block:: python
+
+            async for beatmapset in api.paginate(
+                api.search_beatmapsets, query="black", max_items=200
+            ):
+                print(beatmapset.title)
+
+        The next page is requested while the items of the current page are
+        being consumed. Iteration stops after the last page, after
+        ``max_items`` items if passed, or at the first item for which
+        ``stop(item)`` is true if passed:
+
+        .. code-block:: python
+
+            cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+            async for event in api.paginate(
+                api.events, stop=lambda event: event.created_at < cutoff
+            ):
+                print(event.type)
+
+        To start from a later page, pass its ``cursor`` (or ``cursor_string``).
+
+        Supports :meth:`search_beatmapsets`, :meth:`comments`, :meth:`ranking`,
+        :meth:`events`, :meth:`news_listing`, :meth:`beatmap_packs`,
+        :meth:`scores`, :meth:`forum_topic`, :meth:`multiplayer_scores`, and
+        :meth:`beatmapset_discussions`.
+        """
+        parameter = cursor_parameter(endpoint)
+        return self._paginate(endpoint, args, kwargs, parameter, max_items, stop)
+
+    async def _paginate(self, endpoint, args, kwargs, parameter, max_items, stop):
+        def fetch(kwargs):
+            return asyncio.ensure_future(endpoint(*args, **kwargs))
+
+        remaining = max_items
+        future = fetch(kwargs) if remaining is None or remaining > 0 else None
+        try:
+            while future is not None:
+                page = await future
+                future = None
+                items = page_items(page)
+                if remaining is not None:
+                    items = items[:remaining]
+                    remaining -= len(items)
+
+                kwargs = next_page_kwargs(kwargs, parameter, page)
+                if items and kwargs is not None and remaining != 0:
+                    future = fetch(kwargs)
+                for item in items:
+                    if stop is not None and stop(item):
+                        return
+                    yield item
+        finally:
+            # the caller stopped iterating before we ran out of pages
+            if future is not None:
+                future.cancel()
+
+    async def fetch_pages(
+        self, endpoint, *args, page_size=100, max_items=None, concurrency=4, **kwargs
+    ):
+        """
+        Returns every item of the endpoint ``endpoint``, which is paginated by
+        ``limit`` and ``offset``, called with ``args`` and ``kwargs``.
+
+        .. code-block:: python
+
+            playcounts = await api.fetch_pages(
+                api.user_beatmaps, 12092800, UserBeatmapType.MOST_PLAYED
+            )
+
+        Since the offset of each page is known up front, up to ``concurrency``
+        pages of ``page_size`` items are requested at once. Stops after the
+        first page with fewer than ``page_size`` items, or after ``max_items``
+        items if passed. Items which appear on more than one page (because the
+        list changed while it was being fetched) are only returned once, and
+        items are returned in order.
+
+        Supports :meth:`user_scores`, :meth:`user_beatmaps`,
+        :meth:`user_recent_activity`, and :meth:`user_kudosu`.
+        """
+        check_offset_paginated(endpoint)
+        offset = kwargs.pop("offset", None) or 0
+        items = {}
+
+        def fetch(offset):
+            return endpoint(*args, limit=page_size, offset=offset, **kwargs)
+
+        more = True
+        while more and (max_items is None or len(items) < max_items):
+            count = concurrency
+            if max_items is not None:
+                # don't request pages we won't use
+                needed = -(-(max_items - len(items)) // page_size)
+                count = min(count, needed)
+            offsets = [offset + i * page_size for i in range(count)]
+            offset += count * page_size
+
+            pages = await self._gather(fetch, offsets, concurrency=concurrency)
+            more = offset_page_items(pages, page_size, items)
+        return list(items.values())[:max_items]
+
+    def _reauthenticate(self):
+        # don't automatically re-authenticate if the user passed an access
+        # token. They should handle re-authentication with the user
+        # manually (since they may have a bespoke system, like a website).
+        if self.access_token_passed:
+            self.log.info(
+                "refresh token is invalid. raising for consumer "
+                "to handle since access token was passed originally."
+            )
+            raise ReauthenticationRequired()
+
+        self.log.info(
+            f"refresh token invalid, re-authenticating (grant: {self.grant})"
+        )
+        # don't use .authenticate, that falls back to cached tokens. go
+        # straight to authenticating from scratch.
+        self.session = self._new_grant()
+
+    async def _send(self, method, url, *, params=None, data=None, headers=None):
+        """
+        Makes a request to ``url``, retrying it according to our retry policy.
+        """
+        policy = self.retry_policies.policy(current_endpoint.get())
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            r = await self._send_attempt(
+                method, url, params=params, data=data, headers=headers
+            )
+            if self.ratelimit.update(r.headers):
+                self.rate_limiter.observe(self.ratelimit)
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            elapsed = time.monotonic() - start
+            delay = policy.next_delay(method, r.status, attempt, elapsed, retry_after)
+            if delay is None:
+                return r
+            self.log.info(
+                f"{method} request to {url} returned {r.status}, retrying in "
+                f"{delay:.2f} seconds"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send_attempt(self, method, url, *, params=None, data=None, headers=None):
+        """
+        Makes a single request to ``url``, hedging it if our hedge policy says
+        to.
+        """
+        endpoint = current_endpoint.get()
+        policy = self.hedge_policy
+        if policy is None or not policy.should_hedge(method, endpoint):
+            return await self._send_once(
+                method, url, params=params, data=data, headers=headers
+            )
+
+        async def send(started=None):
+            start = time.monotonic()
+            r = await self._send_once(
                 method,
-                f"{self.base_url}{url}",
-                session=aiohttp_session,
+                url,
                 params=params,
                 data=data,
+                headers=headers,
+                acquired=True,
+                started=started,
             )
+            policy.record(endpoint, time.monotonic() - start)
+            return r
 
-        async def reauthenticate_and_retry():
-            # don't automatically re-authenticate if the user passed an access
-            # token. They should handle re-authentication with the user
-            # manually (since they may have a bespoke system, like a website).
-            if self.access_token_passed:
-                self.log.info(
-                    "refresh token is invalid. raising for consumer "
-                    "to handle since access token was passed originally."
+        async def hedge():
+            delay = policy.delay(endpoint)
+            if delay is None:
+                return await send()
+
+            started = asyncio.Event()
+            primary = asyncio.ensure_future(send(started))
+            tasks = {primary}
+            try:
+                # the primary may wait to authenticate or for the concurrency
+                # limiter before it's sent. Time the delay from when it's
+                # actually sent, so that waiting doesn't make us hedge early.
+                waiter = asyncio.ensure_future(started.wait())
+                try:
+                    await asyncio.wait(
+                        {primary, waiter}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    waiter.cancel()
+
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if done or not await self.rate_limiter.try_acquire_async():
+                    return await next(iter(tasks))
+
+                self.log.debug(f"hedging {method} request to {url}")
+                tasks.add(asyncio.ensure_future(send()))
+                pending = tasks
+                while True:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    succeeded = [task for task in done if task.exception() is None]
+                    if succeeded:
+                        return succeeded[0].result()
+                    if not pending:
+                        return next(iter(done)).result()
+            finally:
+                # cancel the losing request, if any.
+                for task in tasks:
+                    task.cancel()
+
+        # wait on the scheduler and rate limiter up front so that waiting
+        # doesn't count towards the request's latency.
+        await self.scheduler.acquire(self.rate_limiter)
+        try:
+            return await hedge()
+        finally:
+            self.scheduler.release()
+
+    async def _send_once(
+        self,
+        method,
+        url,
+        *,
+        params=None,
+        data=None,
+        headers=None,
+        acquired=False,
+        started=None,
+    ):
+        """
+        Makes a single request to ``url``, handling expired and invalid tokens.
+        If passed, the ``started`` event is set once the request is sent.
+
+        The body of the returned response has already been read, so it remains
+        usable after the aiohttp session it was made with is closed.
+        """
+        # authenticating and syncing our token are sync, and may make a request
+        # or touch the token store. Don't block the event loop while they do.
+        if self.session is None:
+            await asyncio.to_thread(self._ensure_authenticated)
+        if not self.access_token_passed and token_expired(self.session.token):
+            await asyncio.to_thread(self._sync_token)
+
+        async with self._client_session() as aiohttp_session:
+
+            async def send():
+                if started is not None:
+                    started.set()
+                return await self.session.request_async(
+                    method,
+                    url,
+                    session=aiohttp_session,
+                    params=params,
+                    data=data,
+                    headers=headers,
                 )
-                raise ReauthenticationRequired()
 
-            self.log.info(
-                f"refresh token invalid, re-authenticating (grant: {self.grant})"
+            async def send_limited():
+                limiter = self.concurrency_limiter
+                if limiter is None:
+                    return await send()
+
+                from aiohttp import ClientError
+
+                await limiter.acquire()
+                sent_at = time.monotonic()
+                status = None
+                error = False
+                try:
+                    r = await send()
+                    status = r.status
+                    return r
+                except (ClientError, asyncio.TimeoutError):
+                    error = True
+                    raise
+                finally:
+                    limiter.release(sent_at, status=status, error=error)
+
+            async def make_request():
+                nonlocal acquired
+                if acquired:
+                    # our caller already waited on the scheduler for us
+                    acquired = False
+                    return await send_limited()
+
+                await self.scheduler.acquire(self.rate_limiter)
+                try:
+                    return await send_limited()
+                finally:
+                    self.scheduler.release()
+
+            try:
+                r = await make_request()
+            except TokenExpiredError:
+                # provide "auto refreshing" for client credentials grant. The
+                # client grant doesn't actually provide a refresh token, so we
+                # can't hook onto OAuth2Session's auto_refresh functionality
+                # like we do for the authorization code grant. But we can do
+                # something effectively equivalent: whenever we make a request
+                # with an expired client grant token, just request a new one.
+                if self.grant is not Grant.CLIENT_CREDENTIALS:
+                    raise
+                self.session = await asyncio.to_thread(
+                    self._new_client_grant, self.client_id, self.client_secret
+                )
+                # redo the request now that we have a valid token
+                r = await make_request()
+            except OAuth2Error as e:
+                if e.description != "The refresh token is invalid.":
+                    raise
+
+                await asyncio.to_thread(self._reauthenticate)
+                # redo the request now that we have a valid session
+                r = await make_request()
+
+            # aiohttp sessions have to live as long as any responses returned
+            # via the session. Read the body now so we can close the session.
+            await r.read()
+            return r
+
+    async def _send_coalesced(
+        self, method, url, *, params=None, data=None, headers=None
+    ):
+        """
+        Makes a request to ``url``, sharing the response with any identical GET
+        requests made at the same time.
+        """
+        if self.single_flight is None or method != "GET":
+            return await self._send(
+                method, url, params=params, data=data, headers=headers
             )
-            # don't use .authenticate, that falls back to cached tokens. go
-            # straight to authenticating from scratch.
-            self.session = self._new_grant()
-            # redo the request now that we have a valid session
-            return await make_request()
 
+        key = request_key(method, url, params, self.api_version, headers=headers)
+        return await self.single_flight.do(
+            key,
+            lambda: self._send(
+                method, url, params=params, data=data, headers=headers
+            ),
+        )
+
+    async def _gather(self, function, items, *, concurrency):
+        """
+        Awaits ``function(item)`` for each of ``items``, up to ``concurrency``
+        at once. Returns the result of each call (or the exception it raised),
+        in order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(item):
+            async with semaphore:
+                try:
+                    return await function(item)
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*[call(item) for item in items])
+
+    async def _follow_foreign_key(self, model, kind, attribute, existing):
+        """
+        Follows a foreign key of ``model`` (see ``Model._follow``), along with
+        the same foreign key of every model of the same type in its group, if
+        that's cheap.
+        """
+        id_ = getattr(model, attribute)
+        followed, target = model._followed(kind, id_)
+        if followed:
+            return target
+
+        group = model._ossapi_group
+        unfollowed = []
+        if group is not None and self._batches_foreign_keys(kind):
+            models = group.siblings(model)
+            unfollowed = unfollowed_foreign_keys(models, kind, attribute, existing)
+        if len({id_ for _model, id_ in unfollowed}) > 1:
+            targets = await self._follow_foreign_keys(unfollowed, kind)
+            followed, target = model._followed(kind, id_)
+            if followed:
+                return target
+            if isinstance(targets.get(id_), BaseException):
+                raise targets[id_]
+
+        # look it up on its own, which raises if it doesn't exist.
+        target = await self._foreign_key_lookup(kind)(id_)
+        model._set_followed(kind, id_, target)
+        return target
+
+    def _batches_foreign_keys(self, kind):
+        # whether to follow foreign keys to ``kind`` for a model's whole group
+        # at once. Without a batch endpoint, that would usually cost far more
+        # requests than it saves, unless we're prefetching.
+        if current_prefetch.get() is not None:
+            return True
+        return kind == "beatmap" or (kind == "user" and self._compact_users())
+
+    def _compact_users(self):
+        prefetch = current_prefetch.get()
+        if prefetch is None:
+            return self.compact_foreign_users
+        return prefetch.compact_users
+
+    async def _follow_foreign_keys(self, unfollowed, kind):
+        # follows each ``(model, id)`` foreign key in ``unfollowed``. Returns a
+        # dict of id to the model it references (or the exception looking it
+        # up raised).
+        ids = bulk_keys(id_ for _model, id_ in unfollowed)
+        targets = await self._load_foreign_keys(kind, ids)
+        for model, id_ in unfollowed:
+            target = targets.get(id_)
+            # foreign keys we couldn't follow are left to be looked up on their
+            # own, so they raise like they always have.
+            if target is not None and not isinstance(target, BaseException):
+                model._set_followed(kind, id_, target)
+        return targets
+
+    async def _load_foreign_keys(self, kind, ids):
+        if kind == "user" and self._compact_users():
+            return await self.users_bulk(ids)
+        if kind == "beatmap":
+            return await self.beatmaps_bulk(ids)
+
+        # no batch endpoint. Look them up concurrently instead.
+        function = self._foreign_key_lookup(kind)
+        return dict(zip(ids, await self._gather(function, ids, concurrency=4)))
+
+    def _foreign_key_lookup(self, kind):
+        return {
+            "user": self.user,
+            "beatmap": self.beatmap,
+            "beatmapset": self.beatmapset,
+        }[kind]
+
+    async def _bulk(self, function, keys, *, concurrency, usernames=False):
+        """
+        Looks up ``keys`` with the batch endpoint ``function``, in chunks of at
+        most ``BULK_CHUNK_SIZE`` keys, making up to ``concurrency`` requests at
+        once.
+        """
+        chunks = chunked(keys)
+        results = await self._gather(function, chunks, concurrency=concurrency)
+        return bulk_results(chunks, results, usernames=usernames)
+
+    async def _request(self, type_, method, url, params={}, data={}):
+        # I don't *think* type hints should change over the lifetime of a
+        # program, but clear them every request out of an abundance of caution.
+        # This costs us almost nothing and may avoid bugs when eg a consumer
+        # changes type hints of a custom model dynamically at some point.
+        # They should certainly not be doing so in the middle of a request,
+        # however.
+        self._clear_type_hints_cache()
+        json_ = await self._request_json(method, url, params=params, data=data)
+        # models from the same response follow their foreign keys together.
+        group = ModelGroup()
+        token = current_model_group.set(group)
         try:
-            r = await make_request()
-        except TokenExpiredError:
-            # provide "auto refreshing" for client credentials grant. The client
-            # grant doesn't actually provide a refresh token, so we can't hook
-            # onto OAuth2Session's auto_refresh functionality like we do for the
-            # authorization code grant. But we can do something effectively
-            # equivalent: whenever we make a request with an expired client
-            # grant token, just request a new one.
-            if self.grant is not Grant.CLIENT_CREDENTIALS:
-                raise
-            self.session = self._new_client_grant(self.client_id, self.client_secret)
-            # redo the request now that we have a valid token
-            r = await make_request()
-        except OAuth2Error as e:
-            if e.description != "The refresh token is invalid.":
-                raise
+            value = self._instantiate_type(type_, json_)
+        finally:
+            current_model_group.reset(token)
+
+        checksums = beatmap_checksums(group.models)
+        if checksums:
+            self.checksum_index.set_many(checksums)
+        return value
 
-            r = await reauthenticate_and_retry()
+    async def _request_json(self, method, url, params={}, data={}):
+        """
+        Makes a request to the api, and returns its (error checked) json
+        response.
+        """
+        params = self._format_params(params)
+        # also format data for post requests
+        data = self._format_params(data)
+
+        _last_response_fresh.set(True)
+        cache = self.response_cache
+        if cache is None:
+            return await self._fetch_json(method, url, params, data)
+
+        endpoint = current_endpoint.get()
+        ttl = cache.ttl(method, endpoint)
+        max_stale = cache.max_staleness(method, endpoint)
+        not_found_ttl = cache.not_found_ttl if method == "GET" else 0
+        if ttl <= 0 and max_stale <= 0 and not_found_ttl <= 0:
+            return await self._fetch_json(method, url, params, data)
+
+        # responses to an authorization code grant may depend on who the
+        # user is, so don't share them between grants.
+        key = (
+            request_key(method, url, params, self.api_version, data=data),
+            self.token_key,
+        )
+        entry = await cache.lookup_async(key, max_stale=max_stale)
+        if entry is not None and entry.fresh:
+            return self._cached_json(entry, url)
+        if entry is not None and entry.staleness <= max_stale:
+            self._refresh_in_background(method, url, params, data, key, ttl, entry)
+            _last_response_fresh.set(False)
+            return self._cached_json(entry, url)
+
+        if ttl <= 0 and max_stale <= 0:
+            # we're only caching "not found" responses for this endpoint
+            ttl = None
+            entry = None
+        return await self._fetch_json(
+            method, url, params, data, key, ttl, entry, not_found_ttl=not_found_ttl
+        )
+
+    def _cached_json(self, entry, url):
+        json_ = json.loads(entry.content)
+        # cached "not found" responses raise, just like the original response
+        self._check_response(json_, f"{self.base_url}{url}")
+        return json_
+
+    async def _fetch_json(
+        self,
+        method,
+        url,
+        params,
+        data,
+        key=None,
+        ttl=None,
+        entry=None,
+        *,
+        not_found_ttl=0,
+    ):
+        """
+        Sends a request to the api, and returns its (error checked) json
+        response.
+
+        If ``key`` is passed, caches the response under it for ``ttl`` seconds
+        (unless ``ttl`` is ``None``), revalidating the stale cached response
+        ``entry`` if passed. A "not found" response is cached for
+        ``not_found_ttl`` seconds instead.
+        """
+        cache = self.response_cache
+        # ask the api whether a stale response we have is still current,
+        # which costs it (and us) much less than sending the full response.
+        headers = None
+        if entry is not None:
+            headers = entry.conditional_headers() or None
+        r = await self._send_coalesced(
+            method, f"{self.base_url}{url}", params=params, data=data, headers=headers
+        )
+        if entry is not None and r.status == 304:
+            await cache.revalidated_async(key, entry, ttl)
+            return json.loads(entry.content)
 
         # aiohttp annoyingly differentiates between url (no url fragments, for
         # some reason) and real_url (actual url). They also use a URL object
         # here instead of a string.
-        # XXX don't overwrite url passed in function, used in
-        # authenticate_and_retry
         url_ = str(r.real_url)
         self.log.info(f"made {method} request to {url_}, data {data}")
 
@@ -849,20 +1809,52 @@ class OssapiAsync:
         # expired yet (so it doesn't error earlier up in the chain with
         # Oauth2Error).
         if json_ == {"authentication": "basic"}:
-            r = await reauthenticate_and_retry()
+            await asyncio.to_thread(self._reauthenticate)
+            r = await self._send(
+                method, f"{self.base_url}{url}", params=params, data=data
+            )
             json_ = await r.json(encoding=None)
 
-        # aiohttp sessions have to live as long as any responses returned via
-        # the session. Wait to close it until we're done with the response `r`.
-        # Make sure we close this before we call _check_response, or any errors
-        # there will result in the session not being closed. We should probably
-        # move this to a try/finally block at some point for safety.
-        await aiohttp_session.close()
-
         self.log.debug(f"received json: \n{json.dumps(json_, indent=4)}")
-        self._check_response(json_, url_)
+        try:
+            self._check_response(json_, url_)
+        except ValueError:
+            if key is not None and not_found_ttl > 0 and r.status == 404:
+                await cache.set_async(key, await r.read(), not_found_ttl)
+            raise
+
+        if key is not None and ttl is not None:
+            await cache.set_async(
+                key,
+                await r.read(),
+                ttl,
+                etag=r.headers.get("ETag"),
+                last_modified=r.headers.get("Last-Modified"),
+            )
+        return json_
+
+    def _refresh_in_background(self, method, url, params, data, key, ttl, entry):
+        # serving a stale response. Fetch a fresh one for next time, unless
+        # we're already doing so.
+        if not self.response_cache.start_refresh(key):
+            return
+
+        async def refresh():
+            try:
+                with request_priority(Priority.BACKGROUND):
+                    await self._fetch_json(method, url, params, data, key, ttl, entry)
+            except Exception:
+                self.log.warning(
+                    f"failed to refresh a stale response to {url}", exc_info=True
+                )
+            finally:
+                self.response_cache.finish_refresh(key)
 
-        return self._instantiate_type(type_, json_)
+        # keep a reference to the task so it isn't garbage collected before it
+        # finishes.
+        task = asyncio.ensure_future(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
 
     def _check_response(self, json_, url):
         # TODO this should just be `if "error" in json`, but for some reason
@@ -1219,6 +2211,9 @@ class OssapiAsync:
         except TypeError as e:
             raise TypeError(f"type error while instantiating class {type_}: {e}") from e
 
+        group = current_model_group.get()
+        if group is not None and isinstance(val, Model):
+            group.add(val)
         return val
 
     def _get_type_hints(self, obj):
@@ -1461,6 +2456,19 @@ class OssapiAsync:
             raise ValueError(
                 "at least one of beatmap_id, checksum, or filename must be passed"
             )
+        if checksum and not (beatmap_id or filename):
+            # we may already know which beatmap has this checksum
+            known = self.checksum_index.get_many([checksum]).get(checksum)
+            if known is not None:
+                beatmap = await self.beatmap(known[0])
+                if beatmap.checksum == checksum:
+                    return beatmap
+                # the beatmap has been updated since we indexed this checksum.
+                # The api doesn't look up outdated versions of beatmaps, so ask
+                # it about the checksum like we would have without the index.
+                self.checksum_index.remove_many([checksum])
+        if self._beatmap_batcher is not None and not (checksum or filename):
+            return await self._beatmap_batcher.load(beatmap_id)
         params = {"checksum": checksum, "filename": filename, "id": beatmap_id}
         return await self._get(Beatmap, "/beatmaps/lookup", params)
 
@@ -1485,6 +2493,91 @@ class OssapiAsync:
         beatmaps = await self._get(Beatmaps, "/beatmaps", params)
         return beatmaps.beatmaps
 
+    @request(Scope.PUBLIC, category="beatmaps")
+    async def beatmaps_bulk(
+        self, beatmap_ids: Iterable[BeatmapIdT], *, concurrency: int = 4
+    ) -> dict[int, Optional[Beatmap]]:
+        """
+        Get any number of beatmaps by id, using :meth:`beatmaps` in chunks of
+        as many ids as the api accepts at once.
+
+        Returns a dict of beatmap id to beatmap, in the order the ids were
+        passed. Ids the api didn't return a beatmap for map to ``None``.
+
+        If some chunks fail, the rest are still fetched, and a
+        :class:`~ossapi.bulk.BulkLookupError` holding their results is raised
+        at the end.
+
+        Parameters
+        ----------
+        beatmap_ids
+            The beatmaps to get. Any iterable of ids or beatmaps.
+        concurrency
+            How many requests to make at once.
+        """
+        keys = bulk_keys(beatmap_ids, ids=True)
+        return await self._bulk(self.beatmaps, keys, concurrency=concurrency)
+
+    @request(Scope.PUBLIC, category="beatmaps")
+    async def resolve_checksums(
+        self, checksums: Iterable[str], *, concurrency: int = 4
+    ) -> dict[str, Optional[int]]:
+        """
+        Get the ids of the beatmaps with any number of checksums.
+
+        Checksums already in :attr:`checksum_index` are resolved without a
+        request. The rest are looked up with :meth:`beatmap`, up to
+        ``concurrency`` at once, and added to the index.
+
+        Returns a dict of checksum to beatmap id, in the order the checksums
+        were passed. Checksums of beatmaps the api doesn't know about (like
+        unsubmitted beatmaps) map to ``None``.
+
+        If some lookups fail for other reasons, the rest are still made, and a
+        :class:`~ossapi.bulk.BulkLookupError` holding their results is raised
+        at the end.
+
+        Parameters
+        ----------
+        checksums
+            The checksums to resolve.
+        concurrency
+            How many requests to make at once.
+        """
+        checksums = bulk_keys(checksums)
+        known = self.checksum_index.get_many(checksums)
+        unknown = [checksum for checksum in checksums if checksum not in known]
+
+        async def lookup(checksum):
+            return await self.beatmap(checksum=checksum)
+
+        beatmaps = await self._gather(lookup, unknown, concurrency=concurrency)
+        ids = {checksum: beatmap_id for checksum, (beatmap_id, _) in known.items()}
+        found = {}
+        errors = []
+        for checksum, beatmap in zip(unknown, beatmaps):
+            # the api responds to unknown checksums with an error
+            if isinstance(beatmap, ValueError):
+                ids[checksum] = None
+            elif isinstance(beatmap, BaseException):
+                errors.append(([checksum], beatmap))
+            else:
+                ids[checksum] = beatmap.id
+                # the beatmap may have been updated since, and so have a
+                # different checksum now.
+                found[checksum] = (beatmap.id, beatmap.beatmapset_id)
+        if found:
+            self.checksum_index.set_many(found)
+
+        results = {checksum: ids[checksum] for checksum in checksums if checksum in ids}
+        if errors:
+            raise BulkLookupError(results, errors)
+        return results
+
+    async def _load_beatmaps(self, beatmap_ids):
+        beatmaps = await self.beatmaps(beatmap_ids)
+        return {beatmap.id: beatmap for beatmap in beatmaps}
+
     @request(Scope.PUBLIC, category="beatmaps")
     async def beatmap_attributes(
         self,
@@ -1519,6 +2612,89 @@ class OssapiAsync:
             DifficultyAttributes, f"/beatmaps/{beatmap_id}/attributes", data=data
         )
 
+    @request(Scope.PUBLIC, category="beatmaps")
+    async def beatmap_attributes_bulk(
+        self, lookups: Iterable[tuple], *, concurrency: int = 4
+    ) -> list[Optional[DifficultyAttributes]]:
+        """
+        Get the difficulty attributes of many beatmaps at once.
+
+        Returns the attributes of each lookup, in the order they were passed.
+        Lookups of beatmaps which don't exist are ``None``.
+
+        Mods are reduced to the mods which affect difficulty (see
+        :meth:`~ossapi.mod.ModCombination.difficulty_mods`), so eg ``HDDT`` and
+        ``DT`` are the same lookup. Identical lookups are only made once.
+
+        Attributes are cached in ``attributes_cache``, keyed by beatmap
+        checksum. Only lookups which aren't already cached are requested, up
+        to ``concurrency`` at once. Beatmaps passed by id are looked up first
+        with :meth:`beatmaps_bulk`, for their checksum.
+
+        If some lookups fail, the rest are still made, and a
+        :class:`~ossapi.bulk.BulkLookupError` is raised at the end. Its
+        ``results`` holds the list of attributes, with ``None`` for failed
+        lookups.
+
+        Parameters
+        ----------
+        lookups
+            ``(beatmap, mods, ruleset)`` tuples, where ``beatmap`` is a beatmap
+            id or beatmap, and ``mods`` and ``ruleset`` are as in
+            :meth:`beatmap_attributes`. ``mods`` and ``ruleset`` may be
+            ``None`` (or left out) for no mods and the beatmap's own ruleset.
+        concurrency
+            How many requests to make at once.
+        """
+        lookups = [(*lookup, None, None)[:3] for lookup in lookups]
+        ids = bulk_keys(
+            (lookup[0] for lookup in lookups if isinstance(lookup[0], (int, str))),
+            ids=True,
+        )
+        beatmaps = await self.beatmaps_bulk(ids, concurrency=concurrency) if ids else {}
+        keys, requests, uncacheable = attributes_requests(lookups, beatmaps)
+
+        values = self.attributes_cache.get_many(
+            [key for key in requests if key not in uncacheable]
+        )
+        misses = [key for key in requests if key not in values]
+
+        async def fetch(key):
+            beatmap_id, mods, ruleset_id = requests[key]
+            data = {"mods": mods, "ruleset_id": ruleset_id}
+            url = f"/beatmaps/{beatmap_id}/attributes"
+            return json.dumps(await self._request_json("POST", url, data=data))
+
+        fetched = await self._gather(fetch, misses, concurrency=concurrency)
+        errors = {}
+        for key, value in zip(misses, fetched):
+            if isinstance(value, Exception):
+                errors[key] = value
+            else:
+                values[key] = value
+        self.attributes_cache.set_many(
+            {
+                key: values[key]
+                for key in misses
+                if key not in errors and key not in uncacheable
+            }
+        )
+
+        self._clear_type_hints_cache()
+        results = [
+            None
+            if key not in values
+            else self._instantiate_type(DifficultyAttributes, json.loads(values[key]))
+            for key in keys
+        ]
+        if errors:
+            failed = [
+                ([lookup for lookup, k in zip(lookups, keys) if k == key], error)
+                for key, error in errors.items()
+            ]
+            raise BulkLookupError(results, failed)
+        return results
+
     # /beatmapsets
     # ------------
 
@@ -1633,6 +2809,7 @@ class OssapiAsync:
         beatmapset_id: Optional[BeatmapsetIdT] = None,
         beatmap_id: Optional[BeatmapIdT] = None,
         beatmapset_status: Optional[BeatmapsetStatusT] = None,
+        cursor_string: Optional[str] = None,
         limit: Optional[int] = None,
         message_types: Optional[list[MessageTypeT]] = None,
         only_unresolved: Optional[bool] = None,
@@ -1652,6 +2829,8 @@ class OssapiAsync:
             Filter by a beatmap.
         beatmapset_status
             Filter by a category of beatmapsets.
+        cursor_string
+            Cursor for pagination.
         limit
             Maximum number of discussions to return.
         message_types
@@ -1678,6 +2857,7 @@ class OssapiAsync:
             "beatmapset_id": beatmapset_id,
             "beatmap_id": beatmap_id,
             "beatmapset_status": beatmapset_status,
+            "cursor_string": cursor_string,
             "limit": limit,
             "message_types": message_types,
             "only_unresolved": only_unresolved,
@@ -2508,8 +3688,11 @@ class OssapiAsync:
         Implements the `Revoke Current Token
         <https://osu.ppy.sh/docs/index.html#revoke-current-token>`__ endpoint.
         """
-        self.session.delete(f"{self.base_url}/oauth/tokens/current")
-        self.remove_token(self.token_key, self.token_directory)
+        await asyncio.to_thread(self._ensure_authenticated)
+        await asyncio.to_thread(
+            self.session.delete, f"{self.base_url}/oauth/tokens/current"
+        )
+        await asyncio.to_thread(self.token_store.remove, self.token_key)
 
     # /rankings
     # ---------
@@ -2763,11 +3946,37 @@ class OssapiAsync:
         """
         return await self._get(Score, f"/scores/{mode.value}/{score_id}")
 
-    async def _download_score(self, *, url, raw):
-        from aiohttp import ClientSession, ContentTypeError
+    async def _download_score(self, *, url, raw, key):
+        content = None
+        if self.replay_store is not None:
+            content = await asyncio.to_thread(self.replay_store.get, key)
+        if content is None:
+            content = await self._download_replay(url)
+            if self.replay_store is not None and self._is_replay(content):
+                await asyncio.to_thread(self.replay_store.put, key, content)
 
-        aiohttp_session = ClientSession()
-        r = await self.session.request_async("GET", url, session=aiohttp_session)
+        if raw:
+            return content
+
+        replay = osrparse.Replay.from_string(content)
+        return Replay(replay, self)
+
+    @staticmethod
+    def _is_replay(content):
+        # replays never expire from the store, so make sure we don't keep
+        # something that isn't one (an error page, say) around forever.
+        try:
+            replay_hashes(content)
+        except ValueError:
+            return False
+        return True
+
+    async def _download_replay(self, url):
+        from aiohttp import ContentTypeError
+
+        # identical downloads already in flight are coalesced by
+        # _send_coalesced.
+        r = await self._send_coalesced("GET", url)
 
         # if the response above succeeded, it will return a raw string
         # instead of json. If it didn't succeed, it will return json with an
@@ -2778,19 +3987,11 @@ class OssapiAsync:
         # Should be x-osu-replay for valid response.
         try:
             json_ = await r.json()
-            await aiohttp_session.close()
             self._check_response(json_, url)
         except ContentTypeError:
             pass
 
-        content = await r.read()
-        await aiohttp_session.close()
-
-        if raw:
-            return content
-
-        replay = osrparse.Replay.from_string(content)
-        return Replay(replay, self)
+        return await r.read()
 
     @request(Scope.PUBLIC, category="scores")
     async def download_score(self, score_id: int, *, raw: bool = False) -> Replay:
@@ -2815,7 +4016,7 @@ class OssapiAsync:
         endpoint.
         """
         url = f"{self.base_url}/scores/{score_id}/download"
-        return await self._download_score(url=url, raw=raw)
+        return await self._download_score(url=url, raw=raw, key=str(score_id))
 
     @request(Scope.PUBLIC, category="scores")
     async def download_score_mode(
@@ -2844,7 +4045,8 @@ class OssapiAsync:
         endpoint.
         """
         url = f"{self.base_url}/scores/{mode.value}/{score_id}/download"
-        return await self._download_score(url=url, raw=raw)
+        key = f"{mode.value}/{score_id}"
+        return await self._download_score(url=url, raw=raw, key=key)
 
     # seasonal backgrounds
     # --------------------
@@ -3059,6 +4261,9 @@ class OssapiAsync:
         """
         Searches for the beatmaps a user has passed, by beatmapset.
 
+        The api only accepts 50 beatmapsets per request, so more than 50
+        ``beatmapset_ids`` are split into several requests, made concurrently.
+
         Parameters
         ----------
         user_id
@@ -3081,18 +4286,24 @@ class OssapiAsync:
         endpoint.
         """
 
-        params = {
-            "beatmapset_ids": beatmapset_ids,
-            "exclude_converts": (
-                None if exclude_converts is None else int(exclude_converts)
-            ),
-            "is_legacy": None if is_legacy is None else int(is_legacy),
-            "no_diff_reduction": int(no_diff_reduction),
-            "ruleset_id": ruleset_id,
-        }
-        return (
-            await self._get(BeatmapsPassed, f"/users/{user_id}/beatmaps-passed", params)
-        ).beatmaps_passed
+        async def search(beatmapset_ids):
+            params = {
+                "beatmapset_ids": beatmapset_ids,
+                "exclude_converts": (
+                    None if exclude_converts is None else int(exclude_converts)
+                ),
+                "is_legacy": None if is_legacy is None else int(is_legacy),
+                "no_diff_reduction": int(no_diff_reduction),
+                "ruleset_id": ruleset_id,
+            }
+            passed = await self._get(
+                BeatmapsPassed, f"/users/{user_id}/beatmaps-passed", params
+            )
+            return passed.beatmaps_passed
+
+        chunks = chunked(list(beatmapset_ids))
+        results = await self._gather(search, chunks, concurrency=4)
+        return merge_pages(results)
 
     @request(Scope.PUBLIC, category="users")
     async def user(
@@ -3177,6 +4388,101 @@ class OssapiAsync:
         users = await self._get(Users, "/users", params)
         return users.users
 
+    @request(Scope.PUBLIC, category="users")
+    async def load_user(self, user_id: UserIdT) -> UserCompact:
+        """
+        Get a single user by id, using :meth:`users`. If ``batch_window`` was
+        passed, lookups made within ``batch_window`` seconds of each other are
+        made as a single :meth:`users` request.
+
+        Note that this returns a :class:`~ossapi.models.UserCompact`, like
+        :meth:`users` does, and not the :class:`~ossapi.models.User` returned
+        by :meth:`user`.
+
+        Parameters
+        ----------
+        user_id
+            The user to get.
+        """
+        if self._user_batcher is not None:
+            return await self._user_batcher.load(user_id)
+        users = await self.users([user_id])
+        if not users:
+            raise ValueError(f"no result was returned for {user_id!r}")
+        return users[0]
+
+    @request(Scope.PUBLIC, category="users")
+    async def users_bulk(
+        self, user_ids: Iterable[UserIdT], *, concurrency: int = 4
+    ) -> dict[int, Optional[UserCompact]]:
+        """
+        Get any number of users by id, using :meth:`users` in chunks of as many
+        ids as the api accepts at once.
+
+        Returns a dict of user id to user, in the order the ids were passed.
+        Ids the api didn't return a user for map to ``None``.
+
+        If some chunks fail, the rest are still fetched, and a
+        :class:`~ossapi.bulk.BulkLookupError` holding their results is raised
+        at the end.
+
+        Parameters
+        ----------
+        user_ids
+            The users to get. Any iterable of ids or users.
+        concurrency
+            How many requests to make at once.
+        """
+        keys = bulk_keys(user_ids, ids=True)
+        return await self._bulk(self.users, keys, concurrency=concurrency)
+
+    @request(Scope.PUBLIC, category="users")
+    async def users_lookup_bulk(
+        self,
+        users: Iterable[Union[UserIdT, str]],
+        *,
+        exclude_bots: Optional[bool] = None,
+        ruleset_id: Optional[int] = None,
+        concurrency: int = 4,
+    ) -> dict[Union[int, str], Optional[UserCompact]]:
+        """
+        Get any number of users by id or username, using :meth:`users_lookup`
+        in chunks of as many users as the api accepts at once.
+
+        Returns a dict of each passed id or username to its user, in the order
+        they were passed. Ids or usernames the api didn't return a user for map
+        to ``None``.
+
+        If some chunks fail, the rest are still fetched, and a
+        :class:`~ossapi.bulk.BulkLookupError` holding their results is raised
+        at the end.
+
+        Parameters
+        ----------
+        users
+            The user ids or usernames to get. Any iterable of ids, usernames,
+            or users.
+        exclude_bots
+            Whether to exclude bots from the returned users. Excluded bots map
+            to ``None``.
+        ruleset_id
+            The id of the ruleset used to populate the `global_rank` field.
+        concurrency
+            How many requests to make at once.
+        """
+        keys = bulk_keys(users)
+
+        async def lookup(chunk):
+            return await self.users_lookup(
+                chunk, exclude_bots=exclude_bots, ruleset_id=ruleset_id
+            )
+
+        return await self._bulk(lookup, keys, concurrency=concurrency, usernames=True)
+
+    async def _load_users(self, user_ids):
+        users = await self.users(user_ids)
+        return {user.id: user for user in users}
+
     # /wiki
     # -----
 
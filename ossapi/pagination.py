@@ -0,0 +1,116 @@
+import inspect
+
+from ossapi.models import (
+    BeatmapPacks,
+    BeatmapsetDiscussions,
+    BeatmapsetSearchResult,
+    CommentBundle,
+    Events,
+    ForumTopicAndPosts,
+    MultiplayerScores,
+    NewsListing,
+    Rankings,
+    Scores,
+)
+
+#: The attribute holding the items of each page, by the type of page.
+PAGE_ITEMS = {
+    BeatmapPacks: "beatmap_packs",
+    BeatmapsetDiscussions: "discussions",
+    BeatmapsetSearchResult: "beatmapsets",
+    CommentBundle: "comments",
+    Events: "events",
+    ForumTopicAndPosts: "posts",
+    MultiplayerScores: "scores",
+    NewsListing: "news_posts",
+    Rankings: "ranking",
+    Scores: "scores",
+}
+
+
+def page_items(page):
+    """
+    Returns the items on ``page``, a response from a paginated endpoint.
+    """
+    for type_, attribute in PAGE_ITEMS.items():
+        if isinstance(page, type_):
+            return getattr(page, attribute) or []
+    raise ValueError(f"can't paginate a response of type {type(page).__name__}")
+
+
+def cursor_parameter(endpoint):
+    """
+    Returns the name of the parameter ``endpoint`` takes its cursor in, which
+    is also the attribute its responses hold the cursor to the next page in.
+    """
+    parameters = inspect.signature(endpoint).parameters
+    # the api is moving from cursor to cursor_string, so prefer it for
+    # endpoints which accept both.
+    for name in ["cursor_string", "cursor"]:
+        if name in parameters:
+            return name
+    raise ValueError(f"{endpoint.__name__} is not a paginated endpoint")
+
+
+def next_page_kwargs(kwargs, parameter, page):
+    """
+    Returns the keyword arguments to request the page after ``page`` with, or
+    ``None`` if ``page`` is the last page.
+    """
+    cursor = getattr(page, parameter)
+    if cursor is None:
+        return None
+    return {**kwargs, parameter: cursor}
+
+
+def check_offset_paginated(endpoint):
+    """
+    Raises if ``endpoint`` doesn't paginate by ``limit`` and ``offset``.
+    """
+    parameters = inspect.signature(endpoint).parameters
+    if "limit" not in parameters or "offset" not in parameters:
+        raise ValueError(f"{endpoint.__name__} is not an offset paginated endpoint")
+
+
+def item_key(item):
+    """
+    Returns the key identifying ``item``, for deduplication.
+    """
+    # beatmap playcounts don't have an id of their own
+    for attribute in ["id", "beatmap_id"]:
+        key = getattr(item, attribute, None)
+        if key is not None:
+            return key
+    return id(item)
+
+
+def merge_pages(pages):
+    """
+    Returns the items of each of ``pages``, in order, with items which appear
+    on more than one page only included once. Raises the first exception in
+    ``pages``, if any.
+    """
+    items = {}
+    for page in pages:
+        if isinstance(page, Exception):
+            raise page
+        for item in page:
+            items.setdefault(item_key(item), item)
+    return list(items.values())
+
+
+def offset_page_items(pages, page_size, items):
+    """
+    Adds the items of each of ``pages`` (consecutive pages of ``page_size``
+    items each) to the dict ``items`` of key to item, skipping items already in
+    it. Returns whether there may be pages after ``pages``.
+    """
+    for page in pages:
+        if isinstance(page, Exception):
+            raise page
+        for item in page:
+            items.setdefault(item_key(item), item)
+        # a short page is the last page
+        if len(page) < page_size:
+            return False
+    return True
@@ -0,0 +1,689 @@
+import argparse
+import asyncio
+import os
+import select
+import socket
+import socketserver
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl is unix-only. See FileRateLimiter.
+    fcntl = None
+
+
+@dataclass
+class RateLimitStats:
+    """
+    Statistics about the requests a rate limiter has let through.
+    """
+
+    #: How many requests have been let through.
+    requests: int
+    #: How many of those requests had to wait before being let through.
+    delayed: int
+    #: The total time in seconds requests spent waiting.
+    total_wait: float
+    #: The longest time in seconds a single request spent waiting.
+    max_wait: float
+
+    @property
+    def mean_wait(self):
+        """
+        The average time in seconds a request spent waiting, including requests
+        which didn't wait at all.
+        """
+        if self.requests == 0:
+            return 0
+        return self.total_wait / self.requests
+
+
+class RateLimiter:
+    """
+    Decides when :class:`~ossapi.ossapiv2.Ossapi` may make its next request.
+
+    A rate limiter is shared by every thread (or task) using the client it was
+    passed to, and may be passed to several clients to share a single budget
+    between them.
+
+    To implement your own rate limiter, subclass this class and implement
+    :meth:`reserve`.
+    """
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._delayed = 0
+        self._total_wait = 0
+        self._max_wait = 0
+
+    def reserve(self):
+        """
+        Reserves a slot for a single request, and returns how long in seconds
+        the caller has to wait before making it.
+
+        Slots are handed out in the order they are reserved, so callers which
+        reserve first are let through first.
+        """
+        raise NotImplementedError()
+
+    async def reserve_async(self):
+        """
+        Async equivalent of :meth:`reserve`. Rate limiters which block while
+        reserving (for instance, to talk to another process) should override
+        this to not block the event loop.
+        """
+        return self.reserve()
+
+    def try_reserve(self):
+        """
+        Reserves a slot for a single request only if it may be made right away.
+        Returns whether a slot was reserved.
+
+        Rate limiters which can't reserve conditionally don't need to implement
+        this, and always return ``False``.
+        """
+        return False
+
+    async def try_reserve_async(self):
+        """
+        Async equivalent of :meth:`try_reserve`.
+        """
+        return self.try_reserve()
+
+    def acquire(self):
+        """
+        Blocks until a request may be made. Returns how long we waited.
+        """
+        wait = self.reserve()
+        self._record(wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """
+        Async equivalent of :meth:`acquire`.
+        """
+        wait = await self.reserve_async()
+        self._record(wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def try_acquire(self):
+        """
+        Lets a request through only if it may be made right away, without
+        waiting. Returns whether the request was let through.
+        """
+        if not self.try_reserve():
+            return False
+        self._record(0)
+        return True
+
+    async def try_acquire_async(self):
+        """
+        Async equivalent of :meth:`try_acquire`.
+        """
+        if not await self.try_reserve_async():
+            return False
+        self._record(0)
+        return True
+
+    def observe(self, state):
+        """
+        Called with the api's current :class:`RateLimitState` after every
+        response. Rate limiters may use it to adapt their pacing.
+        """
+
+    def _record(self, wait):
+        with self._stats_lock:
+            self._requests += 1
+            if wait > 0:
+                self._delayed += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+
+    def stats(self):
+        """
+        Returns a :class:`RateLimitStats` describing the requests this rate
+        limiter has let through so far.
+        """
+        with self._stats_lock:
+            return RateLimitStats(
+                requests=self._requests,
+                delayed=self._delayed,
+                total_wait=self._total_wait,
+                max_wait=self._max_wait,
+            )
+
+
+def gcra_reserve(tat, now, *, interval, burst):
+    """
+    A single step of the generic cell rate algorithm, which is equivalent to a
+    token bucket whose entire state is a single timestamp: the "theoretical
+    arrival time" (``tat``) at which the bucket will next be full.
+
+    Returns ``(wait, new_tat)``, where ``wait`` is how long the request being
+    reserved has to wait.
+    """
+    # a full bucket lets ``burst`` requests through back to back, so a request
+    # may go ahead of the theoretical arrival time by this much.
+    tolerance = interval * (burst - 1)
+    start = max(now, tat - tolerance)
+    new_tat = max(tat, start) + interval
+    return (start - now, new_tat)
+
+
+def gcra_reconcile(tat, now, *, interval, burst, remaining, reset_in=None):
+    """
+    Returns a theoretical arrival time for which at most ``remaining`` requests
+    may be made right away, and which is never earlier than ``tat``.
+
+    If ``remaining`` is 0 and we know when the api's budget resets, the next
+    request isn't allowed until then.
+    """
+    available = min(remaining, burst)
+    new_tat = now + interval * (burst - available)
+    if available == 0 and reset_in is not None:
+        new_tat = max(new_tat, now + reset_in + interval * (burst - 1))
+    return max(tat, new_tat)
+
+
+def _parse_header(headers, name, type_):
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return type_(value)
+    except ValueError:
+        return None
+
+
+class RateLimitState:
+    """
+    The api's rate limit state, as reported by the ``X-RateLimit-*`` headers of
+    its most recent response. Available as ``api.ratelimit``.
+
+    Every attribute is ``None`` until the api reports it. The api only reports
+    :attr:`reset` on responses which were rate limited.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        #: How many requests the api allows per minute.
+        self.limit = None
+        #: How many requests the api will allow before rate limiting us.
+        self.remaining = None
+        #: When the api's budget resets, as a unix timestamp.
+        self.reset = None
+        #: When we last received rate limit headers, as a unix timestamp.
+        self.updated_at = None
+
+    def update(self, headers):
+        """
+        Updates this state from the headers of an api response. Returns whether
+        the headers contained any rate limit information.
+        """
+        # the request these headers came with succeeded, so a header we can't
+        # parse shouldn't fail it. Ignore the header instead.
+        limit = _parse_header(headers, "X-RateLimit-Limit", int)
+        remaining = _parse_header(headers, "X-RateLimit-Remaining", int)
+        reset = _parse_header(headers, "X-RateLimit-Reset", float)
+        if limit is None and remaining is None:
+            return False
+
+        with self._lock:
+            if limit is not None:
+                self.limit = limit
+            if remaining is not None:
+                self.remaining = remaining
+            self.reset = reset
+            self.updated_at = time.time()
+        return True
+
+    @property
+    def reset_in(self):
+        """
+        How many seconds until the api's budget resets, if we know.
+        """
+        if self.reset is None:
+            return None
+        return max(0, self.reset - time.time())
+
+    def __repr__(self):
+        return (
+            f"RateLimitState(limit={self.limit}, remaining={self.remaining}, "
+            f"reset={self.reset})"
+        )
+
+
+class TokenBucket(RateLimiter):
+    """
+    A token bucket rate limiter, which allows ``rate`` requests every ``per``
+    seconds on average, and bursts of up to ``burst`` requests at once after
+    being idle.
+
+    The defaults match the osu! api's documented limit of 1200 requests per
+    minute, with a burst of 200.
+
+    Parameters
+    ----------
+    rate: float
+        How many requests to allow every ``per`` seconds.
+    per: float
+        The period in seconds over which ``rate`` requests are allowed.
+    burst: int
+        How many requests to allow at once after being idle.
+    adaptive: bool
+        Whether to adapt to the rate limit state reported by the api. If
+        ``True``, we slow down when the api reports less remaining budget than
+        we expected (for instance, because another program is using the same
+        client), wait for the api's budget to reset if it runs out, and never
+        exceed the per-minute limit the api reports.
+    """
+
+    def __init__(self, rate=1200, per=60, *, burst=200, adaptive=True):
+        super().__init__()
+        if rate <= 0 or per <= 0:
+            raise ValueError(f"rate and per must be positive, got {rate} and {per}")
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+        self.rate = rate
+        self.per = per
+        self.burst = burst
+        self.adaptive = adaptive
+        self._lock = threading.Lock()
+        self._tat = 0
+        # the time between requests when running at the limit reported by the
+        # api, if any.
+        self._api_interval = 0
+
+    @property
+    def interval(self):
+        """
+        The time in seconds between requests when running at ``rate`` (or at
+        the limit reported by the api, if lower).
+        """
+        return max(self.per / self.rate, self._api_interval)
+
+    def reserve(self):
+        with self._lock:
+            wait, self._tat = gcra_reserve(
+                self._tat, time.monotonic(), interval=self.interval, burst=self.burst
+            )
+            return wait
+
+    def try_reserve(self):
+        with self._lock:
+            wait, tat = gcra_reserve(
+                self._tat, time.monotonic(), interval=self.interval, burst=self.burst
+            )
+            if wait > 0:
+                return False
+            self._tat = tat
+            return True
+
+    def observe(self, state):
+        if not self.adaptive:
+            return
+        with self._lock:
+            if state.limit:
+                # the api's limit is per minute.
+                self._api_interval = 60 / state.limit
+            if state.remaining is not None:
+                self._tat = gcra_reconcile(
+                    self._tat,
+                    time.monotonic(),
+                    interval=self.interval,
+                    burst=self.burst,
+                    remaining=state.remaining,
+                    reset_in=state.reset_in,
+                )
+
+
+class FileRateLimiter(RateLimiter):
+    """
+    A token bucket rate limiter whose state lives in the file at ``path``, so
+    that every process on this host using the same file shares a single
+    budget.
+
+    Takes the same rate parameters as :class:`TokenBucket`. Every process
+    sharing a file should pass the same parameters.
+
+    On unix, the file is locked with ``fcntl`` while reserving. On other
+    platforms, this only shares a budget between threads in the same process.
+
+    Parameters
+    ----------
+    path: str or Path
+        The path to the state file. Created if it doesn't exist.
+    rate: float
+        How many requests to allow every ``per`` seconds.
+    per: float
+        The period in seconds over which ``rate`` requests are allowed.
+    burst: int
+        How many requests to allow at once after being idle.
+    adaptive: bool
+        Whether to adapt to the rate limit state reported by the api. See
+        :class:`TokenBucket`.
+    """
+
+    def __init__(self, path, rate=1200, per=60, *, burst=200, adaptive=True):
+        super().__init__()
+        self.path = Path(path)
+        self.rate = rate
+        self.per = per
+        self.burst = burst
+        self.adaptive = adaptive
+        self._api_interval = 0
+        # fcntl locks are held per open file, which every thread in this
+        # process shares. So we also need to lock between threads.
+        self._lock = threading.Lock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        # the theoretical arrival time we last read from or wrote to our file.
+        # The file's tat only ever moves forward, so it's at least this.
+        self._tat = 0
+
+    @property
+    def interval(self):
+        return max(self.per / self.rate, self._api_interval)
+
+    def _update(self, f):
+        """
+        Replaces the theoretical arrival time in our file with ``f(tat, now)``,
+        while holding the file lock.
+        """
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                data = os.read(self._fd, 8)
+                tat = struct.unpack("d", data)[0] if len(data) == 8 else 0
+                # time.monotonic isn't comparable between processes.
+                tat = f(tat, time.time())
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.write(self._fd, struct.pack("d", tat))
+                self._tat = tat
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def reserve(self):
+        wait = 0
+
+        def reserve(tat, now):
+            nonlocal wait
+            wait, tat = gcra_reserve(tat, now, interval=self.interval, burst=self.burst)
+            return tat
+
+        self._update(reserve)
+        return wait
+
+    def try_reserve(self):
+        reserved = False
+
+        def try_reserve(tat, now):
+            nonlocal reserved
+            wait, new_tat = gcra_reserve(
+                tat, now, interval=self.interval, burst=self.burst
+            )
+            if wait > 0:
+                return tat
+            reserved = True
+            return new_tat
+
+        self._update(try_reserve)
+        return reserved
+
+    async def try_reserve_async(self):
+        return await asyncio.to_thread(self.try_reserve)
+
+    def observe(self, state):
+        if not self.adaptive:
+            return
+        if state.limit:
+            self._api_interval = 60 / state.limit
+        if state.remaining is None:
+            return
+
+        def reconcile(tat, now):
+            return gcra_reconcile(
+                tat,
+                now,
+                interval=self.interval,
+                burst=self.burst,
+                remaining=state.remaining,
+                reset_in=state.reset_in,
+            )
+
+        # we observe every response, so avoid taking the file lock unless the
+        # api's state would actually hold us back further than the file
+        # already does.
+        if reconcile(0, time.time()) <= self._tat:
+            return
+        self._update(reconcile)
+
+    async def reserve_async(self):
+        return await asyncio.to_thread(self.reserve)
+
+    def close(self):
+        os.close(self._fd)
+
+
+def _closed_by_peer(sock):
+    # a connection closed by its peer is readable, with nothing to read.
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b""
+    except OSError:
+        return True
+
+
+class CoordinatedRateLimiter(RateLimiter):
+    """
+    A rate limiter which asks a :class:`RateLimitCoordinator` for permission
+    before each request, so that every process using the same coordinator
+    shares a single budget, across any number of hosts.
+
+    Parameters
+    ----------
+    host: str
+        The host the coordinator is running on.
+    port: int
+        The port the coordinator is listening on.
+    key: str
+        Which budget to draw from. Processes which use different osu! clients
+        (and so have separate budgets) can share a coordinator by passing
+        different keys.
+    timeout: float
+        How long in seconds to wait on the coordinator before raising.
+    """
+
+    def __init__(self, host="localhost", port=8737, *, key="default", timeout=10):
+        super().__init__()
+        if not key or any(c.isspace() for c in key):
+            raise ValueError(
+                f"key must be non-empty and not contain spaces, got {key!r}"
+            )
+        self.host = host
+        self.port = port
+        self.key = key
+        self.timeout = timeout
+        # one connection to the coordinator per thread, so threads don't
+        # interleave their requests on a single socket.
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and _closed_by_peer(conn[0]):
+            # the coordinator may have restarted since we last talked to it.
+            self._drop_connection()
+            conn = None
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), self.timeout)
+            conn = self._local.conn = (sock, sock.makefile("rb"))
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    def _send(self, message):
+        try:
+            sock, f = self._connection()
+            sock.sendall(message)
+            return f
+        except OSError:
+            self._drop_connection()
+            raise
+
+    def _ask(self, command):
+        message = f"{command} {self.key}\n".encode()
+        try:
+            f = self._send(message)
+        except OSError:
+            # the coordinator never saw a complete command (it ignores partial
+            # ones), so it's safe to retry once on a fresh connection.
+            f = self._send(message)
+
+        # once the command is sent, the coordinator may have applied it even if
+        # we never hear back. Retrying could reserve twice, so don't.
+        try:
+            line = f.readline()
+        except OSError:
+            self._drop_connection()
+            raise
+        if not line:
+            self._drop_connection()
+            raise ConnectionError("rate limit coordinator closed the connection")
+        return float(line)
+
+    def reserve(self):
+        return self._ask("reserve")
+
+    async def reserve_async(self):
+        return await asyncio.to_thread(self.reserve)
+
+    def try_reserve(self):
+        return bool(self._ask("try"))
+
+    async def try_reserve_async(self):
+        return await asyncio.to_thread(self.try_reserve)
+
+
+class RateLimitCoordinator:
+    """
+    A small TCP server which hands out request slots to
+    :class:`CoordinatedRateLimiter` instances, keeping a separate
+    :class:`TokenBucket` for each key they ask about.
+
+    This is a reference implementation with no external dependencies. Run it
+    somewhere every process can reach, either from code:
+
+    .. code-block:: python
+
+        RateLimitCoordinator("0.0.0.0", 8737).serve_forever()
+
+    or from the command line with ``python -m ossapi.ratelimit``.
+
+    Parameters
+    ----------
+    host: str
+        The interface to listen on.
+    port: int
+        The port to listen on. Pass 0 to pick a free port, which you can then
+        read from :attr:`port`.
+    rate: float
+        How many requests to allow every ``per`` seconds, per key.
+    per: float
+        The period in seconds over which ``rate`` requests are allowed.
+    burst: int
+        How many requests to allow at once after being idle, per key.
+    """
+
+    def __init__(self, host="localhost", port=8737, rate=1200, per=60, *, burst=200):
+        self.rate = rate
+        self.per = per
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    # the connection closed partway through sending a command
+                    if not line.endswith(b"\n"):
+                        return
+                    command, _, key = line.decode().strip().partition(" ")
+                    if not key:
+                        return
+                    if command == "reserve":
+                        result = coordinator.bucket(key).reserve()
+                    elif command == "try":
+                        result = int(coordinator.bucket(key).try_reserve())
+                    else:
+                        return
+                    self.wfile.write(f"{result}\n".encode())
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def bucket(self, key):
+        """
+        Returns the :class:`TokenBucket` for ``key``, creating it if needed.
+        """
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.rate, self.per, burst=self.burst)
+            return self._buckets[key]
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        """
+        Serves from a background thread, and returns immediately.
+        """
+        thread = threading.Thread(
+            target=self.serve_forever, daemon=True, name="ossapi-coordinator"
+        )
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a rate limit coordinator for CoordinatedRateLimiter."
+    )
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8737)
+    parser.add_argument("--rate", type=float, default=1200)
+    parser.add_argument("--per", type=float, default=60)
+    parser.add_argument("--burst", type=int, default=200)
+    args = parser.parse_args()
+
+    coordinator = RateLimitCoordinator(
+        args.host, args.port, args.rate, args.per, burst=args.burst
+    )
+    print(f"coordinating rate limits on {args.host}:{coordinator.port}")
+    coordinator.serve_forever()
@@ -0,0 +1,205 @@
+import hashlib
+import os
+import sqlite3
+import struct
+import tempfile
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def _read_string(content, offset):
+    # strings in the .osr format are either 0x00 (empty), or 0x0b followed by
+    # a uleb128 length and that many utf-8 bytes.
+    if content[offset] == 0x00:
+        return None, offset + 1
+    if content[offset] != 0x0B:
+        raise ValueError(
+            f"expected a string at offset {offset} of the replay, got "
+            f"{content[offset]:#x}"
+        )
+    offset += 1
+    length = 0
+    shift = 0
+    while True:
+        byte = content[offset]
+        offset += 1
+        length |= (byte & 0x7F) << shift
+        if byte & 0x80 == 0:
+            break
+        shift += 7
+    return content[offset : offset + length].decode("utf-8"), offset + length
+
+
+def replay_hashes(content):
+    """
+    Returns the ``(beatmap_hash, replay_hash)`` of the raw replay ``content``
+    (in the .osr format), without parsing the rest of the replay.
+
+    Raises ``ValueError`` if ``content`` is not a replay.
+    """
+    # a byte for the mode and an int for the game version come first
+    offset = struct.calcsize("<bi")
+    try:
+        beatmap_hash, offset = _read_string(content, offset)
+        _username, offset = _read_string(content, offset)
+        replay_hash, offset = _read_string(content, offset)
+    except IndexError:
+        raise ValueError("replay ended before its header did") from None
+    return beatmap_hash, replay_hash
+
+
+class ReplayStore:
+    """
+    Where :meth:`~ossapi.ossapiv2.Ossapi.download_score` and
+    :meth:`~ossapi.ossapiv2.Ossapi.download_score_mode` store replays they
+    have already downloaded.
+
+    Replays never change, so stored replays never expire. Replays are keyed by
+    score: ``"{score_id}"`` for :meth:`~ossapi.ossapiv2.Ossapi.download_score`,
+    and ``"{mode}/{score_id}"`` for
+    :meth:`~ossapi.ossapiv2.Ossapi.download_score_mode`.
+
+    To implement your own store, subclass this class and implement
+    :meth:`get`, :meth:`put`, and :meth:`find`. Replays are raw bytes in the
+    .osr format.
+    """
+
+    def get(self, key):
+        """
+        Returns the replay stored under ``key``, or ``None``.
+        """
+        raise NotImplementedError()
+
+    def put(self, key, content):
+        """
+        Stores the replay ``content`` under ``key``.
+        """
+        raise NotImplementedError()
+
+    def find(self, *, replay_hash=None, beatmap_hash=None):
+        """
+        Returns the keys of the stored replays with this ``replay_hash`` and
+        ``beatmap_hash``. Either may be ``None`` to not filter on it.
+        """
+        raise NotImplementedError()
+
+
+class FileReplayStore(ReplayStore):
+    """
+    Stores replays as files in ``directory``, so they persist between runs.
+    Safe to share between processes on the same host.
+
+    Replays are content-addressed: each distinct replay is stored once, under
+    the sha256 of its content, however many keys it's stored under. An index
+    of keys, replay hashes, and beatmap hashes is kept in a SQLite database in
+    the same directory.
+
+    Parameters
+    ----------
+    directory: str or Path
+        The directory to store replays in. Created if it doesn't exist.
+    compress: bool
+        Whether to compress replays written to disk. This saves less space
+        than you might expect, since a replay's frames are already compressed.
+        Replays already on disk are read either way.
+    timeout: float
+        How long in seconds to wait on another process writing to the index
+        before raising.
+    """
+
+    def __init__(self, directory, *, compress=False, timeout=30):
+        self.directory = Path(directory)
+        self.compress = compress
+        self.timeout = timeout
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS replays (key TEXT PRIMARY KEY, "
+                "digest TEXT NOT NULL, replay_hash TEXT, beatmap_hash TEXT)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS replays_replay_hash "
+                "ON replays (replay_hash)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS replays_beatmap_hash "
+                "ON replays (beatmap_hash)"
+            )
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.directory / "index.db", timeout=self.timeout)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _path(self, digest, *, compressed):
+        suffix = ".osr.z" if compressed else ".osr"
+        return self.directory / digest[:2] / f"{digest}{suffix}"
+
+    def get(self, key):
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT digest FROM replays WHERE key = ?", (str(key),)
+            ).fetchone()
+        if row is None:
+            return None
+
+        digest = row[0]
+        path = self._path(digest, compressed=False)
+        if path.exists():
+            return path.read_bytes()
+        path = self._path(digest, compressed=True)
+        if path.exists():
+            return zlib.decompress(path.read_bytes())
+        # the index outlived the file, perhaps because someone deleted it.
+        return None
+
+    def put(self, key, content):
+        digest = hashlib.sha256(content).hexdigest()
+        if not (
+            self._path(digest, compressed=False).exists()
+            or self._path(digest, compressed=True).exists()
+        ):
+            self._write(digest, content)
+
+        beatmap_hash, replay_hash = replay_hashes(content)
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO replays (key, digest, replay_hash, "
+                "beatmap_hash) VALUES (?, ?, ?, ?)",
+                (str(key), digest, replay_hash, beatmap_hash),
+            )
+
+    def _write(self, digest, content):
+        path = self._path(digest, compressed=self.compress)
+        path.parent.mkdir(exist_ok=True)
+        if self.compress:
+            content = zlib.compress(content)
+        # the temporary file must live in the same directory (and so
+        # filesystem) as the replay file for os.replace to be atomic.
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{digest}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def find(self, *, replay_hash=None, beatmap_hash=None):
+        query = "SELECT key FROM replays WHERE 1"
+        params = []
+        if replay_hash is not None:
+            query += " AND replay_hash = ?"
+            params.append(replay_hash)
+        if beatmap_hash is not None:
+            query += " AND beatmap_hash = ?"
+            params.append(beatmap_hash)
+        with self._connection() as conn:
+            return [key for (key,) in conn.execute(query, params)]
@@ -0,0 +1,143 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value):
+    """
+    Parses the value of a ``Retry-After`` header into a number of seconds from
+    now, or returns ``None`` if it can't be parsed.
+
+    ``Retry-After`` is either a number of seconds, or an http date.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """
+    Decides whether and when to retry a request which failed with a retryable
+    status code, like 429 (too many requests) or 503 (service unavailable).
+
+    Only ``GET`` requests are ever retried, since retrying any other request
+    may apply its effects twice.
+
+    Retries back off exponentially with full jitter: the ``n``\\th retry waits
+    a random amount of time between 0 and ``min(max_delay, base_delay * 2**n)``
+    seconds. If the api sends a ``Retry-After`` header, we wait at least that
+    long instead.
+
+    Parameters
+    ----------
+    max_retries: int
+        The maximum number of times to retry a single request. Pass 0 to never
+        retry.
+    base_delay: float
+        The maximum delay in seconds before the first retry. Doubles with each
+        retry.
+    max_delay: float
+        The maximum delay in seconds before any single retry, not counting
+        ``Retry-After``.
+    total_timeout: float
+        The maximum time in seconds to spend on a single call, including
+        retries. We give up (and return the last response) rather than retry
+        past this.
+    statuses: set[int]
+        Which http status codes to retry on.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_retries=5,
+        base_delay=1,
+        max_delay=30,
+        total_timeout=120,
+        statuses=frozenset({429, 500, 502, 503, 504}),
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.total_timeout = total_timeout
+        self.statuses = frozenset(statuses)
+
+    def delay(self, attempt, retry_after=None):
+        """
+        How long in seconds to wait before retry number ``attempt`` (starting
+        at 0), given the ``Retry-After`` header of the failed response, if any.
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if retry_after is not None:
+            return max(retry_after, backoff)
+        return backoff
+
+    def next_delay(self, method, status, attempt, elapsed, retry_after=None):
+        """
+        Returns how long in seconds to wait before retrying a request which
+        returned ``status``, or ``None`` if the request shouldn't be retried.
+
+        ``attempt`` is how many times the request has already been retried, and
+        ``elapsed`` is how long in seconds we've spent on the call so far.
+        """
+        if method != "GET" or status not in self.statuses:
+            return None
+        if attempt >= self.max_retries:
+            return None
+        delay = self.delay(attempt, retry_after)
+        if elapsed + delay > self.total_timeout:
+            return None
+        return delay
+
+
+class RetryPolicies:
+    """
+    Maps endpoint categories (see ``__ossapi_category__`` on each endpoint) to
+    the :class:`RetryPolicy` for that category.
+
+    Parameters
+    ----------
+    default: RetryPolicy
+        The policy for categories not in ``categories``, and for requests not
+        made by an endpoint.
+    categories: dict[str, RetryPolicy]
+        Policies for specific categories, for instance
+        ``{"scores": RetryPolicy(total_timeout=600)}``.
+    """
+
+    def __init__(self, default=None, categories={}):
+        self.default = default or RetryPolicy()
+        self.categories = dict(categories)
+
+    @classmethod
+    def from_arg(cls, arg):
+        """
+        Converts the ``retry_policy`` argument of
+        :class:`~ossapi.ossapiv2.Ossapi` to a :class:`RetryPolicies`.
+        """
+        if isinstance(arg, cls):
+            return arg
+        if isinstance(arg, RetryPolicy):
+            return cls(arg)
+        if isinstance(arg, dict):
+            return cls(categories=arg)
+        if arg is None:
+            return cls()
+        raise TypeError(f"expected a RetryPolicy or dict, got {arg!r}")
+
+    def policy(self, endpoint):
+        """
+        Returns the policy for ``endpoint``, an
+        :class:`~ossapi.utils.EndpointCall` (or ``None``).
+        """
+        if endpoint is None:
+            return self.default
+        return self.categories.get(endpoint.category, self.default)
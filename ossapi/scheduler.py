@@ -0,0 +1,235 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """
+    How urgently a request should be made. Requests with a more urgent priority
+    are let through first when there are several waiting on the rate limit.
+    """
+
+    #: For requests someone is actively waiting on, like a user asking a bot
+    #: for their profile.
+    INTERACTIVE = 0
+    #: The priority of requests which don't specify one.
+    NORMAL = 1
+    #: For bulk work with no one waiting on it, like crawling rankings.
+    BACKGROUND = 2
+
+
+# the priority of requests made in the current context, if set. See
+# ``request_priority``.
+current_priority = ContextVar("current_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Makes every request made inside this context manager (in this thread or
+    task) with priority ``priority``.
+
+    .. code-block:: python
+
+        with request_priority(Priority.BACKGROUND):
+            api.ranking("osu", RankingType.PERFORMANCE)
+    """
+    token = current_priority.set(Priority(priority))
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class _Waiter:
+    def __init__(self, priority, seq, signal):
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.signal = signal
+
+
+class PriorityScheduler:
+    """
+    Decides which waiting request :class:`~ossapi.ossapiv2.Ossapi` makes
+    next.
+
+    Requests wait in a queue per :class:`Priority`, and are let through to the
+    rate limiter one at a time, most urgent first. So when the rate limit is
+    the bottleneck, an interactive request only waits on the next free slot,
+    no matter how many background requests are queued.
+
+    To guarantee that less urgent requests are never starved, a request's
+    priority improves by one level for every ``promote_after`` seconds it
+    waits.
+
+    Use :class:`AsyncPriorityScheduler` with
+    :class:`~ossapi.ossapiv2_async.OssapiAsync`.
+
+    Parameters
+    ----------
+    promote_after: float
+        How many seconds a request waits before its priority improves by one
+        level.
+    max_in_flight: int
+        If passed, also limit how many requests may be in flight at once, so
+        that urgent requests jump the queue for connections as well as for the
+        rate limit.
+    default_priority: Priority
+        The priority of requests made without one.
+    """
+
+    def __init__(
+        self,
+        *,
+        promote_after=5,
+        max_in_flight=None,
+        default_priority=Priority.NORMAL,
+    ):
+        self.promote_after = promote_after
+        self.max_in_flight = max_in_flight
+        self.default_priority = Priority(default_priority)
+        # priority : deque[_Waiter]. Each deque is in the order requests
+        # arrived, so the oldest (and so most promoted) request of each
+        # priority is always at the front.
+        self._queues = {}
+        self._seq = itertools.count()
+        # whether a request has been let through to the rate limiter and not
+        # yet come back from it
+        self._dispatching = False
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def priority(self):
+        """
+        The priority of a request made in the current context.
+        """
+        priority = current_priority.get()
+        return self.default_priority if priority is None else priority
+
+    def waiting(self):
+        """
+        How many requests are waiting to be let through.
+        """
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _rank(self, waiter, now):
+        return (
+            waiter.priority - (now - waiter.enqueued_at) / self.promote_after,
+            waiter.seq,
+        )
+
+    def _enqueue(self, signal):
+        waiter = _Waiter(self.priority(), next(self._seq), signal)
+        self._queues.setdefault(waiter.priority, deque()).append(waiter)
+        return waiter
+
+    def _remove(self, waiter):
+        queue = self._queues[waiter.priority]
+        if waiter in queue:
+            queue.remove(waiter)
+            return True
+        return False
+
+    def _next(self):
+        """
+        Removes and returns the waiter to let through next, if we can let one
+        through right now.
+        """
+        if self._dispatching:
+            return None
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            return None
+        heads = [queue[0] for queue in self._queues.values() if queue]
+        if not heads:
+            return None
+        now = time.monotonic()
+        waiter = min(heads, key=lambda waiter: self._rank(waiter, now))
+        self._queues[waiter.priority].popleft()
+        self._dispatching = True
+        return waiter
+
+    def _grant(self):
+        waiter = self._next()
+        if waiter is not None:
+            waiter.signal.set()
+
+    def acquire(self, rate_limiter):
+        """
+        Blocks until it's this request's turn, and ``rate_limiter`` lets it
+        through. Must be paired with a call to :meth:`release` once the request
+        has been made, unless this raises.
+        """
+        with self._lock:
+            waiter = self._enqueue(threading.Event())
+            self._grant()
+        waiter.signal.wait()
+
+        acquired = False
+        try:
+            rate_limiter.acquire()
+            acquired = True
+        finally:
+            with self._lock:
+                self._dispatching = False
+                if acquired:
+                    self.in_flight += 1
+                self._grant()
+
+    def release(self):
+        """
+        Marks a request let through by :meth:`acquire` as finished.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            self._grant()
+
+
+class AsyncPriorityScheduler(PriorityScheduler):
+    """
+    Async equivalent of :class:`PriorityScheduler`, for use with
+    :class:`~ossapi.ossapiv2_async.OssapiAsync`. Takes the same parameters.
+    """
+
+    def _grant(self):
+        while True:
+            waiter = self._next()
+            if waiter is None:
+                return
+            if not waiter.signal.done():
+                waiter.signal.set_result(None)
+                return
+            # this waiter was cancelled while waiting. Try the next one.
+            self._dispatching = False
+
+    async def acquire(self, rate_limiter):
+        waiter = self._enqueue(asyncio.get_running_loop().create_future())
+        self._grant()
+        try:
+            await waiter.signal
+        except asyncio.CancelledError:
+            if not self._remove(waiter) and not waiter.signal.cancelled():
+                # we were let through just as we were cancelled. Let the next
+                # request through instead.
+                self._dispatching = False
+                self._grant()
+            raise
+
+        acquired = False
+        try:
+            await rate_limiter.acquire_async()
+            acquired = True
+        finally:
+            self._dispatching = False
+            if acquired:
+                self.in_flight += 1
+            self._grant()
+
+    def release(self):
+        self.in_flight -= 1
+        self._grant()
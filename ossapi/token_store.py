@@ -0,0 +1,262 @@
+import json
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl is unix-only. On other platforms we fall back to in-process locking,
+    # which still protects threads sharing a store but not separate processes.
+    fcntl = None
+
+
+def token_expired(token, *, leeway=10):
+    """
+    Whether ``token`` has expired, or will expire in the next ``leeway``
+    seconds. Tokens without an expiry time are assumed to still be valid.
+    """
+    expires_at = token.get("expires_at")
+    if expires_at is None:
+        return False
+    return expires_at < time.time() + leeway
+
+
+class TokenStore:
+    """
+    Where :class:`~ossapi.ossapiv2.Ossapi` saves and retrieves tokens.
+
+    Every client sharing a token store (and token key) shares a single token.
+    When one client grants or refreshes a token, the others pick it up from the
+    store instead of granting their own.
+
+    To implement your own token store, subclass this class and implement
+    :meth:`load`, :meth:`save`, :meth:`remove`, and :meth:`lock`.
+    """
+
+    def load(self, key):
+        """
+        Returns the token stored under ``key``, or ``None`` if there is no such
+        token.
+        """
+        raise NotImplementedError()
+
+    def save(self, key, token):
+        """
+        Stores ``token`` under ``key``, replacing any existing token.
+        """
+        raise NotImplementedError()
+
+    def remove(self, key):
+        """
+        Removes the token stored under ``key``, if any.
+        """
+        raise NotImplementedError()
+
+    def lock(self, key):
+        """
+        A context manager which holds an exclusive lock on ``key`` for its
+        duration. Clients hold this lock while granting a new token, so that
+        only one of the clients sharing this store grants a token at a time.
+        """
+        raise NotImplementedError()
+
+
+class MemoryTokenStore(TokenStore):
+    """
+    Stores tokens in memory. Tokens are shared between every client in this
+    process using this store, and are lost when the process exits.
+    """
+
+    def __init__(self):
+        self._tokens = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        return self._tokens.get(key)
+
+    def save(self, key, token):
+        self._tokens[key] = token
+
+    def remove(self, key):
+        self._tokens.pop(key, None)
+
+    def lock(self, key):
+        with self._lock:
+            if key not in self._locks:
+                self._locks[key] = threading.RLock()
+            return self._locks[key]
+
+
+class FileTokenStore(TokenStore):
+    """
+    Stores tokens as pickle files in ``directory``, named ``{key}.pickle``. This
+    is the token store ossapi uses by default.
+
+    Tokens are written to a temporary file and atomically renamed into place, so
+    a reader never sees a partially written token. On unix, :meth:`lock` takes
+    an ``fcntl`` lock, which makes this store safe to share between processes.
+
+    Parameters
+    ----------
+    directory: str or Path
+        The directory to store token files in.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._thread_lock = threading.RLock()
+        # how many times the current thread has entered ``lock``. fcntl locks
+        # are held per open file, so reentering would otherwise deadlock.
+        self._local = threading.local()
+
+    def path(self, key):
+        return self.directory / f"{key}.pickle"
+
+    def load(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key, token):
+        path = self.path(key)
+        # the temporary file must live in the same directory (and so filesystem)
+        # as the token file for os.replace to be atomic.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(token, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def remove(self, key):
+        self.path(key).unlink(missing_ok=True)
+
+    @contextmanager
+    def lock(self, key):
+        with self._thread_lock:
+            depth = getattr(self._local, "depth", 0)
+            if fcntl is None or depth > 0:
+                self._local.depth = depth + 1
+                try:
+                    yield
+                finally:
+                    self._local.depth = depth
+                return
+
+            lock_path = self.directory / f"{key}.pickle.lock"
+            with open(lock_path, "a+b") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                self._local.depth = 1
+                try:
+                    yield
+                finally:
+                    self._local.depth = 0
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SQLiteTokenStore(TokenStore):
+    """
+    Stores tokens in a SQLite database at ``path``. Safe to share between
+    processes on the same host.
+
+    Tokens are stored as json rather than pickled, so loading a token never
+    unpickles data.
+
+    Parameters
+    ----------
+    path: str or Path
+        The path to the database file. Created if it doesn't exist.
+    timeout: float
+        How long in seconds to wait on another process holding the database
+        lock before raising.
+    """
+
+    def __init__(self, path, *, timeout=30):
+        self.path = Path(path)
+        self.timeout = timeout
+        # the connection holding the lock for the current thread, if any. Saves
+        # made while holding the lock have to go through this connection, or
+        # they would wait on the lock forever.
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tokens "
+                "(key TEXT PRIMARY KEY, token TEXT NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=self.timeout)
+
+    @contextmanager
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self, key):
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT token FROM tokens WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def save(self, key, token):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tokens (key, token) VALUES (?, ?)",
+                (key, json.dumps(dict(token))),
+            )
+
+    def remove(self, key):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM tokens WHERE key = ?", (key,))
+
+    @contextmanager
+    def lock(self, key):
+        # sqlite only offers database-level write locks, so this locks every key
+        # in the store rather than just ``key``. Token grants are rare enough
+        # that this doesn't matter in practice.
+        if getattr(self._local, "conn", None) is not None:
+            # reentrant
+            yield
+            return
+
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.conn = conn
+            try:
+                yield
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            self._local.conn = None
+            conn.close()
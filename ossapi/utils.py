@@ -1,3 +1,6 @@
+import weakref
+from contextvars import ContextVar
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum, IntFlag
 from types import UnionType
@@ -108,11 +111,90 @@ class ModelMeta(type):
         return model
 
 
+class ModelGroup:
+    """
+    The models deserialized from a single api response.
+
+    Following a foreign key of one model in a group follows the same foreign
+    key of every model of the same type in the group at once, so eg calling
+    ``.beatmap()`` on each of 100 playcounts makes two
+    :meth:`~ossapi.ossapiv2.Ossapi.beatmaps` requests instead of 100
+    :meth:`~ossapi.ossapiv2.Ossapi.beatmap` requests.
+
+    The group only holds weak references to its models, so holding on to one
+    model doesn't keep every other model from its response alive.
+    """
+
+    def __init__(self):
+        self._models = []
+
+    @property
+    def models(self):
+        """
+        The models in this group which are still alive.
+        """
+        models = (ref() for ref in self._models)
+        return [model for model in models if model is not None]
+
+    def add(self, model):
+        self._models.append(weakref.ref(model))
+        model._ossapi_group = self
+
+    def siblings(self, model):
+        """
+        The models in this group of the same type as ``model``.
+        """
+        return [other for other in self.models if type(other) is type(model)]
+
+
+# the group models deserialized in this context are added to, if any.
+current_model_group = ContextVar("current_model_group", default=None)
+
+@dataclass(frozen=True)
+class Prefetch:
+    """
+    A call to :meth:`~ossapi.ossapiv2.Ossapi.prefetch` which is currently
+    running.
+    """
+
+    compact_users: bool
+
+
+# the prefetch currently running in this context, if any. While prefetching,
+# every foreign key of a model's group is followed at once, since they're all
+# going to be followed anyway.
+current_prefetch = ContextVar("current_prefetch", default=None)
+
+
+def unfollowed_foreign_keys(models, kind, attribute, existing=None):
+    """
+    Returns a list of ``(model, id)`` for each of ``models`` whose foreign key
+    in ``attribute`` (to a model of ``kind``) needs following, ie isn't
+    ``None``, hasn't been followed already, and isn't already present in the
+    attribute ``existing``.
+    """
+    unfollowed = []
+    for model in models:
+        id_ = getattr(model, attribute)
+        if id_ is None:
+            continue
+        if existing is not None and getattr(model, existing):
+            continue
+        followed, _ = model._followed(kind, id_)
+        if not followed:
+            unfollowed.append((model, id_))
+    return unfollowed
+
+
 class Model(_Model, metaclass=ModelMeta):
     """
     A dataclass-style model. Provides an ``_api`` attribute.
     """
 
+    # attributes prefixed with _ossapi_ are internal bookkeeping, not data.
+    _ossapi_group = None
+    _ossapi_foreign_keys = None
+
     def __init__(self, **kwargs):
         self._ossapi_data = kwargs
 
@@ -125,7 +207,7 @@ class Model(_Model, metaclass=ModelMeta):
         return super().__getattribute__(key)
 
     def __setattr__(self, key, value):
-        if key == "_ossapi_data":
+        if key.startswith("_ossapi_"):
             return super().__setattr__(key, value)
         self._ossapi_data[key] = value
 
@@ -148,6 +230,37 @@ class Model(_Model, metaclass=ModelMeta):
         func = lambda: self._api.beatmapset(beatmapset_id)
         return self._foreign_key(beatmapset_id, func, existing)
 
+    def _follow(self, kind, attribute, existing=None):
+        """
+        Follows the foreign key stored in ``attribute`` to the model of
+        ``kind`` (``"user"``, ``"beatmap"``, or ``"beatmapset"``) it
+        references. ``existing`` is the name of the attribute which holds the
+        referenced model, if the api sometimes returns it.
+
+        Unlike ``_fk_user`` and friends, the result is memoized. Where there's
+        a batch endpoint for ``kind``, the same foreign key is followed for
+        every model of the same type in this model's :class:`ModelGroup` at
+        once.
+        """
+        if existing is not None and getattr(self, existing):
+            return getattr(self, existing)
+        if getattr(self, attribute) is None:
+            return None
+        return self._api._follow_foreign_key(self, kind, attribute, existing)
+
+    def _followed(self, kind, id_):
+        # whether we've already followed a foreign key to (kind, id_), and
+        # the model it references if so.
+        foreign_keys = self._ossapi_foreign_keys or {}
+        if (kind, id_) not in foreign_keys:
+            return False, None
+        return True, foreign_keys[(kind, id_)]
+
+    def _set_followed(self, kind, id_, model):
+        if self._ossapi_foreign_keys is None:
+            self._ossapi_foreign_keys = {}
+        self._ossapi_foreign_keys[(kind, id_)] = model
+
     def __str__(self):
         # don't print internal values
         blacklisted_keys = ["_api"]
@@ -297,3 +410,20 @@ def convert_primitive_type(value, type_):
     if type_ is float and isinstance(value, int):
         return float(value)
     return value
+
+
+@dataclass(frozen=True)
+class EndpointCall:
+    """
+    An endpoint method of :class:`~ossapi.ossapiv2.Ossapi` which is currently
+    being called.
+    """
+
+    name: str
+    category: str
+
+
+# the endpoint currently being called, if any. Set by the ``request`` decorator
+# so that layers below it (retries, rate limiting, ...) know which endpoint a
+# request belongs to.
+current_endpoint = ContextVar("current_endpoint", default=None)
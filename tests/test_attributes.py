@@ -0,0 +1,78 @@
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase
+
+from ossapi import GameMode, Mod, SQLiteAttributesCache
+from ossapi.attributes import attributes_key, attributes_requests
+
+from tests.utils import offline_client
+
+
+class TestDifficultyMods(TestCase):
+    def test_difficulty_mods(self):
+        self.assertEqual(Mod("HDDT").difficulty_mods(), Mod.DT)
+        self.assertEqual(Mod("NC").difficulty_mods(), Mod.DT)
+        self.assertEqual(Mod("HDHRFLNF").difficulty_mods(), Mod("HRFL"))
+        self.assertEqual(Mod("EZHTSO").difficulty_mods(), Mod("EZHT"))
+        self.assertEqual(Mod("TD").difficulty_mods(0), Mod.TD)
+        self.assertEqual(Mod("TD").difficulty_mods(1), Mod.NM)
+        self.assertEqual(Mod.K4.difficulty_mods(3), Mod.K4)
+        self.assertEqual(Mod.K4.difficulty_mods(0), Mod.NM)
+
+    def test_key(self):
+        self.assertEqual(attributes_key("a", "HDDT", 0), attributes_key("a", "DT", 0))
+        self.assertEqual(attributes_key("a", None, 0), attributes_key("a", "HD", 0))
+        self.assertNotEqual(attributes_key("a", "DT", 0), attributes_key("a", "HT", 0))
+        self.assertNotEqual(attributes_key("a", "DT", 0), attributes_key("b", "DT", 0))
+        self.assertNotEqual(attributes_key("a", "DT", 0), attributes_key("a", "DT", 1))
+
+
+class TestAttributesRequests(TestCase):
+    def test_requests(self):
+        beatmap = SimpleNamespace(id=1, checksum="a", mode=GameMode.OSU)
+        lookups = [
+            (beatmap, "HDDT", None),
+            (1, "DT", "osu"),
+            (2, None, None),
+            (beatmap, None, GameMode.MANIA),
+            # ids may be strings, like for beatmaps_bulk
+            ("1", "DT", None),
+        ]
+        beatmaps = {1: beatmap, 2: None}
+        keys, requests, uncacheable = attributes_requests(lookups, beatmaps)
+        self.assertEqual(keys[0], keys[1])
+        self.assertEqual(keys[4], keys[1])
+        self.assertIsNone(keys[2])
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[keys[3]], (1, Mod.NM, 3))
+        self.assertEqual(uncacheable, set())
+
+
+class TestBeatmapAttributesBulk(TestCase):
+    def test_string_ids(self):
+        api = offline_client(self)
+        beatmap = SimpleNamespace(id=1, checksum="a", mode=GameMode.OSU)
+        calls = []
+        api.beatmaps_bulk = lambda ids, **kwargs: calls.append(ids) or {1: beatmap}
+        api._request_json = lambda method, url, **kwargs: {"attributes": {}}
+
+        results = api.beatmap_attributes_bulk([("1", "DT"), (1, "HDDT")])
+        self.assertEqual(calls, [[1]])
+        self.assertEqual(len(results), 2)
+        self.assertIsNotNone(results[0])
+
+
+class TestSQLiteAttributesCache(TestCase):
+    def test_roundtrip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "attributes.db"
+            cache = SQLiteAttributesCache(path)
+            keys = [f"key{i}" for i in range(1200)]
+            cache.set_many({key: f'{{"value": "{key}"}}' for key in keys[::2]})
+
+            # a separate instance sees the same values
+            values = SQLiteAttributesCache(path).get_many(keys)
+            self.assertEqual(len(values), 600)
+            self.assertEqual(values["key4"], '{"value": "key4"}')
+            self.assertNotIn("key5", values)
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from ossapi import AsyncBatcher, Batcher
+
+
+class TestBatcher(TestCase):
+    def test_batches(self):
+        batches = []
+
+        def load_many(keys):
+            batches.append(keys)
+            return {key: key * 2 for key in keys if key != 3}
+
+        batcher = Batcher(load_many, window=0.1, max_batch_size=4)
+        results = {}
+
+        def load(key):
+            try:
+                results[key] = batcher.load(key)
+            except ValueError:
+                results[key] = None
+
+        threads = [threading.Thread(target=load, args=(key,)) for key in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(len(batch) for batch in batches), [2, 4])
+        self.assertEqual(results, {0: 0, 1: 2, 2: 4, 3: None, 4: 8, 5: 10})
+
+
+class TestAsyncBatcher(TestCase):
+    def test_batches(self):
+        batches = []
+
+        async def load_many(keys):
+            batches.append(keys)
+            return {key: key * 2 for key in keys}
+
+        batcher = AsyncBatcher(load_many, window=0.05, max_batch_size=4)
+
+        async def main():
+            results = await asyncio.gather(*[batcher.load(key) for key in range(6)])
+            self.assertEqual(results, [0, 2, 4, 6, 8, 10])
+            # identical keys are only looked up once
+            results = await asyncio.gather(batcher.load(1), batcher.load(1))
+            self.assertEqual(results, [2, 2])
+
+        asyncio.run(main())
+        self.assertEqual(batches, [[0, 1, 2, 3], [4, 5], [1]])
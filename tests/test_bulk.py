@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+from unittest import TestCase
+
+from ossapi import BulkLookupError
+from ossapi.bulk import bulk_keys, bulk_results, chunked
+
+
+def user(user_id):
+    return SimpleNamespace(id=user_id, username=f"user{user_id}")
+
+
+class TestBulk(TestCase):
+    def test_keys(self):
+        keys = bulk_keys(iter([3, user(1), 3, "name", 1]))
+        self.assertEqual(keys, [3, 1, "name"])
+
+    def test_id_keys(self):
+        keys = bulk_keys(["3", user(1), 3, "1"], ids=True)
+        self.assertEqual(keys, [3, 1])
+        with self.assertRaises(ValueError):
+            bulk_keys([1, "name"], ids=True)
+
+    def test_chunked(self):
+        chunks = chunked(list(range(120)))
+        self.assertEqual([len(chunk) for chunk in chunks], [50, 50, 20])
+        self.assertEqual(chunked([]), [])
+
+    def test_results(self):
+        chunks = [[1, 2], [3, "USER4", "5"]]
+        results = [[user(2), user(1)], [user(4), user(5)]]
+        mapping = bulk_results(chunks, results, usernames=True)
+        self.assertEqual(list(mapping), [1, 2, 3, "USER4", "5"])
+        self.assertEqual(mapping[1].id, 1)
+        self.assertIsNone(mapping[3])
+        self.assertEqual(mapping["USER4"].id, 4)
+        self.assertEqual(mapping["5"].id, 5)
+
+    def test_partial_failure(self):
+        chunks = [[1], [2]]
+        error = ValueError()
+        with self.assertRaises(BulkLookupError) as context:
+            bulk_results(chunks, [[user(1)], error])
+        self.assertEqual(list(context.exception.results), [1])
+        self.assertEqual(context.exception.errors, [([2], error)])
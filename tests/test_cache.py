@@ -0,0 +1,235 @@
+import asyncio
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase
+
+from ossapi import FOREVER, CachedResponse, ResponseCache, SQLiteResponseCache
+from ossapi.utils import EndpointCall
+
+from tests.utils import offline_client
+
+
+class TestResponseCache(TestCase):
+    def test_ttl(self):
+        cache = ResponseCache()
+        self.assertEqual(cache.ttl("GET", EndpointCall("score", "scores")), FOREVER)
+        self.assertEqual(cache.ttl("GET", EndpointCall("scores", "scores")), 0)
+        self.assertEqual(cache.ttl("GET", EndpointCall("ranking", "rankings")), 300)
+        # the defaults only match endpoint names, so feeds in the "users" and
+        # "beatmaps" categories aren't cached
+        self.assertEqual(cache.ttl("GET", EndpointCall("users", "users")), 300)
+        self.assertEqual(cache.ttl("GET", EndpointCall("user_scores", "users")), 0)
+        self.assertEqual(cache.ttl("GET", EndpointCall("user_kudosu", "users")), 0)
+        self.assertEqual(cache.ttl("GET", EndpointCall("news_post", "news")), 0)
+        # POSTs are only cached if their endpoint is listed by name
+        self.assertEqual(
+            cache.ttl("POST", EndpointCall("beatmap_attributes", "beatmaps")), FOREVER
+        )
+        self.assertEqual(cache.ttl("POST", EndpointCall("send_pm", "users")), 0)
+        self.assertEqual(cache.ttl("GET", None), 0)
+
+        # passed ttls also match categories
+        cache = ResponseCache({"users": 60})
+        self.assertEqual(cache.ttl("GET", EndpointCall("user_scores", "users")), 60)
+
+    def test_expiry(self):
+        cache = ResponseCache()
+        cache.set("a", b"1", 0.05)
+        self.assertEqual(cache.get("a"), b"1")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 1, 0))
+
+    def test_lru_entries(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", b"1", FOREVER)
+        cache.set("b", b"2", FOREVER)
+        # "a" is now the most recently used
+        cache.get("a")
+        cache.set("c", b"3", FOREVER)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), b"1")
+        self.assertEqual(cache.get("c"), b"3")
+        self.assertEqual(cache.stats().evictions, 1)
+
+    def test_lru_bytes(self):
+        cache = ResponseCache(max_bytes=10)
+        cache.set("a", b"12345", FOREVER)
+        cache.set("b", b"12345", FOREVER)
+        cache.set("c", b"1", FOREVER)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats().size, 6)
+        # responses larger than the whole cache aren't cached at all
+        cache.set("d", b"12345678901", FOREVER)
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(cache.stats().entries, 2)
+
+    def test_revalidation(self):
+        cache = ResponseCache()
+        cache.set("a", b"1", 0.05, etag='"abc"')
+        cache.set("b", b"2", 0.05)
+        time.sleep(0.1)
+
+        # stale responses are kept if they can be revalidated
+        entry = cache.lookup("a")
+        self.assertFalse(entry.fresh)
+        self.assertEqual(entry.conditional_headers(), {"If-None-Match": '"abc"'})
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNone(cache.lookup("b"))
+
+        cache.revalidated("a", entry, FOREVER)
+        self.assertEqual(cache.get("a"), b"1")
+        stats = cache.stats()
+        self.assertEqual((stats.revalidations, stats.entries), (1, 1))
+
+    def test_stale_while_revalidate(self):
+        cache = ResponseCache(max_stale=ResponseCache.DISPLAY_MAX_STALE)
+        self.assertEqual(cache.max_staleness("GET", EndpointCall("user", "users")), 300)
+        self.assertEqual(cache.max_staleness("GET", EndpointCall("users", "users")), 0)
+
+        cache.set("a", b"1", 0.05)
+        time.sleep(0.1)
+        entry = cache.lookup("a", max_stale=60)
+        self.assertFalse(entry.fresh)
+        self.assertEqual(entry.content, b"1")
+        # too stale
+        self.assertIsNone(cache.lookup("a", max_stale=0.01))
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.stale_hits, stats.misses), (1, 1, 1))
+
+        # only one background refresh at a time
+        self.assertTrue(cache.start_refresh("a"))
+        self.assertFalse(cache.start_refresh("a"))
+        cache.finish_refresh("a")
+        self.assertTrue(cache.start_refresh("a"))
+
+    def test_recent_scores_uncached(self):
+        api = offline_client(self, response_cache=ResponseCache())
+        keys = []
+
+        def fetch_json(method, url, params, data, key=None, *args, **kwargs):
+            keys.append(key)
+            return []
+
+        api._fetch_json = fetch_json
+        api.user_scores(1, "recent")
+        api.user_scores(1, "recent")
+        self.assertEqual(keys, [None, None])
+
+    def test_not_found(self):
+        api = offline_client(self)
+        # cached "not found" responses raise like the original response did
+        entry = CachedResponse(b'{"error": null}', FOREVER)
+        with self.assertRaises(ValueError):
+            api._cached_json(entry, "/users/1")
+        entry = CachedResponse(b'{"id": 1}', FOREVER)
+        self.assertEqual(api._cached_json(entry, "/users/1"), {"id": 1})
+
+
+class TestSQLiteResponseCache(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "responses.db"
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_persists(self):
+        key = ("GET", "/users/1", (("mode", "osu"),), (), (), 20220705)
+        cache = SQLiteResponseCache(self.path)
+        cache.set(key, b"1", FOREVER, last_modified="Tue, 05 Jul 2022 00:00:00 GMT")
+
+        # as if from another process
+        cache = SQLiteResponseCache(self.path)
+        entry = cache.lookup(key)
+        self.assertTrue(entry.fresh)
+        self.assertEqual(entry.content, b"1")
+        self.assertEqual(
+            entry.conditional_headers(),
+            {"If-Modified-Since": "Tue, 05 Jul 2022 00:00:00 GMT"},
+        )
+        self.assertEqual(cache.stats().entries, 1)
+
+    def test_revalidation(self):
+        cache = SQLiteResponseCache(self.path)
+        cache.set("a", b"1", 0.05, etag='"abc"')
+        time.sleep(0.1)
+        entry = cache.lookup("a")
+        self.assertFalse(entry.fresh)
+        cache.revalidated("a", entry, 60)
+        self.assertEqual(SQLiteResponseCache(self.path).get("a"), b"1")
+
+    def test_bounds(self):
+        cache = SQLiteResponseCache(self.path, max_entries=2, max_bytes=10)
+        cache.set("a", b"12345", FOREVER)
+        cache.set("b", b"12345", FOREVER)
+        cache.set("c", b"1", FOREVER)
+        self.assertIsNone(cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual((stats.entries, stats.size, stats.evictions), (2, 6, 1))
+        cache.clear()
+        self.assertEqual(cache.stats().entries, 0)
+
+    def test_usage(self):
+        cache = SQLiteResponseCache(self.path)
+        cache.set("a", b"12345", FOREVER)
+        cache.set("b", b"1", FOREVER)
+        # replacing a response counts its new size, not both
+        cache.set("a", b"12", FOREVER)
+        cache.lookup("b")
+        self.assertEqual(cache._usage(), (2, 3))
+        cache._delete("a")
+        self.assertEqual(cache._usage(), (1, 1))
+
+        # a database from before we tracked usage
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("DROP TABLE usage")
+        self.assertEqual(SQLiteResponseCache(self.path)._usage(), (1, 1))
+
+    def test_batched_access(self):
+        cache = SQLiteResponseCache(self.path, max_entries=2)
+        cache.ACCESS_BATCH_SIZE = 3
+        cache.set("a", b"1", FOREVER)
+        cache.set("b", b"1", FOREVER)
+
+        def accessed_at(key):
+            with sqlite3.connect(self.path) as conn:
+                return conn.execute(
+                    "SELECT accessed_at FROM responses WHERE key = ?",
+                    (cache._key(key),),
+                ).fetchone()[0]
+
+        before = accessed_at("a")
+        cache.lookup("a")
+        cache.lookup("a")
+        # not written yet
+        self.assertEqual(accessed_at("a"), before)
+        cache.lookup("a")
+        self.assertGreater(accessed_at("a"), before)
+
+        # evicting writes pending access times first, so "a" is still the
+        # most recently used
+        cache.lookup("a")
+        cache.set("c", b"1", FOREVER)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), b"1")
+
+    def test_async_off_event_loop(self):
+        cache = SQLiteResponseCache(self.path)
+        threads = []
+        load = cache._load
+        cache._load = lambda key: threads.append(threading.get_ident()) or load(key)
+
+        async def main():
+            await cache.set_async("a", b"1", FOREVER)
+            entry = await cache.lookup_async("a")
+            await cache.revalidated_async("a", entry, FOREVER)
+            return threading.get_ident(), entry
+
+        loop_thread, entry = asyncio.run(main())
+        self.assertEqual(entry.content, b"1")
+        self.assertNotIn(loop_thread, threads)
@@ -0,0 +1,93 @@
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase
+
+from ossapi import BulkLookupError, SQLiteChecksumIndex
+from ossapi.checksums import beatmap_checksums
+from ossapi.models import BeatmapCompact, Comment
+
+from tests.utils import offline_client
+
+
+class TestChecksumIndex(TestCase):
+    def test_beatmap_checksums(self):
+        models = [
+            BeatmapCompact(id=1, beatmapset_id=10, checksum="a", _api=None),
+            BeatmapCompact(id=2, beatmapset_id=10, checksum=None, _api=None),
+            Comment(user_id=1, _api=None),
+        ]
+        self.assertEqual(beatmap_checksums(models), {"a": (1, 10)})
+
+    def test_sqlite(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "checksums.db"
+            SQLiteChecksumIndex(path).set_many({"a": (1, 10), "b": (2, 10)})
+            # as if from another process
+            index = SQLiteChecksumIndex(path)
+            self.assertEqual(index.get_many(["a", "c"]), {"a": (1, 10)})
+
+            index.remove_many(["a", "c"])
+            self.assertEqual(SQLiteChecksumIndex(path).get_many(["a", "b"]), {
+                "b": (2, 10)
+            })
+
+
+class TestResolveChecksums(TestCase):
+    def setUp(self):
+        self.api = offline_client(self)
+        self.lookups = []
+
+        def beatmap(*, checksum):
+            self.lookups.append(checksum)
+            if checksum == "unsubmitted":
+                raise ValueError("api returned an error")
+            if checksum == "timeout":
+                raise TimeoutError()
+            return SimpleNamespace(id=int(checksum[1:]), beatmapset_id=10)
+
+        self.api.beatmap = beatmap
+
+    def test_resolve(self):
+        self.api.checksum_index.set_many({"b1": (1, 10)})
+        ids = self.api.resolve_checksums(["b1", "b2", "unsubmitted", "b2"])
+        self.assertEqual(ids, {"b1": 1, "b2": 2, "unsubmitted": None})
+        self.assertEqual(sorted(self.lookups), ["b2", "unsubmitted"])
+
+        # resolved checksums are added to the index
+        self.api.resolve_checksums(["b2"])
+        self.assertEqual(len(self.lookups), 2)
+
+    def test_errors(self):
+        with self.assertRaises(BulkLookupError) as context:
+            self.api.resolve_checksums(["b1", "timeout"])
+        self.assertEqual(context.exception.results, {"b1": 1})
+        self.assertEqual(context.exception.errors[0][0], ["timeout"])
+
+
+class TestBeatmapChecksum(TestCase):
+    def setUp(self):
+        self.api = offline_client(self)
+        self.lookups = []
+
+        def get(type_, url, params={}):
+            self.lookups.append(params)
+            # beatmap 1 has since been updated to checksum "new"
+            return SimpleNamespace(id=1, checksum="new")
+
+        self.api._get = get
+
+    def test_indexed(self):
+        self.api.checksum_index.set_many({"new": (1, 10)})
+        self.assertEqual(self.api.beatmap(checksum="new").id, 1)
+        self.assertEqual(self.lookups, [{"checksum": None, "filename": None, "id": 1}])
+
+    def test_outdated(self):
+        # we indexed beatmap 1 before it was updated, so the api knows it by
+        # another checksum now
+        self.api.checksum_index.set_many({"old": (1, 10)})
+        self.api.beatmap(checksum="old")
+        self.assertEqual(self.lookups[-1], {
+            "checksum": "old", "filename": None, "id": None
+        })
+        self.assertEqual(self.api.checksum_index.get_many(["old"]), {})
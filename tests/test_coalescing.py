@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+from ossapi import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight(TestCase):
+    def test_coalesces(self):
+        single_flight = SingleFlight()
+        calls = []
+        results = []
+
+        def function():
+            calls.append(1)
+            time.sleep(0.1)
+            return len(calls)
+
+        def call():
+            results.append(single_flight.do("key", function))
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [1] * 5)
+        self.assertEqual(single_flight.coalesced, 4)
+        # once the call finishes, the next call for the key is made again
+        self.assertEqual(single_flight.do("key", function), 2)
+
+    def test_shares_exceptions(self):
+        single_flight = SingleFlight()
+
+        def function():
+            time.sleep(0.1)
+            raise ValueError()
+
+        errors = []
+
+        def call():
+            try:
+                single_flight.do("key", function)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 3)
+
+
+class TestAsyncSingleFlight(TestCase):
+    def test_coalesces(self):
+        single_flight = AsyncSingleFlight()
+        calls = []
+
+        async def function(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return value
+
+        async def main():
+            results = await asyncio.gather(
+                single_flight.do("key", lambda: function(1)),
+                single_flight.do("key", lambda: function(1)),
+                single_flight.do("other key", lambda: function(2)),
+            )
+            self.assertEqual(results, [1, 1, 2])
+
+        asyncio.run(main())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(single_flight.coalesced, 1)
+
+    def test_cancel_one_caller(self):
+        single_flight = AsyncSingleFlight()
+
+        async def function():
+            await asyncio.sleep(0.05)
+            return 1
+
+        async def main():
+            tasks = [
+                asyncio.ensure_future(single_flight.do("key", function))
+                for _ in range(2)
+            ]
+            await asyncio.sleep(0)
+            tasks[0].cancel()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            self.assertIsInstance(results[0], asyncio.CancelledError)
+            self.assertEqual(results[1], 1)
+
+        asyncio.run(main())
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from unittest import TestCase
+
+from ossapi import AdaptiveConcurrencyLimiter
+
+
+def sent(seconds_ago):
+    return time.monotonic() - seconds_ago
+
+
+class TestAdaptiveConcurrencyLimiter(TestCase):
+    def fill(self, limiter):
+        # take every slot, so the limit is what's holding us back
+        async def fill():
+            for _ in range(limiter.limit - limiter.in_flight):
+                await limiter.acquire()
+
+        asyncio.run(fill())
+
+    def test_grow(self):
+        limiter = AdaptiveConcurrencyLimiter(2)
+        for _ in range(4):
+            self.fill(limiter)
+            limiter.release(sent(0.1), status=200)
+        self.assertEqual(limiter.limit, 3)
+
+        # an idle limiter doesn't grow
+        limiter = AdaptiveConcurrencyLimiter(2)
+        asyncio.run(limiter.acquire())
+        limiter.release(sent(0.1), status=200)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_shrink(self):
+        for outcome in [{"status": 429}, {"status": 503}, {"error": True}]:
+            limiter = AdaptiveConcurrencyLimiter(8)
+            self.fill(limiter)
+            limiter.release(sent(0.1), **outcome)
+            self.assertEqual(limiter.limit, 4)
+
+        # a request which was never sent doesn't affect the limit
+        limiter = AdaptiveConcurrencyLimiter(8)
+        self.fill(limiter)
+        limiter.release(sent(0.1))
+        self.assertEqual(limiter.limit, 8)
+
+    def test_backoff_generation(self):
+        limiter = AdaptiveConcurrencyLimiter(8)
+        self.fill(limiter)
+        sent_at = sent(0.1)
+        limiter.release(sent_at, status=429)
+        # requests sent before we backed off don't back off again
+        limiter.release(sent_at, status=429)
+        self.assertEqual(limiter.limit, 4)
+        # but requests sent after do
+        limiter.release(time.monotonic(), status=429)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_latency_spike(self):
+        limiter = AdaptiveConcurrencyLimiter(8, max_limit=8)
+        self.fill(limiter)
+        for _ in range(8):
+            limiter.release(sent(0.1), status=200)
+        self.fill(limiter)
+        limiter.release(sent(1), status=200)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_latency_rises(self):
+        limiter = AdaptiveConcurrencyLimiter(8, max_limit=8)
+        limiter.release(sent(0.1), status=200)
+        # latency rises, and stays high
+        for _ in range(100):
+            self.fill(limiter)
+            limiter.release(sent(1), status=200)
+        # the higher latency became the usual latency, and the limit recovered
+        self.assertGreater(limiter._baseline, 1 / limiter.latency_tolerance)
+        self.assertEqual(limiter.limit, 8)
+
+    def test_cancel(self):
+        limiter = AdaptiveConcurrencyLimiter(1)
+
+        async def main():
+            await limiter.acquire()
+            waiter = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+            self.assertEqual(len(limiter._waiters), 0)
+            limiter.release(sent(0.1))
+            self.assertEqual(limiter.in_flight, 0)
+
+        asyncio.run(main())
+
+    def test_cancel_after_wake(self):
+        limiter = AdaptiveConcurrencyLimiter(1)
+
+        async def main():
+            await limiter.acquire()
+            first = asyncio.ensure_future(limiter.acquire())
+            second = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            # hands the slot to the first waiter, which is cancelled before it
+            # gets to run
+            limiter.release(sent(0.1))
+            first.cancel()
+            # the slot is passed on to the second waiter
+            await asyncio.wait_for(second, timeout=1)
+            self.assertTrue(first.cancelled())
+            self.assertEqual(limiter.in_flight, 1)
+
+        asyncio.run(main())
@@ -0,0 +1,101 @@
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase, skipIf
+
+import requests
+from requests_oauthlib import OAuth2Session
+
+from ossapi import Priority
+from ossapi.scheduler import current_priority
+
+from tests.utils import offline_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_HEAD = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+@skipIf(shutil.which("openssl") is None, "requires openssl to create a certificate")
+class TestConnections(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.TemporaryDirectory()
+        cls.cert = Path(cls.dir.name) / "cert.pem"
+        key = Path(cls.dir.name) / "key.pem"
+        command = (
+            "openssl req -x509 -newkey rsa:2048 -nodes -days 1 -subj /CN=localhost "
+            f"-addext subjectAltName=DNS:localhost -keyout {key} -out {cls.cert}"
+        )
+        subprocess.run(command.split(), check=True, capture_output=True)
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cls.cert, key)
+        cls.server = ThreadingHTTPServer(("localhost", 0), _Handler)
+        cls.server.socket = context.wrap_socket(cls.server.socket, server_side=True)
+        cls.url = f"https://localhost:{cls.server.server_address[1]}/"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.dir.cleanup()
+
+    def setUp(self):
+        self.api = offline_client(self)
+        # our certificate is self signed
+        self.api._ssl_context.load_verify_locations(self.cert)
+        self.session = requests.Session()
+        self.session.mount("https://", self.api._adapter)
+
+    def test_session_resumed(self):
+        self.session.get(self.url)
+        # force a new connection
+        self.api._adapter.close()
+        self.session.get(self.url)
+
+        stats = self.api.connection_stats()
+        self.assertEqual(stats.connections_opened, 2)
+        self.assertEqual(stats.tls_sessions_resumed, 1)
+
+    def test_idle_connections(self):
+        self.assertEqual(self.api.connection_stats().idle_connections, 0)
+        self.session.get(self.url)
+        self.session.get(self.url)
+        stats = self.api.connection_stats()
+        # the second request reused the first connection
+        self.assertEqual(stats.connections_opened, 1)
+        self.assertEqual(stats.idle_connections, 1)
+
+    def test_keepalive_rate_limited(self):
+        api = offline_client(self, min_connections=2)
+        api._ssl_context.load_verify_locations(self.cert)
+        api.session = OAuth2Session()
+        api.session.mount("https://", api._adapter)
+        api.base_url = self.url
+        priorities = []
+        api.rate_limiter = SimpleNamespace(
+            acquire=lambda: priorities.append(current_priority.get())
+        )
+
+        api._keep_connections_alive()
+        # each keepalive request counts against our rate limit, behind any
+        # actual requests
+        self.assertEqual(priorities, [Priority.BACKGROUND] * 2)
+        self.assertEqual(api.connection_stats().idle_connections, 2)
@@ -0,0 +1,202 @@
+import asyncio
+import gc
+from types import SimpleNamespace
+from unittest import TestCase
+
+from ossapi import OssapiAsync
+from ossapi.models import BeatmapCompact, BeatmapPlaycount, Comment
+from ossapi.utils import ModelGroup, unfollowed_foreign_keys
+
+from tests.utils import offline_client
+
+
+def comment(api, user_id, edited_by_id=None):
+    return Comment(user_id=user_id, edited_by_id=edited_by_id, _api=api)
+
+
+def playcount(api, beatmap_id):
+    return BeatmapPlaycount(beatmap_id=beatmap_id, _beatmap=None, _api=api)
+
+
+def grouped(models):
+    group = ModelGroup()
+    for model in models:
+        group.add(model)
+    return models
+
+
+class TestFollowForeignKeys(TestCase):
+    def setUp(self):
+        self.api = offline_client(self)
+        self.calls = []
+        self.beatmap_calls = []
+
+        def user(user_id):
+            self.calls.append(user_id)
+            if user_id == 404:
+                raise ValueError("User not found")
+            return SimpleNamespace(id=user_id)
+
+        def users_bulk(ids):
+            self.calls.append(ids)
+            return {id_: SimpleNamespace(id=id_) for id_ in ids if id_ != 404}
+
+        def beatmaps_bulk(ids):
+            self.beatmap_calls.append(ids)
+            return {
+                id_: BeatmapCompact(id=id_, user_id=id_ * 10, _api=self.api)
+                for id_ in ids
+            }
+
+        self.api.user = user
+        self.api.users_bulk = users_bulk
+        self.api.beatmaps_bulk = beatmaps_bulk
+
+    def test_unfollowed(self):
+        models = [comment(None, 1), comment(None, None), comment(None, 2)]
+        models[2]._set_followed("user", 2, None)
+        unfollowed = unfollowed_foreign_keys(models, "user", "user_id")
+        self.assertEqual(unfollowed, [(models[0], 1)])
+
+    def test_group(self):
+        playcounts = grouped([playcount(self.api, id_ % 3) for id_ in range(6)])
+        # different model types aren't followed together
+        other = comment(self.api, 10)
+        playcounts[0]._ossapi_group.add(other)
+
+        beatmaps = [model.beatmap() for model in playcounts]
+        self.assertEqual([beatmap.id for beatmap in beatmaps], [0, 1, 2, 0, 1, 2])
+        self.assertEqual(self.beatmap_calls, [[0, 1, 2]])
+
+        # followed foreign keys are memoized
+        playcounts[0].beatmap()
+        self.assertEqual(len(self.beatmap_calls), 1)
+
+    def test_users(self):
+        comments = grouped([comment(self.api, 1), comment(self.api, 2)])
+        # full users have no batch endpoint, so only this comment's user is
+        # looked up
+        self.assertEqual(comments[0].user().id, 1)
+        self.assertEqual(self.calls, [1])
+        comments[0].user()
+        self.assertEqual(self.calls, [1])
+        # other foreign keys are followed separately
+        self.assertIsNone(comments[0].edited_by())
+        self.assertEqual(self.calls, [1])
+
+    def test_beatmapsets(self):
+        calls = []
+        self.api.beatmapset = lambda id_: calls.append(id_) or SimpleNamespace(id=id_)
+        beatmaps = grouped(
+            [
+                BeatmapCompact(beatmapset_id=id_, _beatmapset=None, _api=self.api)
+                for id_ in [1, 2]
+            ]
+        )
+        # there's no batch endpoint for beatmapsets, so only this beatmap's
+        # beatmapset is looked up
+        self.assertEqual(beatmaps[0].beatmapset().id, 1)
+        self.assertEqual(calls, [1])
+
+    def test_compact_foreign_users(self):
+        self.api.compact_foreign_users = True
+        comments = grouped([comment(self.api, user_id % 3) for user_id in range(6)])
+        users = [model.user() for model in comments]
+        self.assertEqual([user.id for user in users], [0, 1, 2, 0, 1, 2])
+        self.assertEqual(self.calls, [[0, 1, 2]])
+
+    def test_missing(self):
+        comments = grouped([comment(self.api, 404), comment(self.api, 1)])
+        with self.assertRaises(ValueError):
+            comments[0].user()
+
+        self.api.beatmaps_bulk = lambda ids: {}
+        self.api.beatmap = lambda beatmap_id: SimpleNamespace(id=beatmap_id)
+        # a beatmap the batch endpoint didn't return is looked up on its own
+        self.assertEqual(playcount(self.api, 5).beatmap().id, 5)
+
+    def test_group_weak(self):
+        playcounts = grouped([playcount(self.api, 1), playcount(self.api, 2)])
+        group = playcounts[0]._ossapi_group
+        del playcounts[1]
+        gc.collect()
+        # holding on to one model doesn't keep the rest of its group alive
+        self.assertEqual(group.models, playcounts)
+
+    def test_existing(self):
+        beatmapset = SimpleNamespace(id=1)
+        beatmap = BeatmapCompact(beatmapset_id=1, _beatmapset=beatmapset, _api=None)
+        self.assertIs(beatmap.beatmapset(), beatmapset)
+
+    def test_prefetch(self):
+        # models from different requests
+        comments = [comment(self.api, 1), comment(self.api, 2, edited_by_id=3)]
+        for model in comments:
+            grouped([model])
+
+        self.api.prefetch(comments, "user", "edited_by")
+        self.assertEqual(sorted(self.calls), [1, 2, 3])
+        self.assertEqual(comments[1].edited_by().id, 3)
+        self.assertEqual(len(self.calls), 3)
+
+        # prefetching raises like following would
+        with self.assertRaises(ValueError):
+            self.api.prefetch([comment(self.api, 404)], "user")
+
+    def test_prefetch_compact(self):
+        comments = [comment(self.api, user_id) for user_id in [1, 2, 404]]
+        with self.assertRaises(ValueError):
+            self.api.prefetch(comments, "user", compact_users=True)
+        # the missing user was looked up on its own, to raise
+        self.assertEqual(self.calls, [[1, 2, 404], 404])
+        self.assertEqual(comments[1].user().id, 2)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_prefetch_nested(self):
+        playcounts = [playcount(self.api, id_) for id_ in [1, 2, 1]]
+        self.api.prefetch(playcounts, "beatmap.user", compact_users=True)
+        self.assertEqual(self.beatmap_calls, [[1, 2]])
+        self.assertEqual(self.calls, [[10, 20]])
+        self.assertEqual(playcounts[2].beatmap().user().id, 10)
+
+
+class TestFollowForeignKeysAsync(TestCase):
+    def setUp(self):
+        self.api = offline_client(self, OssapiAsync)
+        self.calls = []
+
+        async def user(user_id):
+            self.calls.append(user_id)
+            if user_id == 404:
+                raise ValueError("User not found")
+            return SimpleNamespace(id=user_id)
+
+        async def users_bulk(ids):
+            self.calls.append(ids)
+            return {id_: SimpleNamespace(id=id_) for id_ in ids}
+
+        self.api.user = user
+        self.api.users_bulk = users_bulk
+
+    def test_users(self):
+        comments = grouped([comment(self.api, user_id) for user_id in range(3)])
+
+        async def main():
+            return [await model.user() for model in comments]
+
+        users = asyncio.run(main())
+        self.assertEqual([user.id for user in users], [0, 1, 2])
+        self.assertEqual(self.calls, [0, 1, 2])
+
+        with self.assertRaises(ValueError):
+            asyncio.run(comment(self.api, 404).user())
+
+    def test_prefetch(self):
+        comments = [comment(self.api, user_id) for user_id in range(3)]
+
+        async def main():
+            await self.api.prefetch(comments, "user", compact_users=True)
+            return await comments[2].user()
+
+        self.assertEqual(asyncio.run(main()).id, 2)
+        self.assertEqual(self.calls, [[0, 1, 2]])
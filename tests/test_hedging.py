@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+from ossapi import HedgePolicy, OssapiAsync
+from ossapi.utils import EndpointCall, current_endpoint
+
+from tests.utils import offline_client
+
+USER = EndpointCall("user", "users")
+
+
+class TestHedgePolicy(TestCase):
+    def test_should_hedge(self):
+        policy = HedgePolicy({"user"})
+        self.assertTrue(policy.should_hedge("GET", USER))
+        self.assertFalse(policy.should_hedge("POST", USER))
+        self.assertFalse(policy.should_hedge("GET", EndpointCall("beatmap", "b")))
+        self.assertFalse(policy.should_hedge("GET", None))
+
+    def test_delay(self):
+        policy = HedgePolicy(percentile=90, min_delay=0.05, min_samples=10)
+        for latency in range(1, 10):
+            policy.record(USER, latency / 10)
+        # not enough samples yet
+        self.assertIsNone(policy.delay(USER))
+
+        policy.record(USER, 1)
+        self.assertEqual(policy.delay(USER), 0.9)
+        # other endpoints are tracked separately
+        self.assertIsNone(policy.delay(EndpointCall("beatmap", "b")))
+
+    def test_min_delay(self):
+        policy = HedgePolicy(min_delay=0.05, min_samples=1)
+        policy.record(USER, 0.01)
+        self.assertEqual(policy.delay(USER), 0.05)
+
+    def test_window(self):
+        policy = HedgePolicy(percentile=100, min_samples=1, window=2)
+        for latency in [5, 1, 1]:
+            policy.record(USER, latency)
+        # the slow latency fell out of the window
+        self.assertEqual(policy.delay(USER), 1)
+
+
+class TestHedging(TestCase):
+    def setUp(self):
+        self.policy = HedgePolicy(min_delay=0.05, min_samples=1, max_workers=2)
+        self.policy.record(USER, 0)
+        self.api = offline_client(self, hedge_policy=self.policy)
+        self.sent = []
+
+        def send_once(method, url, **kwargs):
+            self.sent.append(time.monotonic())
+            time.sleep(0.2)
+            return "response"
+
+        self.api._send_once = send_once
+
+    def send(self):
+        token = current_endpoint.set(USER)
+        try:
+            return self.api._send_attempt("GET", "https://osu.ppy.sh/api/v2/users/1")
+        finally:
+            current_endpoint.reset(token)
+
+    def fill_pool(self, workers, seconds):
+        # occupy ``workers`` threads of the hedge pool for ``seconds``
+        for _ in range(workers):
+            self.api._hedge_pool().submit(time.sleep, seconds)
+
+    def test_hedge(self):
+        self.assertEqual(self.send(), "response")
+        self.assertEqual(len(self.sent), 2)
+
+    def test_delay_from_start(self):
+        self.fill_pool(2, 0.2)
+        self.send()
+        # the delay didn't count the time the primary spent queued
+        self.assertEqual(len(self.sent), 2)
+        self.assertGreaterEqual(self.sent[1] - self.sent[0], 0.04)
+
+    def test_saturated(self):
+        self.policy.max_workers = 1
+        self.send()
+        # a hedge would have to wait for the primary's thread
+        self.assertEqual(len(self.sent), 1)
+
+    def test_concurrent(self):
+        self.api._send_once = lambda method, url, **kwargs: time.sleep(0.01)
+        threads = [threading.Thread(target=self.send) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # every request gave its thread back
+        self.assertEqual(self.api._hedge_pool_busy, 0)
+
+
+class TestHedgingAsync(TestCase):
+    def setUp(self):
+        self.policy = HedgePolicy(min_delay=0.05, min_samples=1)
+        self.policy.record(USER, 0)
+        self.api = offline_client(self, OssapiAsync, hedge_policy=self.policy)
+        self.sent = []
+
+    def send(self):
+        async def main():
+            token = current_endpoint.set(USER)
+            try:
+                return await self.api._send_attempt(
+                    "GET", "https://osu.ppy.sh/api/v2/users/1"
+                )
+            finally:
+                current_endpoint.reset(token)
+
+        return asyncio.run(main())
+
+    def test_delay_from_start(self):
+        calls = []
+
+        async def send_once(method, url, *, started=None, **kwargs):
+            calls.append(url)
+            name = "primary" if len(calls) == 1 else "hedge"
+            if name == "primary":
+                # the primary waits, say for the concurrency limiter, before
+                # it's sent
+                await asyncio.sleep(0.2)
+            if started is not None:
+                started.set()
+            self.sent.append((name, time.monotonic()))
+            await asyncio.sleep(0.2)
+            return "response"
+
+        self.api._send_once = send_once
+        self.assertEqual(self.send(), "response")
+        # the delay didn't count the time the primary spent waiting
+        (primary, sent_at), (hedge, hedged_at) = self.sent
+        self.assertEqual((primary, hedge), ("primary", "hedge"))
+        self.assertGreaterEqual(hedged_at - sent_at, 0.04)
+
+    def test_error_before_start(self):
+        async def send_once(method, url, **kwargs):
+            raise ValueError()
+
+        self.api._send_once = send_once
+        with self.assertRaises(ValueError):
+            self.send()
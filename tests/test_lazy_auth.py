@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest import TestCase
+
+from oauthlib.oauth2 import TokenExpiredError
+
+from ossapi import OssapiAsync
+
+from tests.utils import offline_client
+
+
+class AuthenticationCalled(Exception):
+    pass
+
+
+class TestLazyAuth(TestCase):
+    def test_lazy(self):
+        api = offline_client(self)
+        calls = []
+
+        def authenticate(*, token):
+            calls.append(token)
+            return SimpleNamespace(token={})
+
+        api.authenticate = authenticate
+        # constructing the client didn't authenticate
+        self.assertIsNone(api.session)
+
+        api._ensure_authenticated()
+        api._ensure_authenticated()
+        self.assertEqual(calls, [None])
+
+    def test_async_off_event_loop(self):
+        api = offline_client(self, OssapiAsync)
+        threads = []
+
+        def authenticate(*, token):
+            threads.append(threading.current_thread())
+            raise AuthenticationCalled()
+
+        api.authenticate = authenticate
+
+        async def main():
+            await api._send_once("GET", "https://osu.ppy.sh/api/v2/me")
+
+        with self.assertRaises(AuthenticationCalled):
+            asyncio.run(main())
+        # authenticating blocks, so it mustn't run on the event loop's thread
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    def test_async_grant_off_event_loop(self):
+        api = offline_client(self, OssapiAsync)
+        threads = []
+
+        async def request_async(*args, **kwargs):
+            raise TokenExpiredError()
+
+        def new_client_grant(client_id, client_secret):
+            threads.append(threading.current_thread())
+            raise AuthenticationCalled()
+
+        api.session = SimpleNamespace(token={}, request_async=request_async)
+        api._new_client_grant = new_client_grant
+
+        async def main():
+            await api._send_once("GET", "https://osu.ppy.sh/api/v2/me")
+
+        with self.assertRaises(AuthenticationCalled):
+            asyncio.run(main())
+        # granting a new token takes the token store's lock and makes a
+        # request, so it mustn't run on the event loop's thread either
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
@@ -0,0 +1,173 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest import TestCase
+
+from ossapi import Cursor, OssapiAsync
+from ossapi.models import Events, Rankings
+
+from tests.utils import offline_client
+
+# three pages of three items each
+PAGES = [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
+
+
+def _page(cursor):
+    page = 1 if cursor is None else cursor.page
+    next_cursor = Cursor(page=page + 1) if page < len(PAGES) else None
+    return Rankings(ranking=PAGES[page - 1], cursor=next_cursor, _api=None)
+
+
+class TestPaginate(TestCase):
+    def setUp(self):
+        self.api = offline_client(self)
+        self.calls = []
+
+    def ranking(self, mode, *, cursor=None):
+        self.calls.append((mode, cursor))
+        return _page(cursor)
+
+    def test_paginate(self):
+        items = list(self.api.paginate(self.ranking, "osu"))
+        self.assertEqual(items, [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(
+            self.calls,
+            [("osu", None), ("osu", Cursor(page=2)), ("osu", Cursor(page=3))],
+        )
+
+    def test_cursor(self):
+        items = list(self.api.paginate(self.ranking, "osu", cursor=Cursor(page=3)))
+        self.assertEqual(items, [7, 8, 9])
+
+    def test_max_items(self):
+        items = list(self.api.paginate(self.ranking, "osu", max_items=5))
+        self.assertEqual(items, [1, 2, 3, 4, 5])
+        self.assertEqual(len(self.calls), 2)
+
+        items = list(self.api.paginate(self.ranking, "osu", max_items=3))
+        self.assertEqual(items, [1, 2, 3])
+        # we don't request pages we won't use
+        self.assertEqual(len(self.calls), 3)
+
+    def test_prefetch(self):
+        requested = threading.Event()
+
+        def ranking(mode, *, cursor=None):
+            if cursor is not None:
+                requested.set()
+            return _page(cursor)
+
+        items = self.api.paginate(ranking, "osu")
+        self.assertEqual(next(items), 1)
+        # the next page is requested before the first page is consumed
+        self.assertTrue(requested.wait(timeout=5))
+        items.close()
+
+    def test_cursor_string(self):
+        cursor_strings = []
+
+        def events(*, sort=None, cursor_string=None):
+            cursor_strings.append(cursor_string)
+            page = 0 if cursor_string is None else int(cursor_string)
+            next_cursor = str(page + 1) if page + 1 < len(PAGES) else None
+            return Events(events=PAGES[page], cursor_string=next_cursor, _api=None)
+
+        items = list(self.api.paginate(events, sort="id_desc"))
+        self.assertEqual(items, [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(cursor_strings, [None, "1", "2"])
+
+    def test_stop(self):
+        items = self.api.paginate(self.ranking, "osu", stop=lambda item: item > 4)
+        self.assertEqual(list(items), [1, 2, 3, 4])
+        # at most one page ahead is requested
+        self.assertLessEqual(len(self.calls), 3)
+
+    def test_not_paginated(self):
+        with self.assertRaises(ValueError):
+            self.api.paginate(self.api.user, 12092800)
+
+
+class TestFetchPages(TestCase):
+    def setUp(self):
+        self.api = offline_client(self)
+        self.offsets = []
+        self.items = [SimpleNamespace(id=i) for i in range(250)]
+
+    def user_kudosu(self, user_id, *, limit=None, offset=None):
+        self.offsets.append(offset)
+        return self.items[offset : offset + limit]
+
+    def test_fetch_pages(self):
+        items = self.api.fetch_pages(self.user_kudosu, 1, concurrency=2)
+        self.assertEqual(items, self.items)
+        self.assertEqual(sorted(self.offsets), [0, 100, 200, 300])
+
+    def test_max_items(self):
+        items = self.api.fetch_pages(self.user_kudosu, 1, max_items=150)
+        self.assertEqual(items, self.items[:150])
+        self.assertEqual(sorted(self.offsets), [0, 100])
+
+    def test_dedupe(self):
+        def user_kudosu(user_id, *, limit=None, offset=None):
+            # as if an item was added to the start of the list between
+            # fetching the first and second pages
+            offset = max(offset - 1, 0)
+            return self.items[offset : offset + limit]
+
+        items = self.api.fetch_pages(user_kudosu, 1, page_size=50)
+        self.assertEqual(items, self.items)
+
+    def test_error(self):
+        def user_kudosu(user_id, *, limit=None, offset=None):
+            if offset == 100:
+                raise ValueError()
+            return self.items[offset : offset + limit]
+
+        with self.assertRaises(ValueError):
+            self.api.fetch_pages(user_kudosu, 1)
+
+    def test_not_paginated(self):
+        with self.assertRaises(ValueError):
+            self.api.fetch_pages(self.api.ranking, "osu", "performance")
+
+    def test_search_beatmaps_passed(self):
+        requested = []
+
+        def _get(type_, url, params):
+            ids = params["beatmapset_ids"]
+            requested.append(ids)
+            return SimpleNamespace(beatmaps_passed=[SimpleNamespace(id=i) for i in ids])
+
+        self.api._get = _get
+        beatmaps = self.api.search_beatmaps_passed(1, list(range(120)))
+        self.assertEqual([beatmap.id for beatmap in beatmaps], list(range(120)))
+        self.assertEqual(sorted(len(ids) for ids in requested), [20, 50, 50])
+
+
+class TestPaginateAsync(TestCase):
+    def test_paginate(self):
+        calls = []
+        api = offline_client(self, OssapiAsync)
+
+        async def ranking(mode, *, cursor=None):
+            calls.append(cursor)
+            return _page(cursor)
+
+        async def main():
+            return [item async for item in api.paginate(ranking, "osu", max_items=7)]
+
+        self.assertEqual(asyncio.run(main()), [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(calls, [None, Cursor(page=2), Cursor(page=3)])
+
+    def test_fetch_pages(self):
+        offsets = []
+        items = [SimpleNamespace(id=i) for i in range(250)]
+        api = offline_client(self, OssapiAsync)
+
+        async def user_kudosu(user_id, *, limit=None, offset=None):
+            offsets.append(offset)
+            return items[offset : offset + limit]
+
+        fetched = asyncio.run(api.fetch_pages(user_kudosu, 1))
+        self.assertEqual(fetched, items)
+        self.assertEqual(offsets, [0, 100, 200, 300])
@@ -0,0 +1,147 @@
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase
+
+from ossapi import (
+    CoordinatedRateLimiter,
+    FileRateLimiter,
+    RateLimitCoordinator,
+    RateLimitState,
+    TokenBucket,
+)
+
+
+class TestTokenBucket(TestCase):
+    def test_burst(self):
+        bucket = TokenBucket(60, 60, burst=5)
+        # a fresh bucket lets a full burst through without waiting
+        for _ in range(5):
+            self.assertEqual(bucket.reserve(), 0)
+        # after which requests are spaced out at `rate`
+        self.assertAlmostEqual(bucket.reserve(), 1, delta=0.05)
+        self.assertAlmostEqual(bucket.reserve(), 2, delta=0.05)
+
+    def test_sustained_rate(self):
+        bucket = TokenBucket(100, 1, burst=1)
+        start = time.monotonic()
+        for _ in range(21):
+            bucket.acquire()
+        # 20 intervals of 10ms each
+        self.assertAlmostEqual(time.monotonic() - start, 0.2, delta=0.05)
+
+        stats = bucket.stats()
+        self.assertEqual(stats.requests, 21)
+        self.assertEqual(stats.delayed, 20)
+        self.assertGreater(stats.total_wait, 0)
+
+    def test_adaptive(self):
+        bucket = TokenBucket(60, 60, burst=10)
+        state = RateLimitState()
+        state.update({"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "2"})
+        bucket.observe(state)
+        # the api only has room for 2 more requests, even though our bucket
+        # is full
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertGreater(bucket.reserve(), 0)
+
+
+class TestRateLimitState(TestCase):
+    def test_malformed_headers(self):
+        state = RateLimitState()
+        headers = {"X-RateLimit-Limit": "1200", "X-RateLimit-Remaining": "1e3"}
+        self.assertTrue(state.update(headers))
+        self.assertEqual(state.limit, 1200)
+        self.assertIsNone(state.remaining)
+
+        headers = {"X-RateLimit-Limit": "", "X-RateLimit-Remaining": "?"}
+        self.assertFalse(state.update(headers))
+        self.assertEqual(state.limit, 1200)
+
+
+class TestFileRateLimiter(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.limiter = FileRateLimiter(Path(directory.name) / "ratelimit", 60, 60)
+        self.addCleanup(self.limiter.close)
+
+    def test_observe(self):
+        updates = []
+        update = self.limiter._update
+        self.limiter._update = lambda f: updates.append(f) or update(f)
+        self.limiter.reserve()
+
+        state = RateLimitState()
+        state.update({"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "1000"})
+        # plenty of budget left, which doesn't change anything
+        self.limiter.observe(state)
+        self.assertEqual(len(updates), 1)
+
+        state.update({"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "0"})
+        self.limiter.observe(state)
+        self.assertEqual(len(updates), 2)
+        self.assertGreater(self.limiter.reserve(), 0)
+
+
+class TestRateLimitCoordinator(TestCase):
+    def test_shared_budget(self):
+        coordinator = RateLimitCoordinator("localhost", 0, 60, 60, burst=2)
+        coordinator.start()
+        self.addCleanup(coordinator.shutdown)
+
+        limiter1 = CoordinatedRateLimiter("localhost", coordinator.port)
+        limiter2 = CoordinatedRateLimiter("localhost", coordinator.port)
+        self.assertEqual(limiter1.reserve(), 0)
+        self.assertEqual(limiter2.reserve(), 0)
+        # the burst is used up between the two limiters
+        self.assertAlmostEqual(limiter1.reserve(), 1, delta=0.05)
+
+        # different keys draw from different budgets
+        other = CoordinatedRateLimiter("localhost", coordinator.port, key="other")
+        self.assertEqual(other.reserve(), 0)
+
+
+class TestCoordinatedRateLimiter(TestCase):
+    def serve(self, reply):
+        # a coordinator which closes each connection after one command
+        commands = []
+        closed = threading.Event()
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                commands.append(self.rfile.readline())
+                if reply:
+                    self.wfile.write(b"0\n")
+                    self.wfile.flush()
+                self.connection.shutdown(socket.SHUT_RDWR)
+                closed.set()
+
+        server = socketserver.ThreadingTCPServer(("localhost", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        limiter = CoordinatedRateLimiter("localhost", server.server_address[1])
+        return limiter, commands, closed
+
+    def test_reconnect(self):
+        limiter, commands, closed = self.serve(reply=True)
+        self.assertEqual(limiter.reserve(), 0)
+        closed.wait()
+        # give the close time to reach us
+        time.sleep(0.05)
+        # the coordinator closed our connection, as if it restarted
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(len(commands), 2)
+
+    def test_lost_reply(self):
+        limiter, commands, _closed = self.serve(reply=False)
+        with self.assertRaises(ConnectionError):
+            limiter.reserve()
+        # the coordinator may have reserved for us, so we don't retry
+        self.assertEqual(len(commands), 1)
@@ -0,0 +1,116 @@
+import asyncio
+import struct
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from ossapi import FileReplayStore, OssapiAsync
+from ossapi.replay_store import replay_hashes
+
+from tests.utils import offline_client
+
+
+def _string(value):
+    encoded = value.encode("utf-8")
+    return b"\x0b" + bytes([len(encoded)]) + encoded
+
+
+def _replay(beatmap_hash, replay_hash, body=b"frames"):
+    # just enough of the .osr format for the store to index it
+    return (
+        struct.pack("<bi", 0, 20220705)
+        + _string(beatmap_hash)
+        + _string("tybug")
+        + _string(replay_hash)
+        + body
+    )
+
+
+class TestFileReplayStore(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_replay_hashes(self):
+        self.assertEqual(replay_hashes(_replay("b1", "r1")), ("b1", "r1"))
+        with self.assertRaises(ValueError):
+            replay_hashes(b"<html></html>")
+        with self.assertRaises(ValueError):
+            replay_hashes(b"")
+
+    def test_roundtrip(self):
+        store = FileReplayStore(self.path)
+        replay = _replay("b1", "r1")
+        store.put("1", replay)
+        self.assertEqual(store.get("1"), replay)
+        self.assertIsNone(store.get("2"))
+        # as if from another process
+        self.assertEqual(FileReplayStore(self.path).get("1"), replay)
+
+    def test_content_addressed(self):
+        store = FileReplayStore(self.path)
+        replay = _replay("b1", "r1")
+        store.put("1", replay)
+        store.put("osu/1", replay)
+        self.assertEqual(len(list(self.path.glob("*/*.osr"))), 1)
+
+    def test_compress(self):
+        store = FileReplayStore(self.path, compress=True)
+        replay = _replay("b1", "r1", body=b"frames" * 100)
+        store.put("1", replay)
+        self.assertEqual(store.get("1"), replay)
+        (file,) = self.path.glob("*/*.osr.z")
+        self.assertLess(file.stat().st_size, len(replay))
+        # uncompressed stores still read compressed replays
+        self.assertEqual(FileReplayStore(self.path).get("1"), replay)
+
+    def test_find(self):
+        store = FileReplayStore(self.path)
+        store.put("1", _replay("b1", "r1"))
+        store.put("2", _replay("b1", "r2"))
+        store.put("3", _replay("b2", "r3"))
+        self.assertEqual(sorted(store.find(beatmap_hash="b1")), ["1", "2"])
+        self.assertEqual(store.find(replay_hash="r3"), ["3"])
+        self.assertEqual(store.find(beatmap_hash="b1", replay_hash="r3"), [])
+
+
+class TestDownloadScore(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.store = FileReplayStore(self.dir.name)
+
+    def test_stored(self):
+        api = offline_client(self, replay_store=self.store)
+        api._download_replay = lambda url: _replay("b1", "r1")
+        self.assertEqual(api.download_score(1, raw=True), _replay("b1", "r1"))
+        self.assertEqual(self.store.get("1"), _replay("b1", "r1"))
+
+    def test_not_a_replay(self):
+        # a successful download which isn't a replay is returned as is, but
+        # not stored
+        api = offline_client(self, replay_store=self.store)
+        api._download_replay = lambda url: b"<html></html>"
+        self.assertEqual(api.download_score(1, raw=True), b"<html></html>")
+        self.assertIsNone(self.store.get("1"))
+
+    def test_async(self):
+        api = offline_client(self, OssapiAsync, replay_store=self.store)
+
+        async def download_replay(url):
+            if url.endswith("/2/download"):
+                return b"<html></html>"
+            return _replay("b1", "r1")
+
+        api._download_replay = download_replay
+
+        async def main():
+            await api.download_score(1, raw=True)
+            return await api.download_score(2, raw=True)
+
+        self.assertEqual(asyncio.run(main()), b"<html></html>")
+        self.assertEqual(self.store.get("1"), _replay("b1", "r1"))
+        self.assertIsNone(self.store.get("2"))
@@ -0,0 +1,31 @@
+import time
+from email.utils import formatdate
+from unittest import TestCase
+
+from ossapi import RetryPolicy
+from ossapi.retry import parse_retry_after
+
+
+class TestRetryPolicy(TestCase):
+    def test_only_retries_get(self):
+        policy = RetryPolicy()
+        self.assertIsNotNone(policy.next_delay("GET", 429, 0, 0))
+        self.assertIsNone(policy.next_delay("POST", 429, 0, 0))
+        self.assertIsNone(policy.next_delay("GET", 404, 0, 0))
+
+    def test_limits(self):
+        policy = RetryPolicy(max_retries=2, total_timeout=10)
+        self.assertIsNone(policy.next_delay("GET", 503, 2, 0))
+        # waiting out Retry-After would take us past total_timeout
+        self.assertIsNone(policy.next_delay("GET", 429, 0, 5, retry_after=6))
+
+    def test_retry_after(self):
+        policy = RetryPolicy(base_delay=1, max_delay=1)
+        self.assertGreaterEqual(policy.delay(0, retry_after=5), 5)
+        for attempt in range(10):
+            self.assertLessEqual(policy.delay(attempt), 1)
+
+        self.assertEqual(parse_retry_after("3"), 3)
+        date = formatdate(time.time() + 60, usegmt=True)
+        self.assertAlmostEqual(parse_retry_after(date), 60, delta=2)
+        self.assertIsNone(parse_retry_after("soon"))
@@ -0,0 +1,47 @@
+import asyncio
+from unittest import TestCase
+
+from ossapi import AsyncPriorityScheduler, Priority, TokenBucket, request_priority
+
+
+class TestPriorityScheduler(TestCase):
+    def run_requests(self, scheduler, rate_limiter, priorities, *, delay=0):
+        order = []
+
+        async def request(i, priority):
+            await asyncio.sleep(delay * i)
+            with request_priority(priority):
+                await scheduler.acquire(rate_limiter)
+            order.append(i)
+            scheduler.release()
+
+        async def main():
+            await asyncio.gather(
+                *[request(i, priority) for i, priority in enumerate(priorities)]
+            )
+
+        asyncio.run(main())
+        return order
+
+    def test_priority(self):
+        scheduler = AsyncPriorityScheduler()
+        rate_limiter = TokenBucket(100, 1, burst=1)
+        # use up the burst, so every request has to wait on the rate limiter
+        rate_limiter.acquire()
+        priorities = [Priority.BACKGROUND] * 5 + [Priority.INTERACTIVE]
+        order = self.run_requests(scheduler, rate_limiter, priorities)
+        # the first background request was already waiting on the rate limiter
+        # when the interactive request arrived, but the interactive request
+        # jumps the rest.
+        self.assertEqual(order[:2], [0, 5])
+
+    def test_no_starvation(self):
+        scheduler = AsyncPriorityScheduler(promote_after=0.05)
+        rate_limiter = TokenBucket(50, 1, burst=1)
+        # one background request, followed by a steady stream of interactive
+        # requests
+        priorities = [Priority.BACKGROUND] + [Priority.INTERACTIVE] * 20
+        order = self.run_requests(scheduler, rate_limiter, priorities, delay=0.01)
+        # the background request waits a bit, but not for every interactive
+        # request.
+        self.assertLess(order.index(0), 10)
@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from unittest import TestCase
+
+from ossapi import FileTokenStore, Grant, MemoryTokenStore, Ossapi, SQLiteTokenStore
+
+from tests import get_env
+
+TOKEN = {"access_token": "a", "expires_at": 1e10}
+
+
+class TestTokenStore(TestCase):
+    def test_shared_token(self):
+        client_id = int(get_env("OSU_API_CLIENT_ID"))
+        client_secret = get_env("OSU_API_CLIENT_SECRET")
+        store = MemoryTokenStore()
+
+        api1 = Ossapi(
+            client_id, client_secret, grant=Grant.CLIENT_CREDENTIALS, token_store=store
+        )
+        # the second client should pick up the token granted by the first
+        # instead of granting its own
+        api2 = Ossapi(
+            client_id, client_secret, grant=Grant.CLIENT_CREDENTIALS, token_store=store
+        )
+        self.assertEqual(
+            api1.session.token["access_token"], api2.session.token["access_token"]
+        )
+        api2.user(12092800)
+
+
+class StoreTests:
+    # shared between the tests of each token store
+
+    def store(self):
+        raise NotImplementedError()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = Path(directory.name)
+
+    def test_save_load_remove(self):
+        store = self.store()
+        self.assertIsNone(store.load("a"))
+        store.save("a", TOKEN)
+        self.assertEqual(store.load("a"), TOKEN)
+        # as if from another process
+        self.assertEqual(self.store().load("a"), TOKEN)
+
+        store.save("a", {"access_token": "b"})
+        self.assertEqual(store.load("a"), {"access_token": "b"})
+        store.remove("a")
+        self.assertIsNone(store.load("a"))
+        # removing a missing token is fine
+        store.remove("a")
+
+    def test_lock_reentrant(self):
+        store = self.store()
+        with store.lock("a"):
+            with store.lock("a"):
+                store.save("a", TOKEN)
+            # still held
+            store.save("a", {"access_token": "b"})
+        self.assertEqual(self.store().load("a"), {"access_token": "b"})
+
+    def test_lock_exclusive(self):
+        store = self.store()
+        entered = threading.Event()
+        events = []
+
+        def locker():
+            with store.lock("a"):
+                entered.set()
+                events.append("other")
+
+        with store.lock("a"):
+            thread = threading.Thread(target=locker)
+            thread.start()
+            # the other thread waits on us
+            self.assertFalse(entered.wait(0.1))
+            store.save("a", TOKEN)
+            events.append("us")
+        thread.join()
+        self.assertEqual(events, ["us", "other"])
+        self.assertEqual(store.load("a"), TOKEN)
+
+    def test_remove_token(self):
+        store = self.store()
+        store.save("a", TOKEN)
+        Ossapi.remove_token("a", token_store=store)
+        self.assertIsNone(store.load("a"))
+
+
+class TestFileTokenStore(StoreTests, TestCase):
+    def store(self):
+        return FileTokenStore(self.dir)
+
+    def test_atomic_replace(self):
+        store = self.store()
+        store.save("a", TOKEN)
+        # a token which fails to pickle partway through writing
+        with self.assertRaises(TypeError):
+            store.save("a", {"access_token": "b", "lock": threading.Lock()})
+        # the old token is untouched, and the temporary file is cleaned up
+        self.assertEqual(store.load("a"), TOKEN)
+        self.assertEqual(os.listdir(self.dir), ["a.pickle"])
+
+
+class TestSQLiteTokenStore(StoreTests, TestCase):
+    def store(self, timeout=5):
+        return SQLiteTokenStore(self.dir / "tokens.db", timeout=timeout)
+
+    def test_lock_other_process(self):
+        store = self.store()
+        other = self.store(timeout=0.1)
+        with store.lock("a"):
+            store.save("a", TOKEN)
+            # another process can't write while we hold the lock
+            with self.assertRaises(sqlite3.OperationalError):
+                other.save("a", {"access_token": "b"})
+        self.assertEqual(other.load("a"), TOKEN)
+
+    def test_lock_rollback(self):
+        store = self.store()
+        with self.assertRaises(ValueError):
+            with store.lock("a"):
+                store.save("a", TOKEN)
+                raise ValueError()
+        self.assertIsNone(store.load("a"))
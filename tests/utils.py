@@ -0,0 +1,16 @@
+import tempfile
+
+from ossapi import Ossapi
+
+
+def offline_client(test, client_class=Ossapi, **kwargs):
+    """
+    Returns a lazily authenticated ``client_class`` for tests which don't talk
+    to the api, with its own token directory which is removed when ``test``
+    finishes.
+    """
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    return client_class(
+        1, "s", lazy_auth=True, token_directory=directory.name, **kwargs
+    )